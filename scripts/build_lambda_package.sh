@@ -14,6 +14,9 @@ echo "📦 Building Lambda deployment package..."
 # Clean previous builds
 rm -rf .deploy lambda-deployment.zip
 
+# Only runtime dependencies are bundled; the testing section of
+# requirements.txt (pytest, moto, faker, ...) is left out of the package
+
 # Build using Docker with x86_64 platform
 docker run --rm --platform linux/amd64 \
     -v "$PROJECT_ROOT:/var/task" \
@@ -21,8 +24,10 @@ docker run --rm --platform linux/amd64 \
     public.ecr.aws/sam/build-python3.11:latest \
     bash -c "
         rm -rf .deploy && mkdir -p .deploy && 
-        pip install --platform manylinux2014_x86_64 --only-binary=:all: --target .deploy -r requirements.txt && 
+        sed '/^# Testing dependencies/,\$d' requirements.txt > /tmp/requirements-runtime.txt && 
+        pip install --platform manylinux2014_x86_64 --only-binary=:all: --target .deploy -r /tmp/requirements-runtime.txt && 
         cp -r src .deploy/ && 
+        find .deploy/src -name __pycache__ -type d -prune -exec rm -rf {} + && 
         cd .deploy && 
         zip -r ../lambda-deployment.zip . -q && 
         echo '✅ Build complete' && 
@@ -23,7 +23,6 @@ ROLE_NAME="triggers-api-lambda-role"
 
 # New Lambda functions
 WEBHOOK_DELIVERY_FUNCTION="webhook-delivery-prod"
-KEY_EXPIRATION_FUNCTION="key-expiration-prod"
 ANALYTICS_PROCESSOR_FUNCTION="analytics-processor-prod"
 
 # SQS Queues
@@ -121,7 +120,8 @@ POLICY_DOC=$(cat <<EOF
                 "sqs:SendMessage",
                 "sqs:GetQueueAttributes",
                 "sqs:ReceiveMessage",
-                "sqs:DeleteMessage"
+                "sqs:DeleteMessage",
+                "sqs:ChangeMessageVisibility"
             ],
             "Resource": [
                 "arn:aws:sqs:${REGION}:${ACCOUNT_ID}:${WEBHOOK_DELIVERY_QUEUE}",
@@ -276,6 +276,15 @@ else
     
     echo "   ⏳ Waiting for API Keys table to be active..."
     aws dynamodb wait table-exists --table-name "$API_KEYS_TABLE" --region "$REGION"
+    
+    # Enable TTL so rotated keys are removed after their transition period
+    echo "   Enabling TTL on API Keys table..."
+    aws dynamodb update-time-to-live \
+        --table-name "$API_KEYS_TABLE" \
+        --time-to-live-specification Enabled=true,AttributeName=expires_at_epoch \
+        --region "$REGION" \
+        --output text > /dev/null
+    
     echo "   ✓ API Keys table created"
 fi
 
@@ -642,99 +651,13 @@ else
         --event-source-arn "$WEBHOOK_QUEUE_ARN" \
         --batch-size 10 \
         --maximum-batching-window-in-seconds 5 \
+        --function-response-types ReportBatchItemFailures \
         --region "$REGION" \
         --output text > /dev/null 2>&1 || echo "   (Event source mapping may already exist)"
     
     echo "   ✓ Webhook Delivery function created"
 fi
 
-# Key Expiration Function
-if aws lambda get-function --function-name "$KEY_EXPIRATION_FUNCTION" --region "$REGION" &>/dev/null; then
-    echo "   ✓ Key Expiration function already exists, updating..."
-    if [ "$USE_S3" = true ]; then
-        aws lambda update-function-code \
-            --function-name "$KEY_EXPIRATION_FUNCTION" \
-            --s3-bucket "$S3_BUCKET" \
-            --s3-key "$S3_KEY" \
-            --region "$REGION" \
-            --output text > /dev/null
-    else
-        aws lambda update-function-code \
-            --function-name "$KEY_EXPIRATION_FUNCTION" \
-            --zip-file fileb://lambda-deployment.zip \
-            --region "$REGION" \
-            --output text > /dev/null
-    fi
-    aws lambda wait function-updated --function-name "$KEY_EXPIRATION_FUNCTION" --region "$REGION"
-else
-    echo "   Creating Key Expiration function: $KEY_EXPIRATION_FUNCTION"
-    if [ "$USE_S3" = true ]; then
-        aws lambda create-function \
-            --function-name "$KEY_EXPIRATION_FUNCTION" \
-            --runtime python3.11 \
-            --role "$ROLE_ARN" \
-            --handler src.lambda_handlers.key_expiration.handler \
-            --code "S3Bucket=${S3_BUCKET},S3Key=${S3_KEY}" \
-            --timeout 300 \
-            --memory-size 256 \
-            --environment "Variables={
-            STAGE=$STAGE,
-            DYNAMODB_TABLE_KEYS=$API_KEYS_TABLE
-            }" \
-            --region "$REGION" \
-            --output text
-    else
-        aws lambda create-function \
-            --function-name "$KEY_EXPIRATION_FUNCTION" \
-            --runtime python3.11 \
-            --role "$ROLE_ARN" \
-            --handler src.lambda_handlers.key_expiration.handler \
-            --zip-file fileb://lambda-deployment.zip \
-            --timeout 300 \
-            --memory-size 256 \
-            --environment "Variables={
-            STAGE=$STAGE,
-            DYNAMODB_TABLE_KEYS=$API_KEYS_TABLE
-            }" \
-            --region "$REGION" \
-            --output text
-    fi
-    
-    aws lambda wait function-active --function-name "$KEY_EXPIRATION_FUNCTION" --region "$REGION"
-    
-    # Create EventBridge rule for daily schedule
-    RULE_NAME="key-expiration-daily-${STAGE}"
-    if aws events describe-rule --name "$RULE_NAME" --region "$REGION" &>/dev/null; then
-        echo "   ✓ EventBridge rule already exists"
-    else
-        aws events put-rule \
-            --name "$RULE_NAME" \
-            --schedule-expression "rate(1 day)" \
-            --description "Daily cleanup of expired API keys" \
-            --region "$REGION" \
-            --output text > /dev/null
-        
-        aws lambda add-permission \
-            --function-name "$KEY_EXPIRATION_FUNCTION" \
-            --statement-id "events-invoke-$(date +%s)" \
-            --action lambda:InvokeFunction \
-            --principal events.amazonaws.com \
-            --source-arn "arn:aws:events:${REGION}:${ACCOUNT_ID}:rule/${RULE_NAME}" \
-            --region "$REGION" \
-            --output text > /dev/null 2>&1 || echo "   (Permission may already exist)"
-        
-        aws events put-targets \
-            --rule "$RULE_NAME" \
-            --targets "Id=1,Arn=arn:aws:lambda:${REGION}:${ACCOUNT_ID}:function:${KEY_EXPIRATION_FUNCTION}" \
-            --region "$REGION" \
-            --output text > /dev/null
-        
-        echo "   ✓ EventBridge rule created"
-    fi
-    
-    echo "   ✓ Key Expiration function created"
-fi
-
 # Analytics Processor Function
 EVENTS_STREAM_ARN=$(aws dynamodb describe-table --table-name "$EVENTS_TABLE" --region "$REGION" \
     --query 'Table.LatestStreamArn' --output text)
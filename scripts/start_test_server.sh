@@ -43,6 +43,6 @@ echo -e "${GREEN}[INFO]${NC} Starting FastAPI server on http://localhost:8080"
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-uvicorn src.main:app --host 0.0.0.0 --port 8080 --reload
+uvicorn src.main:app --host 0.0.0.0 --port 8080 --reload --loop uvloop --http httptools
 
 
@@ -1,24 +1,38 @@
 """DynamoDB database operations and client setup"""
 
 import os
+import threading
 import time
+from datetime import datetime, timezone
 from typing import Optional
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeDeserializer
 
 from src.utils import get_iso_timestamp, generate_uuid, encode_cursor, decode_cursor
-from src.exceptions import NotFoundError
+from src.exceptions import NotFoundError, ConflictError
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-# Module-level table references
-_events_table = None
-_api_keys_table = None
-_idempotency_table = None
-_webhooks_table = None
-_analytics_table = None
-_rate_limits_table = None
+# Shared client configuration: pooled keep-alive connections and adaptive retries
+_DYNAMODB_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
+# How long an idempotency mapping is trusted before a missing event is treated
+# as a write that never landed (rather than one still in flight)
+IDEMPOTENCY_CLAIM_GRACE_SECONDS = 30
+
+# Converts low-level attribute values (e.g. ConditionalCheckFailed items)
+_deserializer = TypeDeserializer()
+
+# Resource and table references, one set per thread: boto3 resources are not
+# thread-safe, and handlers call into this module from threadpool threads
+_local = threading.local()
 
 
 def get_dynamodb_resource():
@@ -28,9 +42,18 @@ def get_dynamodb_resource():
     In AWS Lambda, boto3 automatically uses IAM role credentials.
     For local development, uses environment variables or defaults.
     
+    The resource is created once per thread, from its own session, and
+    reused so that every table on that thread shares the same pooled,
+    keep-alive HTTP connections.
+    
     Returns:
         boto3 DynamoDB resource
     """
+    resource = getattr(_local, 'dynamodb_resource', None)
+    if resource is not None:
+        return resource
+    
+    session = boto3.session.Session()
     endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL')
     region = os.getenv('AWS_REGION', 'us-east-1')
     
@@ -40,85 +63,88 @@ def get_dynamodb_resource():
         # Local development with DynamoDB Local
         access_key = os.getenv('AWS_ACCESS_KEY_ID', 'test')
         secret_key = os.getenv('AWS_SECRET_ACCESS_KEY', 'test')
-        return boto3.resource(
+        resource = session.resource(
             'dynamodb',
             endpoint_url=endpoint_url,
             region_name=region,
             aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key
+            aws_secret_access_key=secret_key,
+            config=_DYNAMODB_CONFIG
         )
     else:
         # AWS Lambda - use IAM role credentials automatically
-        return boto3.resource('dynamodb', region_name=region)
+        resource = session.resource('dynamodb', region_name=region, config=_DYNAMODB_CONFIG)
+    _local.dynamodb_resource = resource
+    return resource
 
 
 def _get_events_table():
-    """Get or initialize events table reference."""
-    global _events_table
-    if _events_table is None:
+    """Get or initialize this thread's events table reference."""
+    table = getattr(_local, 'events_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         table_name = os.getenv('DYNAMODB_TABLE_EVENTS', 'triggers-api-events')
-        _events_table = dynamodb.Table(table_name)
-    return _events_table
+        table = _local.events_table = dynamodb.Table(table_name)
+    return table
 
 
 def _get_api_keys_table():
-    """Get or initialize API keys table reference."""
-    global _api_keys_table
-    if _api_keys_table is None:
+    """Get or initialize this thread's API keys table reference."""
+    table = getattr(_local, 'api_keys_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         table_name = os.getenv('DYNAMODB_TABLE_KEYS', 'triggers-api-keys')
-        _api_keys_table = dynamodb.Table(table_name)
-    return _api_keys_table
+        table = _local.api_keys_table = dynamodb.Table(table_name)
+    return table
 
 
 def _get_idempotency_table():
-    """Get or initialize idempotency table reference."""
-    global _idempotency_table
-    if _idempotency_table is None:
+    """Get or initialize this thread's idempotency table reference."""
+    table = getattr(_local, 'idempotency_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         table_name = os.getenv('DYNAMODB_TABLE_IDEMPOTENCY', 'triggers-api-idempotency')
-        _idempotency_table = dynamodb.Table(table_name)
-    return _idempotency_table
+        table = _local.idempotency_table = dynamodb.Table(table_name)
+    return table
 
 
 def _get_webhooks_table():
-    """Get or initialize webhooks table reference."""
-    global _webhooks_table
-    if _webhooks_table is None:
+    """Get or initialize this thread's webhooks table reference."""
+    table = getattr(_local, 'webhooks_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         stage = os.getenv('STAGE', os.getenv('DEPLOYMENT_STAGE', 'prod'))
         if stage == 'local' or os.getenv('DYNAMODB_ENDPOINT_URL'):
             table_name = 'triggers-api-webhooks'
         else:
             table_name = f'triggers-api-webhooks-{stage}'
-        _webhooks_table = dynamodb.Table(table_name)
-    return _webhooks_table
+        table = _local.webhooks_table = dynamodb.Table(table_name)
+    return table
 
 
 def _get_analytics_table():
-    """Get or initialize analytics table reference."""
-    global _analytics_table
-    if _analytics_table is None:
+    """Get or initialize this thread's analytics table reference."""
+    table = getattr(_local, 'analytics_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         stage = os.getenv('STAGE', os.getenv('DEPLOYMENT_STAGE', 'prod'))
         if stage == 'local' or os.getenv('DYNAMODB_ENDPOINT_URL'):
             table_name = 'triggers-api-analytics'
         else:
             table_name = f'triggers-api-analytics-{stage}'
-        _analytics_table = dynamodb.Table(table_name)
-    return _analytics_table
+        table = _local.analytics_table = dynamodb.Table(table_name)
+    return table
 
 
 def _get_rate_limits_table():
-    """Get or initialize rate limits table reference."""
-    global _rate_limits_table
-    if _rate_limits_table is None:
+    """Get or initialize this thread's rate limits table reference."""
+    table = getattr(_local, 'rate_limits_table', None)
+    if table is None:
         dynamodb = get_dynamodb_resource()
         stage = os.getenv('DEPLOYMENT_STAGE', 'prod')
         table_name = f'triggers-api-rate-limits-{stage}'
-        _rate_limits_table = dynamodb.Table(table_name)
-    return _rate_limits_table
+        table = _local.rate_limits_table = dynamodb.Table(table_name)
+    return table
 
 
 def create_tables():
@@ -202,6 +228,68 @@ def store_idempotency_key(idempotency_key: str, event_id: str) -> bool:
         raise
 
 
+def claim_idempotency_key(
+    idempotency_key: str,
+    event_id: str,
+    event_created_at: str,
+    stale_event_id: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Atomically claim an idempotency key for a new event.
+    
+    A single conditional put both checks and stores the key. When the key
+    is already taken, DynamoDB returns the existing mapping with the
+    failed condition, so no separate read is needed.
+    
+    Args:
+        idempotency_key: Idempotency key
+        event_id: Event ID the key should map to
+        event_created_at: created_at of that event (lets hits use a direct get)
+        stale_event_id: Replace an existing mapping to this event ID, if it is
+            older than IDEMPOTENCY_CLAIM_GRACE_SECONDS
+        
+    Returns:
+        None if the key was claimed, otherwise the existing mapping item
+    """
+    table = _get_idempotency_table()
+    ttl = int(time.time()) + (24 * 60 * 60)  # 24 hours
+    
+    put_kwargs = {
+        'Item': {
+            'idempotency_key': idempotency_key,
+            'event_id': event_id,
+            'event_created_at': event_created_at,
+            'created_at': event_created_at,
+            'ttl': ttl
+        },
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+    }
+    if stale_event_id is None:
+        put_kwargs['ConditionExpression'] = 'attribute_not_exists(idempotency_key)'
+    else:
+        # Only re-point a mapping whose event write has had time to land
+        stale_before = datetime.fromtimestamp(
+            time.time() - IDEMPOTENCY_CLAIM_GRACE_SECONDS, timezone.utc
+        ).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        put_kwargs['ConditionExpression'] = (
+            'event_id = :stale_event_id AND '
+            '(attribute_not_exists(created_at) OR created_at < :stale_before)'
+        )
+        put_kwargs['ExpressionAttributeValues'] = {
+            ':stale_event_id': stale_event_id,
+            ':stale_before': stale_before
+        }
+    
+    try:
+        table.put_item(**put_kwargs)
+        return None
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            old_item = e.response.get('Item') or {}
+            return {key: _deserializer.deserialize(value) for key, value in old_item.items()}
+        raise
+
+
 def create_event(source: str, event_type: str, payload: dict, metadata: Optional[dict] = None, idempotency_key: Optional[str] = None) -> dict:
     """
     Create a new event in DynamoDB.
@@ -215,19 +303,35 @@ def create_event(source: str, event_type: str, payload: dict, metadata: Optional
         
     Returns:
         Created or existing event dictionary
+        
+    Raises:
+        ConflictError: If another request with the same idempotency key is
+            still writing its event
     """
-    # Check idempotency if key provided
+    event_id = generate_uuid()
+    created_at = get_iso_timestamp()
+    
+    # Claim idempotency key if provided; an existing claim returns its event
     if idempotency_key:
-        existing_event_id = check_idempotency_key(idempotency_key)
-        if existing_event_id:
-            # Return existing event
-            existing_event = get_event(existing_event_id)
+        existing = claim_idempotency_key(idempotency_key, event_id, created_at)
+        if existing is not None:
+            existing_event_id = existing.get('event_id')
+            existing_event = None
+            if existing_event_id:
+                existing_event = get_event(existing_event_id, existing.get('event_created_at'))
             if existing_event:
                 return existing_event
+            # Stale mapping (event expired or write never landed): re-point it,
+            # unless the request that claimed it may still be writing its event
+            if claim_idempotency_key(
+                idempotency_key, event_id, created_at, stale_event_id=existing_event_id
+            ) is not None:
+                raise ConflictError(
+                    "A request with this idempotency key is already in progress",
+                    details={'idempotency_key': idempotency_key}
+                )
     
     # Create new event
-    event_id = generate_uuid()
-    created_at = get_iso_timestamp()
     status = "pending"
     ttl = int(time.time()) + (7 * 24 * 60 * 60)  # 7 days from now
     
@@ -247,10 +351,6 @@ def create_event(source: str, event_type: str, payload: dict, metadata: Optional
     table = _get_events_table()
     table.put_item(Item=event)
     
-    # Store idempotency key if provided
-    if idempotency_key:
-        store_idempotency_key(idempotency_key, event_id)
-    
     return event
 
 
@@ -444,13 +544,17 @@ def query_pending_events(
         expression_names['#event_type'] = 'event_type'
         expression_values[':event_type'] = event_type
     
-    # Date range filters (created_at is sort key, so we can use range conditions)
+    # Date range (created_at is the GSI sort key, so the range goes in the
+    # key condition and DynamoDB only reads items inside it)
+    if created_after and created_before:
+        query_params['KeyConditionExpression'] += ' AND created_at BETWEEN :created_after AND :created_before'
+    elif created_after:
+        query_params['KeyConditionExpression'] += ' AND created_at >= :created_after'
+    elif created_before:
+        query_params['KeyConditionExpression'] += ' AND created_at <= :created_before'
     if created_after:
-        filter_expressions.append('created_at >= :created_after')
         expression_values[':created_after'] = created_after
-    
     if created_before:
-        filter_expressions.append('created_at <= :created_before')
         expression_values[':created_before'] = created_before
     
     # Priority filter (metadata.priority)
@@ -469,9 +573,9 @@ def query_pending_events(
             expression_names[key_placeholder] = key
             expression_values[value_placeholder] = value
     
+    query_params['ExpressionAttributeValues'] = expression_values
     if filter_expressions:
         query_params['FilterExpression'] = ' AND '.join(filter_expressions)
-        query_params['ExpressionAttributeValues'] = expression_values
         query_params['ExpressionAttributeNames'] = expression_names
     
     # Execute query
@@ -486,25 +590,47 @@ def query_pending_events(
     }
 
 
-def acknowledge_event(event_id: str) -> Optional[dict]:
+def acknowledge_event(event_id: str, created_at: Optional[str] = None) -> Optional[dict]:
     """
     Acknowledge an event using conditional update.
     
     Args:
         event_id: Event ID to acknowledge
+        created_at: Event's created_at, if known (skips the key lookup)
         
     Returns:
         Updated event dictionary or None if not found or already acknowledged
     """
+    updated_event, _ = try_acknowledge_event(event_id, created_at)
+    return updated_event
+
+
+def try_acknowledge_event(event_id: str, created_at: Optional[str] = None) -> tuple[Optional[dict], Optional[dict]]:
+    """
+    Acknowledge an event and report its current state when that fails.
+    
+    The conditional update asks DynamoDB for the item as it was when the
+    condition failed, so callers can tell "not found" from "already
+    acknowledged" without a second lookup.
+    
+    Args:
+        event_id: Event ID to acknowledge
+        created_at: Event's created_at, if known (skips the key lookup)
+        
+    Returns:
+        Tuple of (updated_event, current_event). updated_event is set on
+        success; otherwise current_event is the existing event, or None if
+        the event does not exist.
+    """
     table = _get_events_table()
     acknowledged_at = get_iso_timestamp()
     
-    # First, find the event (we need created_at for the composite key)
-    event = get_event(event_id)
-    if not event:
-        return None
-    
-    created_at = event['created_at']
+    if created_at is None:
+        # created_at is part of the composite key, so it has to be looked up
+        event = get_event(event_id)
+        if not event:
+            return None, None
+        created_at = event['created_at']
     
     # Perform conditional update
     try:
@@ -513,8 +639,8 @@ def acknowledge_event(event_id: str) -> Optional[dict]:
                 'event_id': event_id,
                 'created_at': created_at
             },
-            UpdateExpression='SET #status = :status, acknowledged_at = :ack_at',
-            ConditionExpression='#status = :pending',
+            UpdateExpression='SET #status = :status, acknowledged_at = if_not_exists(acknowledged_at, :ack_at)',
+            ConditionExpression='attribute_exists(event_id) AND #status = :pending',
             ExpressionAttributeNames={
                 '#status': 'status'
             },
@@ -523,14 +649,19 @@ def acknowledge_event(event_id: str) -> Optional[dict]:
                 ':pending': 'pending',
                 ':ack_at': acknowledged_at
             },
-            ReturnValues='ALL_NEW'
+            ReturnValues='ALL_NEW',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
         )
         
-        return response.get('Attributes')
+        return response.get('Attributes'), None
     except ClientError as e:
         if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-            # Already acknowledged or status changed
-            return None
+            # Already acknowledged or status changed; no item means it was
+            # deleted since the lookup
+            old_item = e.response.get('Item')
+            if not old_item:
+                return None, None
+            return None, {key: _deserializer.deserialize(value) for key, value in old_item.items()}
         raise
 
 
@@ -565,114 +696,61 @@ def delete_event(event_id: str) -> bool:
         return False
 
 
-def check_rate_limit(api_key: str, limit: int, window_seconds: int = 60) -> tuple[bool, int, int]:
+def consume_rate_limit(
+    api_key: str,
+    window_start: int,
+    limit: int,
+    count: int = 1,
+    window_seconds: int = 60
+) -> tuple[bool, int, int]:
     """
-    Check if API key has exceeded rate limit using token bucket algorithm.
+    Count requests against the API key's window in one conditional update.
+    
+    Either all of count fit under the limit and are added, or nothing is.
     
     Args:
-        api_key: API key to check
+        api_key: API key
+        window_start: Window start timestamp
         limit: Maximum requests allowed per window
+        count: Number of requests to add
         window_seconds: Time window in seconds (default: 60)
         
     Returns:
         Tuple of (allowed: bool, remaining: int, reset_timestamp: int)
-    """
-    table = _get_rate_limits_table()
-    current_time = int(time.time())
-    window_start = (current_time // window_seconds) * window_seconds
-    reset_timestamp = window_start + window_seconds
-    
-    try:
-        # Get current count for this window
-        response = table.get_item(
-            Key={
-                'api_key': api_key,
-                'window_start': window_start
-            }
-        )
-        
-        item = response.get('Item')
-        if item:
-            request_count = item.get('request_count', 0)
-            remaining = max(0, limit - request_count)
-            allowed = request_count < limit
-        else:
-            # No record for this window, allow request
-            remaining = limit
-            allowed = True
         
-        return (allowed, remaining, reset_timestamp)
-    except ClientError as e:
-        # On error, allow request (fail open)
-        logger.warning(
-            "Error checking rate limit for API key, allowing request",
-            extra={
-                'operation': 'check_rate_limit',
-                'error': str(e),
-                'error_type': 'ClientError',
-            }
-        )
-        return (True, limit, reset_timestamp)
-
-
-def increment_rate_limit(api_key: str, window_start: int, limit: int) -> dict:
+    Raises:
+        ClientError: On DynamoDB errors other than the limit being reached
     """
-    Increment rate limit counter for API key.
+    reset_timestamp = window_start + window_seconds
+    if count > limit:
+        # Can never fit; the condition below would still admit a window's first write
+        return (False, 0, reset_timestamp)
     
-    Args:
-        api_key: API key
-        window_start: Window start timestamp
-        limit: Maximum requests allowed per window
-        
-    Returns:
-        Updated rate limit record
-    """
     table = _get_rate_limits_table()
-    current_time = int(time.time())
-    ttl = window_start + 3600  # 1 hour TTL
     
     try:
-        # Try to increment existing record
         response = table.update_item(
             Key={
                 'api_key': api_key,
                 'window_start': window_start
             },
-            UpdateExpression='ADD request_count :inc SET ttl = :ttl',
-            ConditionExpression='request_count < :limit',
+            UpdateExpression='ADD request_count :inc SET #ttl = :ttl',
+            ConditionExpression='attribute_not_exists(request_count) OR request_count <= :max_before',
+            ExpressionAttributeNames={'#ttl': 'ttl'},
             ExpressionAttributeValues={
-                ':inc': 1,
-                ':limit': limit,
-                ':ttl': ttl
+                ':inc': count,
+                ':max_before': limit - count,
+                ':ttl': window_start + 3600  # 1 hour TTL
             },
-            ReturnValues='ALL_NEW'
+            ReturnValues='UPDATED_NEW'
         )
-        return response.get('Attributes', {})
     except ClientError as e:
         if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-            # Rate limit exceeded
-            raise
-        elif e.response['Error']['Code'] == 'ResourceNotFoundException':
-            # Record doesn't exist, create it
-            try:
-                table.put_item(
-                    Item={
-                        'api_key': api_key,
-                        'window_start': window_start,
-                        'request_count': 1,
-                        'ttl': ttl
-                    }
-                )
-                return {
-                    'api_key': api_key,
-                    'window_start': window_start,
-                    'request_count': 1,
-                    'ttl': ttl
-                }
-            except ClientError:
-                raise
-        else:
-            raise
+            return (False, 0, reset_timestamp)
+        raise
+    
+    request_count = int(response['Attributes']['request_count'])
+    return (True, max(0, limit - request_count), reset_timestamp)
 
 
 def get_rate_limit_for_api_key(api_key: str) -> int:
@@ -691,7 +769,8 @@ def get_rate_limit_for_api_key(api_key: str) -> int:
         response = table.get_item(Key={'api_key': api_key})
         item = response.get('Item')
         if item:
-            return item.get('rate_limit', 1000)  # Default 1000/min
+            # DynamoDB numbers come back as Decimal
+            return int(item.get('rate_limit', 1000))  # Default 1000/min
         return 1000
     except ClientError:
         return 1000  # Default on error
@@ -728,21 +807,31 @@ def create_webhook(webhook_id: str, url: str, events: list[str], secret: str, ap
     return item
 
 
-def get_webhook(webhook_id: str) -> Optional[dict]:
+def get_webhook(webhook_id: str, api_key: Optional[str] = None) -> Optional[dict]:
     """
     Get webhook by ID.
     
     Args:
         webhook_id: Webhook ID
+        api_key: Optional owner API key. When given, only the public fields
+            are fetched (the secret never leaves DynamoDB) and webhooks owned
+            by another key are reported as not found.
         
     Returns:
         Webhook dictionary or None if not found
     """
     table = _get_webhooks_table()
     
+    get_kwargs = {'Key': {'webhook_id': webhook_id}}
+    if api_key is not None:
+        get_kwargs['ProjectionExpression'] = 'webhook_id, #u, events, is_active, created_at, api_key'
+        get_kwargs['ExpressionAttributeNames'] = {'#u': 'url'}
+    
     try:
-        response = table.get_item(Key={'webhook_id': webhook_id})
+        response = table.get_item(**get_kwargs)
         item = response.get('Item')
+        if item and api_key is not None and item.get('api_key') != api_key:
+            return None
         if item and 'is_active' in item:
             item['is_active'] = bool(item['is_active'])
         return item
@@ -807,7 +896,8 @@ def list_webhooks(api_key: str, is_active: Optional[bool] = None, limit: int = 5
 
 
 def update_webhook(webhook_id: str, url: Optional[str] = None, events: Optional[list[str]] = None, 
-                   secret: Optional[str] = None, is_active: Optional[bool] = None) -> Optional[dict]:
+                   secret: Optional[str] = None, is_active: Optional[bool] = None,
+                   expected_api_key: Optional[str] = None) -> Optional[dict]:
     """
     Update webhook.
     
@@ -817,9 +907,12 @@ def update_webhook(webhook_id: str, url: Optional[str] = None, events: Optional[
         events: Optional new events list
         secret: Optional new secret
         is_active: Optional new active status
+        expected_api_key: Optional owner API key; the update only applies if
+            the stored webhook belongs to this key
         
     Returns:
-        Updated webhook dictionary or None if not found
+        Updated webhook dictionary or None if not found (or not owned by
+        expected_api_key)
     """
     table = _get_webhooks_table()
     
@@ -846,17 +939,25 @@ def update_webhook(webhook_id: str, url: Optional[str] = None, events: Optional[
     
     if not update_parts:
         # Nothing to update
-        return get_webhook(webhook_id)
+        webhook = get_webhook(webhook_id)
+        if webhook and expected_api_key is not None and webhook.get('api_key') != expected_api_key:
+            return None
+        return webhook
     
-    update_expression = 'SET ' + ', '.join(update_parts)
+    update_kwargs = {
+        'Key': {'webhook_id': webhook_id},
+        'UpdateExpression': 'SET ' + ', '.join(update_parts),
+        'ExpressionAttributeValues': expression_values,
+        'ReturnValues': 'ALL_NEW'
+    }
+    if expected_api_key is not None:
+        # Ownership check in the same round trip; also stops update_item
+        # from creating a partial item for an unknown webhook_id
+        update_kwargs['ConditionExpression'] = 'api_key = :expected_api_key'
+        expression_values[':expected_api_key'] = expected_api_key
     
     try:
-        response = table.update_item(
-            Key={'webhook_id': webhook_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues='ALL_NEW'
-        )
+        response = table.update_item(**update_kwargs)
         item = response.get('Attributes')
         # Remove secret from response and convert is_active to boolean
         if item:
@@ -865,25 +966,32 @@ def update_webhook(webhook_id: str, url: Optional[str] = None, events: Optional[
                 item['is_active'] = bool(item['is_active'])
         return item
     except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceNotFoundException':
+        if e.response['Error']['Code'] in ('ResourceNotFoundException', 'ConditionalCheckFailedException'):
             return None
         raise
 
 
-def delete_webhook(webhook_id: str) -> bool:
+def delete_webhook(webhook_id: str, expected_api_key: Optional[str] = None) -> bool:
     """
     Delete webhook.
     
     Args:
         webhook_id: Webhook ID to delete
+        expected_api_key: Optional owner API key; the delete only applies if
+            the stored webhook belongs to this key
         
     Returns:
-        True if deleted, False if not found
+        True if deleted, False if not found (or not owned by expected_api_key)
     """
     table = _get_webhooks_table()
     
+    delete_kwargs = {'Key': {'webhook_id': webhook_id}}
+    if expected_api_key is not None:
+        delete_kwargs['ConditionExpression'] = 'api_key = :expected_api_key'
+        delete_kwargs['ExpressionAttributeValues'] = {':expected_api_key': expected_api_key}
+    
     try:
-        table.delete_item(Key={'webhook_id': webhook_id})
+        table.delete_item(**delete_kwargs)
         return True
     except ClientError:
         return False
@@ -919,6 +1027,38 @@ def get_active_webhooks_for_event(api_key: str, event_type: str) -> list[dict]:
     return matching_webhooks
 
 
+def get_active_webhooks_by_event_type(api_key: str, event_types: set[str]) -> dict[str, list[dict]]:
+    """
+    Get active webhooks for several event types with a single lookup.
+    
+    Args:
+        api_key: API key that created the events
+        event_types: Distinct event types to match
+        
+    Returns:
+        Dictionary mapping each event type to its matching webhooks
+    """
+    result = list_webhooks(api_key, is_active=True, limit=100)
+    webhooks = result.get('webhooks', [])
+    
+    for webhook in webhooks:
+        if 'is_active' in webhook:
+            webhook['is_active'] = bool(webhook['is_active'])
+    
+    webhooks_by_type = {event_type: [] for event_type in event_types}
+    for webhook in webhooks:
+        events = webhook.get('events', [])
+        if '*' in events:
+            for matching in webhooks_by_type.values():
+                matching.append(webhook)
+        else:
+            for event_type in set(events):
+                if event_type in webhooks_by_type:
+                    webhooks_by_type[event_type].append(webhook)
+    
+    return webhooks_by_type
+
+
 def rotate_api_key(key_id: str, transition_days: int = 7) -> dict:
     """
     Rotate an API key by creating a new version.
@@ -953,17 +1093,22 @@ def rotate_api_key(key_id: str, transition_days: int = 7) -> dict:
     new_version = current_version + 1
     
     # Calculate expiration date
-    expires_at = (datetime.now(timezone.utc) + timedelta(days=transition_days)).isoformat().replace('+00:00', 'Z')
+    expiry = datetime.now(timezone.utc) + timedelta(days=transition_days)
+    expires_at = expiry.isoformat().replace('+00:00', 'Z')
     rotated_at = get_iso_timestamp()
     
-    # Update old key status to "rotating"
+    # Update old key status to "rotating". expires_at_epoch is the table's TTL
+    # attribute, so DynamoDB deletes the old key after the transition period;
+    # auth rejects it by expires_at until the TTL sweep removes it.
     table.update_item(
         Key={'api_key': key_id},
-        UpdateExpression='SET #status = :status, expires_at = :expires_at, rotated_at = :rotated_at',
+        UpdateExpression='SET #status = :status, expires_at = :expires_at, '
+                         'expires_at_epoch = :expires_at_epoch, rotated_at = :rotated_at',
         ExpressionAttributeNames={'#status': 'status'},
         ExpressionAttributeValues={
             ':status': 'rotating',
             ':expires_at': expires_at,
+            ':expires_at_epoch': int(expiry.timestamp()),
             ':rotated_at': rotated_at
         }
     )
@@ -1016,6 +1161,8 @@ def get_api_key_versions(key_id: str) -> list:
     """
     table = _get_api_keys_table()
     versions = []
+    # Rotated keys past expires_at are expired even before TTL deletes them
+    now = get_iso_timestamp()
     
     # Start with current key
     current_key_id = key_id
@@ -1027,13 +1174,18 @@ def get_api_key_versions(key_id: str) -> list:
             if not key:
                 break
             
+            status = key.get('status', 'active')
+            expires_at = key.get('expires_at')
+            if expires_at and expires_at < now:
+                status = 'expired'
+            
             # Add to versions (exclude actual key value for security)
             versions.append({
                 'version': key.get('version', 1),
-                'status': key.get('status', 'active'),
+                'status': status,
                 'created_at': key.get('created_at'),
                 'rotated_at': key.get('rotated_at'),
-                'expires_at': key.get('expires_at')
+                'expires_at': expires_at
             })
             
             # Get previous version
@@ -1230,7 +1382,7 @@ def bulk_acknowledge_events(event_ids: list[str], api_key: str) -> tuple[list[di
     # Acknowledge events one by one (DynamoDB doesn't support conditional batch updates easily)
     for idx, event in events_to_ack:
         try:
-            updated = acknowledge_event(event['event_id'])
+            updated = acknowledge_event(event['event_id'], event['created_at'])
             if updated:
                 successful.append(updated)
             else:
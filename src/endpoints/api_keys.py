@@ -6,6 +6,7 @@ from src.database import rotate_api_key, get_api_key_versions
 from src.auth import get_api_key
 from src.exceptions import NotFoundError, InternalError
 from src.utils import format_not_found_error
+from src.utils.api_key_cache import invalidate_api_key
 
 router = APIRouter()
 
@@ -64,6 +65,8 @@ async def rotate_key_endpoint(
     # In production, you might want to check ownership
     try:
         result = rotate_api_key(key_id, transition_days)
+        # Drop cached allowlist/rate limit so the rotated key's settings are re-read
+        invalidate_api_key(key_id)
         
         return {
             **result,
@@ -72,14 +75,12 @@ async def rotate_key_endpoint(
     except NotFoundError:
         raise NotFoundError(
             message="API key not found",
-            details=format_not_found_error("API Key", key_id),
-            request_id=request.state.request_id
+            details=format_not_found_error("API Key", key_id)
         )
     except Exception as e:
         raise InternalError(
             message="Failed to rotate API key",
-            details={"error": str(e)},
-            request_id=request.state.request_id
+            details={"error": str(e)}
         )
 
 
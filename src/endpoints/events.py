@@ -2,24 +2,127 @@
 
 import time
 from uuid import UUID
+import orjson
 from fastapi import APIRouter, Request, Depends, HTTPException, Path
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter, ValidationError as PydanticValidationError
 from src.models import EventCreate, EventResponse, EventDetailResponse, AckResponse, DeleteResponse, BulkEventCreate, BulkEventAcknowledge, BulkEventDelete, BulkEventResponse, BulkItemError
-from src.database import create_event, acknowledge_event, delete_event, get_event, bulk_create_events, bulk_acknowledge_events, bulk_delete_events
+from src.database import create_event, try_acknowledge_event, delete_event, get_event, bulk_create_events, bulk_acknowledge_events, bulk_delete_events, get_active_webhooks_for_event, get_active_webhooks_by_event_type
 from src.auth import get_api_key
 from src.exceptions import NotFoundError, ConflictError, PayloadTooLargeError, InternalError
-from src.utils import validate_payload_size, format_not_found_error, format_conflict_error, generate_uuid, get_iso_timestamp
-from src.utils.logging import get_logger
-from src.utils.metrics import record_latency, record_success, record_error, record_request_count
+from src.utils import validate_payload_size, format_not_found_error, format_conflict_error, generate_uuids, get_request_timestamp, json_default
+from src.utils.logging import get_logger, bind_logger
+from src.utils.metrics import bind
+from src.utils.sqs import send_webhook_message, send_webhook_messages_batch
 from botocore.exceptions import ClientError
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+MAX_PAYLOAD_SIZE = 400 * 1024  # 400KB
+
+# Most a payload can grow when re-encoded: a float written as 1e15 (4 bytes)
+# comes back as 1000000000000000.0 (18 bytes). Whitespace, escapes and
+# duplicate keys only shrink it.
+MAX_PAYLOAD_EXPANSION = 4.5
+
+# Metric handles bound once at import time
+EVENTS_POST = bind('/v1/events', 'POST')
+EVENT_GET = bind('/v1/events/{event_id}', 'GET')
+EVENT_ACK_POST = bind('/v1/events/{event_id}/ack', 'POST')
+EVENT_DELETE = bind('/v1/events/{event_id}', 'DELETE')
+
+# Request body validators compiled once at import time
+EVENT_CREATE_ADAPTER = TypeAdapter(EventCreate)
+BULK_EVENT_CREATE_ADAPTER = TypeAdapter(BulkEventCreate)
+
+
+def _validate_body(adapter: TypeAdapter, body: bytes):
+    """Validate raw JSON bytes, reporting failures like FastAPI body validation."""
+    try:
+        return adapter.validate_json(body)
+    except PydanticValidationError as e:
+        raise RequestValidationError(
+            [{**error, 'loc': ('body', *error['loc'])} for error in e.errors(include_url=False)]
+        )
+
+
+async def _event_create_body(request: Request) -> EventCreate:
+    """Validate the POST /v1/events body straight from the raw JSON bytes."""
+    body = await request.body()
+    event_data = _validate_body(EVENT_CREATE_ADAPTER, body)
+    
+    # Validate payload size. Only re-serialize the payload when the body could
+    # grow past the limit once re-encoded.
+    if len(body) * MAX_PAYLOAD_EXPANSION > MAX_PAYLOAD_SIZE:
+        try:
+            validate_payload_size(event_data.payload, MAX_PAYLOAD_SIZE)
+        except ValueError as e:
+            raise PayloadTooLargeError(str(e))
+    return event_data
+
+
+async def _bulk_event_create_body(request: Request) -> BulkEventCreate:
+    """Validate the POST /v1/events/bulk body straight from the raw JSON bytes."""
+    return _validate_body(BULK_EVENT_CREATE_ADAPTER, await request.body())
+
+
+def _model_response(model, status_code: int = 200) -> Response:
+    """Encode a response model directly, skipping FastAPI's re-validation of it."""
+    return Response(
+        content=model.__pydantic_serializer__.to_json(model),
+        status_code=status_code,
+        media_type='application/json'
+    )
+
+
+def _request_body_openapi(model) -> dict:
+    """Document a body that is parsed by a dependency instead of FastAPI."""
+    schema = model.model_json_schema()
+    defs = schema.pop('$defs', {})
+    
+    def inline(node):
+        if isinstance(node, dict):
+            if '$ref' in node:
+                return inline(defs[node['$ref'].rsplit('/', 1)[-1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+    
+    return {
+        'requestBody': {
+            'required': True,
+            'content': {'application/json': {'schema': inline(schema)}}
+        }
+    }
+
+
+async def _stream_event_detail(event: dict, request_id: str):
+    """Yield an EventDetailResponse body, encoding the payload in its own chunk."""
+    yield (
+        b'{"event_id":' + orjson.dumps(event['event_id'])
+        + b',"created_at":' + orjson.dumps(event['created_at'])
+        + b',"source":' + orjson.dumps(event['source'])
+        + b',"event_type":' + orjson.dumps(event['event_type'])
+        + b',"payload":'
+    )
+    yield orjson.dumps(event['payload'], default=json_default)
+    yield (
+        b',"status":' + orjson.dumps(event['status'])
+        + b',"metadata":' + orjson.dumps(event.get('metadata'), default=json_default)
+        + b',"acknowledged_at":' + orjson.dumps(event.get('acknowledged_at'))
+        + b',"request_id":' + orjson.dumps(request_id)
+        + b'}'
+    )
+
 
 @router.post(
     "/events",
     response_model=EventResponse,
     status_code=201,
+    openapi_extra=_request_body_openapi(EventCreate),
     tags=["events"],
     summary="Create a new event",
     description="""
@@ -107,9 +210,9 @@ logger = get_logger(__name__)
     }
 )
 async def create_event_endpoint(
-    event_data: EventCreate,
     request: Request,
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    event_data: EventCreate = Depends(_event_create_body)
 ):
     """
     Create a new event.
@@ -117,11 +220,7 @@ async def create_event_endpoint(
     Requires API key authentication.
     Supports idempotency via metadata.idempotency_key.
     """
-    # Validate payload size
-    try:
-        validate_payload_size(event_data.payload)
-    except ValueError as e:
-        raise PayloadTooLargeError(str(e))
+    log = bind_logger(logger, operation='create_event')
     
     # Extract idempotency key from metadata
     idempotency_key = None
@@ -140,9 +239,6 @@ async def create_event_endpoint(
         
         # Trigger webhook delivery (non-blocking)
         try:
-            from src.database import get_active_webhooks_for_event
-            from src.utils.sqs import send_webhook_message
-            
             # Get active webhooks for this event type
             webhooks = get_active_webhooks_for_event(api_key, event_data.event_type)
             
@@ -165,29 +261,25 @@ async def create_event_endpoint(
                 send_webhook_message(webhook_id, webhook_event_data)
         except Exception as webhook_error:
             # Log webhook error but don't fail event creation
-            logger.warning(
+            log.warning(
                 f"Failed to trigger webhook delivery: {webhook_error}",
-                extra={
-                    'event_id': event.get('event_id'),
-                    'error': str(webhook_error)
-                }
+                event_id=event.get('event_id'),
+                error=str(webhook_error)
             )
+    except ConflictError:
+        # Same idempotency key still being written by another request
+        EVENTS_POST.request_error('CONFLICT')
+        raise
     except Exception as e:
         # Record error metric
-        endpoint = '/v1/events'
-        method = 'POST'
-        record_error(endpoint, method, 'INTERNAL_ERROR')
-        record_request_count(endpoint, method)
+        EVENTS_POST.request_error('INTERNAL_ERROR')
         
-        logger.error(
+        log.error(
             "Failed to create event",
-            extra={
-                'operation': 'create_event',
-                'source': event_data.source,
-                'event_type': event_data.event_type,
-                'error': str(e),
-                'status_code': 500,
-            }
+            source=event_data.source,
+            event_type=event_data.event_type,
+            error=str(e),
+            status_code=500
         )
         raise InternalError(f"Failed to create event: {e}")
     
@@ -195,33 +287,28 @@ async def create_event_endpoint(
     duration_ms = getattr(request.state, 'duration_ms', None)
     
     # Record metrics
-    endpoint = '/v1/events'
-    method = 'POST'
-    if duration_ms:
-        record_latency(endpoint, method, duration_ms)
-    record_success(endpoint, method)
-    record_request_count(endpoint, method)
-    
-    logger.info(
-        "Event created successfully",
-        extra={
-            'operation': 'create_event',
-            'event_id': event['event_id'],
-            'source': event_data.source,
-            'event_type': event_data.event_type,
-            'status': event['status'],
-            'status_code': 201,
-            'duration_ms': duration_ms,
-            'has_idempotency_key': idempotency_key is not None,
-        }
-    )
+    EVENTS_POST.request_success(duration_ms)
     
-    return EventResponse(
+    log.info(
+        "Event created successfully",
         event_id=event['event_id'],
-        created_at=event['created_at'],
+        source=event_data.source,
+        event_type=event_data.event_type,
         status=event['status'],
-        message="Event ingested successfully",
-        request_id=request_id
+        status_code=201,
+        duration_ms=duration_ms,
+        has_idempotency_key=idempotency_key is not None
+    )
+    
+    return _model_response(
+        EventResponse.model_construct(
+            event_id=event['event_id'],
+            created_at=event['created_at'],
+            status=event['status'],
+            message="Event ingested successfully",
+            request_id=request_id
+        ),
+        status_code=201
     )
 
 
@@ -229,6 +316,7 @@ async def create_event_endpoint(
     "/events/bulk",
     response_model=BulkEventResponse,
     status_code=201,
+    openapi_extra=_request_body_openapi(BulkEventCreate),
     tags=["events"],
     summary="Create multiple events",
     description="""
@@ -258,25 +346,27 @@ async def create_event_endpoint(
     }
 )
 async def bulk_create_events_endpoint(
-    bulk_request: BulkEventCreate,
-    request: Request = None,
-    api_key: str = Depends(get_api_key)
+    request: Request,
+    api_key: str = Depends(get_api_key),
+    bulk_request: BulkEventCreate = Depends(_bulk_event_create_body)
 ):
     """
     Create multiple events in bulk.
     
     Requires API key authentication.
     """
+    log = bind_logger(logger, operation='bulk_create_events')
+    
     request_id = request.state.request_id
     
-    # Prepare events for creation
+    # Prepare events for creation; the whole batch shares the request's
+    # timestamp and draws its IDs from a single random read
     events_to_create = []
-    for item in bulk_request.items:
-        event_id = generate_uuid()
-        created_at = get_iso_timestamp()
-        status = "pending"
-        ttl = int(time.time()) + (7 * 24 * 60 * 60)  # 7 days
-        
+    created_at = get_request_timestamp(request)
+    status = "pending"
+    ttl = int(time.time()) + (7 * 24 * 60 * 60)  # 7 days
+    event_ids = generate_uuids(len(bulk_request.items))
+    for item, event_id in zip(bulk_request.items, event_ids):
         event = {
             'event_id': event_id,
             'created_at': created_at,
@@ -295,25 +385,56 @@ async def bulk_create_events_endpoint(
     # Create events in bulk
     successful, failed = bulk_create_events(events_to_create, api_key)
     
+    # Trigger webhook delivery (non-blocking), one lookup for all event types
+    if successful:
+        try:
+            webhooks_by_type = get_active_webhooks_by_event_type(
+                api_key, {event['event_type'] for event in successful}
+            )
+            
+            messages = []
+            for event in successful:
+                webhooks = webhooks_by_type.get(event['event_type'])
+                if not webhooks:
+                    continue
+                # Prepare event data for webhook (exclude internal fields)
+                webhook_event_data = {
+                    'event_id': event['event_id'],
+                    'created_at': event['created_at'],
+                    'source': event['source'],
+                    'event_type': event['event_type'],
+                    'payload': event['payload'],
+                    'status': event['status']
+                }
+                if event.get('metadata'):
+                    webhook_event_data['metadata'] = event['metadata']
+                for webhook in webhooks:
+                    messages.append((webhook['webhook_id'], webhook_event_data))
+            
+            send_webhook_messages_batch(messages)
+        except Exception as webhook_error:
+            # Log webhook error but don't fail event creation
+            log.warning(
+                f"Failed to trigger webhook delivery: {webhook_error}",
+                event_count=len(successful),
+                error=str(webhook_error)
+            )
+    
     # Format successful events as EventResponse
-    successful_responses = []
-    for event in successful:
-        successful_responses.append({
+    successful_responses = [
+        {
             'event_id': event['event_id'],
             'created_at': event['created_at'],
             'status': event['status'],
             'message': 'Event ingested successfully'
-        })
+        }
+        for event in successful
+    ]
     
-    # Format failed items
-    failed_items = []
-    for fail in failed:
-        failed_items.append(BulkItemError(
-            index=fail['index'],
-            error=fail['error']
-        ))
+    # Format failed items (built by the database layer, so skip re-validation)
+    failed_items = [BulkItemError.model_construct(index=fail['index'], error=fail['error']) for fail in failed]
     
-    return BulkEventResponse(
+    return BulkEventResponse.model_construct(
         successful=successful_responses,
         failed=failed_items,
         request_id=request_id
@@ -366,24 +487,20 @@ async def bulk_acknowledge_events_endpoint(
     successful, failed = bulk_acknowledge_events(bulk_request.event_ids, api_key)
     
     # Format successful acknowledgments
-    successful_responses = []
-    for event in successful:
-        successful_responses.append({
+    successful_responses = [
+        {
             'event_id': event['event_id'],
             'status': event['status'],
             'acknowledged_at': event.get('acknowledged_at'),
             'message': 'Event acknowledged successfully'
-        })
+        }
+        for event in successful
+    ]
     
-    # Format failed items
-    failed_items = []
-    for fail in failed:
-        failed_items.append(BulkItemError(
-            index=fail['index'],
-            error=fail['error']
-        ))
+    # Format failed items (built by the database layer, so skip re-validation)
+    failed_items = [BulkItemError.model_construct(index=fail['index'], error=fail['error']) for fail in failed]
     
-    return BulkEventResponse(
+    return BulkEventResponse.model_construct(
         successful=successful_responses,
         failed=failed_items,
         request_id=request_id
@@ -436,22 +553,15 @@ async def bulk_delete_events_endpoint(
     successful, failed = bulk_delete_events(bulk_request.event_ids, api_key)
     
     # Format successful deletions
-    successful_responses = []
-    for event_id in successful:
-        successful_responses.append({
-            'event_id': event_id,
-            'message': 'Event deleted successfully'
-        })
-    
-    # Format failed items
-    failed_items = []
-    for fail in failed:
-        failed_items.append(BulkItemError(
-            index=fail['index'],
-            error=fail['error']
-        ))
-    
-    return BulkEventResponse(
+    successful_responses = [
+        {'event_id': event_id, 'message': 'Event deleted successfully'}
+        for event_id in successful
+    ]
+    
+    # Format failed items (built by the database layer, so skip re-validation)
+    failed_items = [BulkItemError.model_construct(index=fail['index'], error=fail['error']) for fail in failed]
+    
+    return BulkEventResponse.model_construct(
         successful=successful_responses,
         failed=failed_items,
         request_id=request_id
@@ -541,6 +651,8 @@ async def get_event_endpoint(
     
     Requires API key authentication.
     """
+    log = bind_logger(logger, operation='get_event')
+    
     event_id_str = str(event_id)
     request_id = request.state.request_id
     duration_ms = getattr(request.state, 'duration_ms', None)
@@ -550,21 +662,13 @@ async def get_event_endpoint(
     
     if event is None:
         # Record error metric
-        endpoint = '/v1/events/{event_id}'
-        method = 'GET'
-        if duration_ms:
-            record_latency(endpoint, method, duration_ms)
-        record_error(endpoint, method, 'NOT_FOUND')
-        record_request_count(endpoint, method)
+        EVENT_GET.request_error('NOT_FOUND', duration_ms)
         
-        logger.warning(
+        log.warning(
             "Event not found",
-            extra={
-                'operation': 'get_event',
-                'event_id': event_id_str,
-                'status_code': 404,
-                'duration_ms': duration_ms,
-            }
+            event_id=event_id_str,
+            status_code=404,
+            duration_ms=duration_ms
         )
         raise NotFoundError(
             f"Event with ID '{event_id_str}' was not found",
@@ -575,35 +679,21 @@ async def get_event_endpoint(
         )
     
     # Record metrics
-    endpoint = '/v1/events/{event_id}'
-    method = 'GET'
-    if duration_ms:
-        record_latency(endpoint, method, duration_ms)
-    record_success(endpoint, method)
-    record_request_count(endpoint, method)
-    
-    logger.info(
+    EVENT_GET.request_success(duration_ms)
+    
+    log.info(
         "Event retrieved successfully",
-        extra={
-            'operation': 'get_event',
-            'event_id': event_id_str,
-            'status': event['status'],
-            'status_code': 200,
-            'duration_ms': duration_ms,
-        }
+        event_id=event_id_str,
+        status=event['status'],
+        status_code=200,
+        duration_ms=duration_ms
     )
     
-    # Build response
-    return EventDetailResponse(
-        event_id=event['event_id'],
-        created_at=event['created_at'],
-        source=event['source'],
-        event_type=event['event_type'],
-        payload=event['payload'],
-        status=event['status'],
-        metadata=event.get('metadata'),
-        acknowledged_at=event.get('acknowledged_at'),
-        request_id=request_id
+    # Stream the response so large payloads start sending before the whole
+    # body is encoded (same shape as EventDetailResponse)
+    return StreamingResponse(
+        _stream_event_detail(event, request_id),
+        media_type='application/json'
     )
 
 
@@ -708,33 +798,25 @@ async def acknowledge_event_endpoint(
     
     Requires API key authentication.
     """
+    log = bind_logger(logger, operation='acknowledge_event')
+    
     event_id_str = str(event_id)
     request_id = request.state.request_id
     duration_ms = getattr(request.state, 'duration_ms', None)
     
-    # Acknowledge event
-    updated_event = acknowledge_event(event_id_str)
+    # Acknowledge event; on failure the current state comes back with it
+    updated_event, event = try_acknowledge_event(event_id_str)
     
     if updated_event is None:
-        # Check if event exists
-        event = get_event(event_id_str)
         if event is None:
             # Record error metric
-            endpoint = '/v1/events/{event_id}/ack'
-            method = 'POST'
-            if duration_ms:
-                record_latency(endpoint, method, duration_ms)
-            record_error(endpoint, method, 'NOT_FOUND')
-            record_request_count(endpoint, method)
+            EVENT_ACK_POST.request_error('NOT_FOUND', duration_ms)
             
-            logger.warning(
+            log.warning(
                 "Event not found for acknowledgment",
-                extra={
-                    'operation': 'acknowledge_event',
-                    'event_id': event_id_str,
-                    'status_code': 404,
-                    'duration_ms': duration_ms,
-                }
+                event_id=event_id_str,
+                status_code=404,
+                duration_ms=duration_ms
             )
             raise NotFoundError(
                 f"Event with ID '{event_id_str}' was not found",
@@ -743,22 +825,14 @@ async def acknowledge_event_endpoint(
         else:
             # Event exists but acknowledge failed (already acknowledged)
             # Record error metric
-            endpoint = '/v1/events/{event_id}/ack'
-            method = 'POST'
-            if duration_ms:
-                record_latency(endpoint, method, duration_ms)
-            record_error(endpoint, method, 'CONFLICT')
-            record_request_count(endpoint, method)
+            EVENT_ACK_POST.request_error('CONFLICT', duration_ms)
             
-            logger.warning(
+            log.warning(
                 "Event already acknowledged",
-                extra={
-                    'operation': 'acknowledge_event',
-                    'event_id': event_id_str,
-                    'current_status': event.get('status', 'acknowledged'),
-                    'status_code': 409,
-                    'duration_ms': duration_ms,
-                }
+                event_id=event_id_str,
+                current_status=event.get('status', 'acknowledged'),
+                status_code=409,
+                duration_ms=duration_ms
             )
             raise ConflictError(
                 f"Event '{event_id_str}' has already been acknowledged",
@@ -773,32 +847,24 @@ async def acknowledge_event_endpoint(
             )
     
     # Record metrics
-    endpoint = '/v1/events/{event_id}/ack'
-    method = 'POST'
-    if duration_ms:
-        record_latency(endpoint, method, duration_ms)
-    record_success(endpoint, method)
-    record_request_count(endpoint, method)
-    
-    logger.info(
+    EVENT_ACK_POST.request_success(duration_ms)
+    
+    log.info(
         "Event acknowledged successfully",
-        extra={
-            'operation': 'acknowledge_event',
-            'event_id': event_id_str,
-            'status': updated_event['status'],
-            'acknowledged_at': updated_event['acknowledged_at'],
-            'status_code': 200,
-            'duration_ms': duration_ms,
-        }
+        event_id=event_id_str,
+        status=updated_event['status'],
+        acknowledged_at=updated_event['acknowledged_at'],
+        status_code=200,
+        duration_ms=duration_ms
     )
     
-    return AckResponse(
+    return _model_response(AckResponse.model_construct(
         event_id=updated_event['event_id'],
         status=updated_event['status'],
         acknowledged_at=updated_event['acknowledged_at'],
         message="Event acknowledged successfully",
         request_id=request_id
-    )
+    ))
 
 
 @router.delete(
@@ -860,6 +926,8 @@ async def delete_event_endpoint(
     Requires API key authentication.
     Idempotent operation.
     """
+    log = bind_logger(logger, operation='delete_event')
+    
     event_id_str = str(event_id)
     request_id = request.state.request_id
     duration_ms = getattr(request.state, 'duration_ms', None)
@@ -868,26 +936,18 @@ async def delete_event_endpoint(
     delete_event(event_id_str)
     
     # Record metrics
-    endpoint = '/v1/events/{event_id}'
-    method = 'DELETE'
-    if duration_ms:
-        record_latency(endpoint, method, duration_ms)
-    record_success(endpoint, method)
-    record_request_count(endpoint, method)
-    
-    logger.info(
+    EVENT_DELETE.request_success(duration_ms)
+    
+    log.info(
         "Event deleted successfully",
-        extra={
-            'operation': 'delete_event',
-            'event_id': event_id_str,
-            'status_code': 200,
-            'duration_ms': duration_ms,
-        }
+        event_id=event_id_str,
+        status_code=200,
+        duration_ms=duration_ms
     )
     
-    return DeleteResponse(
+    return _model_response(DeleteResponse.model_construct(
         event_id=event_id_str,
         message="Event deleted successfully",
         request_id=request_id
-    )
+    ))
 
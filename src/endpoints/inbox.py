@@ -1,18 +1,49 @@
 """Inbox endpoint: retrieve pending events"""
 
+import logging
 from typing import Optional
-from datetime import datetime
-from fastapi import APIRouter, Request, Depends, Query
+import orjson
+from datetime import datetime, timezone
+from fastapi import APIRouter, Request, Response, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from src.models import InboxResponse
 from src.database import query_pending_events
 from src.auth import get_api_key
-from src.utils import encode_cursor
-from src.utils.logging import get_logger
-from src.utils.metrics import record_latency, record_success, record_request_count
+from src.exceptions import ValidationError
+from src.utils import encode_cursor, compute_etag, etag_matches, json_default
+from src.utils.logging import get_logger, bind_logger
+from src.utils.metrics import bind
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Metric handles bound once at import time
+INBOX_GET = bind('/v1/inbox', 'GET')
+
+# Stored created_at format (see get_iso_timestamp)
+CREATED_AT_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def _parse_date_filter(name: str, value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 date filter query parameter into a UTC datetime.
+    
+    fromisoformat accepts the Z suffix on Python 3.11+. Timestamps without an
+    offset are taken as UTC.
+    
+    Raises:
+        ValidationError: If the value is not a valid ISO 8601 timestamp
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(f"Invalid {name} format. Expected ISO 8601 timestamp, got: {value}")
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
 
 @router.get(
     "/inbox",
@@ -36,7 +67,7 @@ logger = get_logger(__name__)
     - Filter by `priority` (low, normal, high) to filter by event priority
     - Filter by metadata fields using `metadata_key` and `metadata_value` for exact matches
     - Filters can be combined
-    - Filters are applied after query (may affect pagination)
+    - Date filters narrow the index query; other filters are applied after query (may affect pagination)
     
     **Use Cases:**
     - Poll for new events to process
@@ -70,6 +101,7 @@ logger = get_logger(__name__)
                 }
             }
         },
+        304: {"description": "Not modified - page matches the If-None-Match ETag"},
         401: {
             "description": "Unauthorized - Invalid or missing API key",
             "content": {
@@ -105,53 +137,45 @@ async def get_inbox(
     
     Requires API key authentication.
     """
+    log = bind_logger(logger, operation='get_inbox')
     request_id = request.state.request_id
     duration_ms = getattr(request.state, 'duration_ms', None)
     
     # Parse and validate date filters
-    created_after_dt = None
-    created_before_dt = None
-    if created_after:
-        try:
-            created_after_dt = datetime.fromisoformat(created_after.replace('Z', '+00:00'))
-        except ValueError:
-            from src.exceptions import ValidationError
-            raise ValidationError(f"Invalid created_after format. Expected ISO 8601 timestamp, got: {created_after}")
-    if created_before:
-        try:
-            created_before_dt = datetime.fromisoformat(created_before.replace('Z', '+00:00'))
-        except ValueError:
-            from src.exceptions import ValidationError
-            raise ValidationError(f"Invalid created_before format. Expected ISO 8601 timestamp, got: {created_before}")
+    created_after_dt = _parse_date_filter('created_after', created_after)
+    created_before_dt = _parse_date_filter('created_before', created_before)
     
     # Validate date range
     if created_after_dt and created_before_dt and created_after_dt > created_before_dt:
-        from src.exceptions import ValidationError
         raise ValidationError("created_after must be before created_before")
     
     # Validate priority
     if priority and priority not in ['low', 'normal', 'high']:
-        from src.exceptions import ValidationError
         raise ValidationError(f"Invalid priority. Must be one of: low, normal, high. Got: {priority}")
     
     # Validate metadata filters
     if (metadata_key and not metadata_value) or (metadata_value and not metadata_key):
-        from src.exceptions import ValidationError
         raise ValidationError("Both metadata_key and metadata_value must be provided together")
     
+    # Normalize date filters to the stored created_at format once (they are
+    # compared as strings against the GSI sort key)
+    created_after_iso = created_after_dt.strftime(CREATED_AT_FORMAT) if created_after_dt else None
+    created_before_iso = created_before_dt.strftime(CREATED_AT_FORMAT) if created_before_dt else None
+    
     # Build metadata filter dict
     metadata_filters = None
     if metadata_key and metadata_value:
         metadata_filters = {metadata_key: metadata_value}
     
-    # Query pending events
-    result = query_pending_events(
+    # Query pending events (boto3 is blocking, so keep it off the event loop)
+    result = await run_in_threadpool(
+        query_pending_events,
         limit=limit,
         cursor=cursor,
         source=source,
         event_type=event_type,
-        created_after=created_after_dt.isoformat().replace('+00:00', 'Z') if created_after_dt else None,
-        created_before=created_before_dt.isoformat().replace('+00:00', 'Z') if created_before_dt else None,
+        created_after=created_after_iso,
+        created_before=created_before_iso,
         priority=priority,
         metadata_filters=metadata_filters
     )
@@ -160,19 +184,7 @@ async def get_inbox(
     last_evaluated_key = result.get('last_evaluated_key')
     
     # Encode cursor if more results exist
-    next_cursor = None
-    if last_evaluated_key:
-        try:
-            next_cursor = encode_cursor(last_evaluated_key)
-        except Exception as e:
-            # Log error but don't fail the request
-            logger.warning(
-                "Failed to encode cursor",
-                extra={
-                    'operation': 'get_inbox',
-                    'error': str(e),
-                }
-            )
+    next_cursor = encode_cursor(last_evaluated_key) if last_evaluated_key else None
     
     pagination = {
         "limit": limit
@@ -181,35 +193,42 @@ async def get_inbox(
         pagination["next_cursor"] = next_cursor
     
     # Record metrics
-    endpoint = '/v1/inbox'
-    method = 'GET'
-    if duration_ms:
-        record_latency(endpoint, method, duration_ms)
-    record_success(endpoint, method)
-    record_request_count(endpoint, method)
-    
-    logger.info(
-        "Inbox query completed",
-        extra={
-            'operation': 'get_inbox',
-            'result_count': len(events),
-            'limit': limit,
-            'has_cursor': cursor is not None,
-            'has_next_cursor': next_cursor is not None,
-            'source_filter': source,
-            'event_type_filter': event_type,
-            'created_after_filter': created_after,
-            'created_before_filter': created_before,
-            'priority_filter': priority,
-            'metadata_filter': metadata_filters,
-            'status_code': 200,
-            'duration_ms': duration_ms,
-        }
+    INBOX_GET.request_success(duration_ms)
+    
+    # Only build the structured fields when INFO is actually emitted
+    if log.isEnabledFor(logging.INFO):
+        log.info(
+            "Inbox query completed",
+            result_count=len(events),
+            limit=limit,
+            has_cursor=cursor is not None,
+            has_next_cursor=next_cursor is not None,
+            source_filter=source,
+            event_type_filter=event_type,
+            created_after_filter=created_after,
+            created_before_filter=created_before,
+            priority_filter=priority,
+            metadata_filter=metadata_filters,
+            status_code=200,
+            duration_ms=duration_ms
+        )
+    
+    # Items come straight from DynamoDB, so skip re-validating them through
+    # InboxResponse and encode once; the same bytes feed the ETag.
+    page = orjson.dumps(
+        {'events': events, 'pagination': pagination},
+        default=json_default,
+        option=orjson.OPT_SORT_KEYS
     )
+    etag = compute_etag(page)
+    
+    # Let polling clients skip the body when the page hasn't changed
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
     
-    return InboxResponse(
-        events=events,
-        pagination=pagination,
-        request_id=request_id
+    return Response(
+        content=page[:-1] + b',"request_id":' + orjson.dumps(request_id) + b'}',
+        media_type='application/json',
+        headers={'ETag': etag}
     )
 
@@ -1,11 +1,11 @@
 """Webhook endpoints: create, list, get, update, delete, test"""
 
+import asyncio
 import httpx
-import hmac
-import hashlib
-import json
+import orjson
 from typing import Optional
-from fastapi import APIRouter, Request, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Request, Response, Depends, HTTPException, Path, Query
+from fastapi.concurrency import run_in_threadpool
 from src.models import (
     WebhookCreate, WebhookResponse, WebhookListResponse, WebhookUpdate, WebhookTestResponse
 )
@@ -14,10 +14,72 @@ from src.database import (
 )
 from src.auth import get_api_key
 from src.exceptions import NotFoundError, ValidationError, InternalError
-from src.utils import generate_uuid, format_not_found_error, get_iso_timestamp
+from src.utils import (
+    generate_uuid, format_not_found_error, get_request_timestamp, compute_etag, etag_matches,
+    encode_cursor
+)
+from src.utils.cache import TTLCache
+from src.utils.signing import sign_webhook_payload, WEBHOOK_SIGNATURE_ALGORITHM
 
 router = APIRouter()
 
+# Owned webhooks by (webhook_id, api_key), so repeated tests skip the DynamoDB read
+_owned_webhook_cache = TTLCache(maxsize=10000, ttl=5.0)
+
+# Shared HTTP client for webhook tests (lazy initialization)
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """
+    Get or initialize the shared webhook HTTP client.
+    
+    Reusing one client keeps connections to webhook hosts alive between
+    tests, and HTTP/2 lets concurrent tests to the same host share one
+    connection (hosts without h2 fall back to HTTP/1.1 via ALPN). A new
+    client is created if the event loop changes, since pooled connections
+    are bound to the loop they were opened on; the old client is closed on
+    its own loop if that loop is still open.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop:
+        if _http_client is not None and not _http_client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(_http_client.aclose(), _http_client_loop)
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def _get_owned_webhook(webhook_id: str, api_key: str) -> Optional[dict]:
+    """
+    Get a webhook (including its secret) if it belongs to the API key.
+    
+    Positive lookups are cached briefly; update and delete invalidate them.
+    """
+    key = (webhook_id, api_key)
+    webhook = _owned_webhook_cache.get(key)
+    if webhook is None:
+        webhook = await run_in_threadpool(get_webhook, webhook_id)
+        if not webhook or webhook.get('api_key') != api_key:
+            return None
+        _owned_webhook_cache.set(key, webhook)
+    return webhook
+
+
+async def close_http_client() -> None:
+    """Close the shared webhook HTTP client."""
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        _http_client_loop = None
+
 
 @router.post(
     "/webhooks",
@@ -72,7 +134,8 @@ async def create_webhook_endpoint(
         webhook_id = generate_uuid()
         
         # Create webhook in database
-        webhook = create_webhook(
+        webhook = await run_in_threadpool(
+            create_webhook,
             webhook_id=webhook_id,
             url=webhook_data.url,
             events=webhook_data.events,
@@ -80,11 +143,11 @@ async def create_webhook_endpoint(
             api_key=api_key
         )
         
-        return WebhookResponse(
+        return WebhookResponse.model_construct(
             webhook_id=webhook['webhook_id'],
             url=webhook['url'],
             events=webhook['events'],
-            is_active=webhook['is_active'],
+            is_active=bool(webhook['is_active']),  # Stored as 1/0
             created_at=webhook['created_at'],
             request_id=request.state.request_id
         )
@@ -123,20 +186,21 @@ async def list_webhooks_endpoint(
 ):
     """List webhooks for the authenticated API key."""
     try:
-        result = list_webhooks(api_key=api_key, is_active=is_active, limit=limit, cursor=cursor)
+        result = await run_in_threadpool(
+            list_webhooks, api_key=api_key, is_active=is_active, limit=limit, cursor=cursor
+        )
         
         webhooks = result.get('webhooks', [])
         last_evaluated_key = result.get('last_evaluated_key')
         
         pagination = None
         if last_evaluated_key:
-            from src.utils import encode_cursor
             pagination = {
                 "next_cursor": encode_cursor(last_evaluated_key),
                 "has_more": True
             }
         
-        return WebhookListResponse(
+        return WebhookListResponse.model_construct(
             webhooks=webhooks,
             pagination=pagination,
             request_id=request.state.request_id
@@ -163,44 +227,40 @@ async def list_webhooks_endpoint(
     """,
     responses={
         200: {"description": "Webhook details"},
+        304: {"description": "Not modified - webhook matches the If-None-Match ETag"},
         404: {"description": "Webhook not found"},
         401: {"description": "Unauthorized"}
     }
 )
 async def get_webhook_endpoint(
     request: Request,
+    response: Response,
     webhook_id: str = Path(..., description="Webhook ID"),
     api_key: str = Depends(get_api_key)
 ):
     """Get webhook by ID."""
-    webhook = get_webhook(webhook_id)
+    # Ownership is checked and the secret projected out by the database layer
+    webhook = await run_in_threadpool(get_webhook, webhook_id, api_key=api_key)
     
     if not webhook:
         raise NotFoundError(
             message="Webhook not found",
-            details=format_not_found_error("Webhook", webhook_id),
-            request_id=request.state.request_id
-        )
-    
-    # Verify webhook belongs to API key
-    if webhook.get('api_key') != api_key:
-        raise NotFoundError(
-            message="Webhook not found",
-            details=format_not_found_error("Webhook", webhook_id),
-            request_id=request.state.request_id
+            details=format_not_found_error("Webhook", webhook_id)
         )
     
-    # Remove secret from response
-    webhook.pop('secret', None)
+    body = {
+        'webhook_id': webhook['webhook_id'],
+        'url': webhook['url'],
+        'events': webhook['events'],
+        'is_active': webhook['is_active'],
+        'created_at': webhook['created_at']
+    }
+    etag = compute_etag(body)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
     
-    return WebhookResponse(
-        webhook_id=webhook['webhook_id'],
-        url=webhook['url'],
-        events=webhook['events'],
-        is_active=webhook['is_active'],
-        created_at=webhook['created_at'],
-        request_id=request.state.request_id
-    )
+    return WebhookResponse.model_construct(**body, request_id=request.state.request_id)
 
 
 @router.put(
@@ -230,32 +290,25 @@ async def update_webhook_endpoint(
     api_key: str = Depends(get_api_key)
 ):
     """Update webhook."""
-    # Verify webhook exists and belongs to API key
-    webhook = get_webhook(webhook_id)
-    if not webhook or webhook.get('api_key') != api_key:
-        raise NotFoundError(
-            message="Webhook not found",
-            details=format_not_found_error("Webhook", webhook_id),
-            request_id=request.state.request_id
-        )
-    
-    # Update webhook
-    updated = update_webhook(
+    # Update webhook; ownership is enforced by the conditional write
+    updated = await run_in_threadpool(
+        update_webhook,
         webhook_id=webhook_id,
         url=webhook_data.url if webhook_data else None,
         events=webhook_data.events if webhook_data else None,
         secret=webhook_data.secret if webhook_data else None,
-        is_active=webhook_data.is_active if webhook_data else None
+        is_active=webhook_data.is_active if webhook_data else None,
+        expected_api_key=api_key
     )
+    _owned_webhook_cache.pop((webhook_id, api_key))
     
     if not updated:
-        raise InternalError(
-            message="Failed to update webhook",
-            details={},
-            request_id=request.state.request_id
+        raise NotFoundError(
+            message="Webhook not found",
+            details=format_not_found_error("Webhook", webhook_id)
         )
     
-    return WebhookResponse(
+    return WebhookResponse.model_construct(
         webhook_id=updated['webhook_id'],
         url=updated['url'],
         events=updated['events'],
@@ -289,21 +342,13 @@ async def delete_webhook_endpoint(
     api_key: str = Depends(get_api_key)
 ):
     """Delete webhook."""
-    # Verify webhook exists and belongs to API key
-    webhook = get_webhook(webhook_id)
-    if not webhook or webhook.get('api_key') != api_key:
+    # Delete only if the webhook exists and belongs to API key
+    deleted = await run_in_threadpool(delete_webhook, webhook_id, expected_api_key=api_key)
+    _owned_webhook_cache.pop((webhook_id, api_key))
+    if not deleted:
         raise NotFoundError(
             message="Webhook not found",
-            details=format_not_found_error("Webhook", webhook_id),
-            request_id=request.state.request_id
-        )
-    
-    deleted = delete_webhook(webhook_id)
-    if not deleted:
-        raise InternalError(
-            message="Failed to delete webhook",
-            details={},
-            request_id=request.state.request_id
+            details=format_not_found_error("Webhook", webhook_id)
         )
     
     return None
@@ -340,18 +385,18 @@ async def test_webhook_endpoint(
 ):
     """Test webhook by sending a test event."""
     # Verify webhook exists and belongs to API key
-    webhook = get_webhook(webhook_id)
-    if not webhook or webhook.get('api_key') != api_key:
+    webhook = await _get_owned_webhook(webhook_id, api_key)
+    if not webhook:
         raise NotFoundError(
             message="Webhook not found",
-            details=format_not_found_error("Webhook", webhook_id),
-            request_id=request.state.request_id
+            details=format_not_found_error("Webhook", webhook_id)
         )
     
-    # Create test event payload
+    # Create test event payload (one timestamp for the event and the header)
+    timestamp = get_request_timestamp(request)
     test_event = {
         "event_id": generate_uuid(),
-        "created_at": get_iso_timestamp(),
+        "created_at": timestamp,
         "source": "test",
         "event_type": "webhook.test",
         "payload": {
@@ -361,39 +406,34 @@ async def test_webhook_endpoint(
         "status": "pending"
     }
     
-    # Generate HMAC signature
-    payload_json = json.dumps(test_event)
-    secret = webhook.get('secret')
-    signature = hmac.new(
-        secret.encode(),
-        payload_json.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    # Generate HMAC signature over the exact bytes that are sent
+    payload_bytes = orjson.dumps(test_event)
+    signature = sign_webhook_payload(payload_bytes, webhook['secret'])
     
     # Send HTTP POST to webhook URL
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                webhook['url'],
-                json=test_event,
-                headers={
-                    'X-Webhook-Signature': signature,
-                    'X-Webhook-Id': webhook_id,
-                    'X-Webhook-Timestamp': get_iso_timestamp(),
-                    'Content-Type': 'application/json'
-                }
-            )
-            
-            status = "success" if 200 <= response.status_code < 300 else "failed"
-            return WebhookTestResponse(
-                webhook_id=webhook_id,
-                status=status,
-                status_code=response.status_code,
-                message=f"Webhook test {status} with status code {response.status_code}",
-                request_id=request.state.request_id
-            )
+        response = await _get_http_client().post(
+            webhook['url'],
+            content=payload_bytes,
+            headers={
+                'X-Webhook-Signature': signature,
+                'X-Webhook-Signature-Alg': WEBHOOK_SIGNATURE_ALGORITHM,
+                'X-Webhook-Id': webhook_id,
+                'X-Webhook-Timestamp': timestamp,
+                'Content-Type': 'application/json'
+            }
+        )
+        
+        status = "success" if 200 <= response.status_code < 300 else "failed"
+        return WebhookTestResponse.model_construct(
+            webhook_id=webhook_id,
+            status=status,
+            status_code=response.status_code,
+            message=f"Webhook test {status} with status code {response.status_code}",
+            request_id=request.state.request_id
+        )
     except httpx.TimeoutException:
-        return WebhookTestResponse(
+        return WebhookTestResponse.model_construct(
             webhook_id=webhook_id,
             status="failed",
             status_code=None,
@@ -401,7 +441,7 @@ async def test_webhook_endpoint(
             request_id=request.state.request_id
         )
     except Exception as e:
-        return WebhookTestResponse(
+        return WebhookTestResponse.model_construct(
             webhook_id=webhook_id,
             status="failed",
             status_code=None,
@@ -4,6 +4,10 @@
 class APIException(Exception):
     """Base exception for API errors."""
     
+    # Slots keep raised errors from allocating a per-instance __dict__;
+    # subclasses declare empty __slots__ so they don't reintroduce one.
+    __slots__ = ('status_code', 'error_code', 'message', 'details')
+    
     def __init__(self, status_code: int, error_code: str, message: str, details: dict = None):
         self.status_code = status_code
         self.error_code = error_code
@@ -15,6 +19,8 @@ class APIException(Exception):
 class ValidationError(APIException):
     """Invalid request payload."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Invalid request payload", details: dict = None):
         super().__init__(400, "VALIDATION_ERROR", message, details)
 
@@ -22,6 +28,8 @@ class ValidationError(APIException):
 class UnauthorizedError(APIException):
     """Missing or invalid API key."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Unauthorized", details: dict = None):
         super().__init__(401, "UNAUTHORIZED", message, details)
 
@@ -29,6 +37,8 @@ class UnauthorizedError(APIException):
 class NotFoundError(APIException):
     """Resource not found."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Resource not found", details: dict = None):
         super().__init__(404, "NOT_FOUND", message, details)
 
@@ -36,6 +46,8 @@ class NotFoundError(APIException):
 class ConflictError(APIException):
     """Resource conflict (e.g., already acknowledged)."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Resource conflict", details: dict = None):
         super().__init__(409, "CONFLICT", message, details)
 
@@ -43,6 +55,8 @@ class ConflictError(APIException):
 class PayloadTooLargeError(APIException):
     """Payload exceeds maximum size."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Payload too large", details: dict = None):
         super().__init__(413, "PAYLOAD_TOO_LARGE", message, details)
 
@@ -50,6 +64,8 @@ class PayloadTooLargeError(APIException):
 class RateLimitExceededError(APIException):
     """Rate limit exceeded."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Rate limit exceeded", details: dict = None):
         super().__init__(429, "RATE_LIMIT_EXCEEDED", message, details)
 
@@ -57,6 +73,8 @@ class RateLimitExceededError(APIException):
 class ForbiddenError(APIException):
     """IP address not allowed."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "IP address not allowed", details: dict = None):
         super().__init__(403, "FORBIDDEN", message, details)
 
@@ -64,6 +82,8 @@ class ForbiddenError(APIException):
 class InternalError(APIException):
     """Internal server error."""
     
+    __slots__ = ()
+    
     def __init__(self, message: str = "Internal server error", details: dict = None):
         super().__init__(500, "INTERNAL_ERROR", message, details)
 
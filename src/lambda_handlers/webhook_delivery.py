@@ -1,25 +1,66 @@
 """Lambda handler for webhook delivery via SQS"""
 
 import os
-import json
 import logging
-import hmac
-import hashlib
 import time
-import requests
+import orjson
+import httpx
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, Union
+from src.utils.cache import TTLCache
+from src.utils.signing import sign_webhook_payload, WEBHOOK_SIGNATURE_ALGORITHM
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize DynamoDB client
+# Initialize AWS clients
 dynamodb = boto3.resource('dynamodb')
+sqs = boto3.client('sqs')
 region = os.getenv('AWS_REGION', 'us-east-1')
 stage = os.getenv('STAGE', 'prod')
 webhooks_table_name = f'triggers-api-webhooks-{stage}'
+webhooks_table = dynamodb.Table(webhooks_table_name)
+
+# Upper bound on parallel HTTP deliveries per batch (SQS batch size is 10)
+MAX_CONCURRENT_DELIVERIES = 10
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+MAX_BATCH_GET_RETRIES = 3
+
+# Webhook configs change rarely; warm containers reuse lookups for up to a
+# minute, so a webhook update can take that long to reach deliveries.
+# Deleted webhooks are cached as False.
+_webhook_cache = TTLCache(maxsize=1024, ttl=60.0)
+
+# Shared client so warm invocations reuse pooled keep-alive connections.
+# HTTP/2 multiplexes concurrent deliveries to the same host over one
+# connection. Retries are handled by SQS redelivery, not by the client.
+http_client = httpx.Client(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+)
+
+
+# Delivery timestamps have whole-second precision, so the formatted string
+# is reused for every delivery within the same second
+_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.000000Z'
+_timestamp_cache = (0, '')
+
+
+def _delivery_timestamp() -> str:
+    """Return the current UTC time as an ISO 8601 string with Z suffix."""
+    global _timestamp_cache
+    now = int(time.time())
+    second, formatted = _timestamp_cache
+    if second != now:
+        formatted = time.strftime(_TIMESTAMP_FORMAT, time.gmtime(now))
+        _timestamp_cache = (now, formatted)
+    return formatted
 
 
 def get_webhook_details(webhook_id: str) -> Dict[str, Any]:
@@ -32,34 +73,100 @@ def get_webhook_details(webhook_id: str) -> Dict[str, Any]:
     Returns:
         Webhook dictionary or None if not found
     """
+    webhook = _webhook_cache.get(webhook_id)
+    if webhook is not None:
+        return webhook or None
+    
     try:
-        table = dynamodb.Table(webhooks_table_name)
-        response = table.get_item(Key={'webhook_id': webhook_id})
-        return response.get('Item')
+        response = webhooks_table.get_item(Key={'webhook_id': webhook_id})
+        webhook = response.get('Item')
+        # Cache misses too, so messages for deleted webhooks skip DynamoDB
+        _webhook_cache.set(webhook_id, webhook or False)
+        return webhook
     except ClientError as e:
         logger.error(f"Error getting webhook {webhook_id}: {e}")
         return None
 
 
-def generate_webhook_signature(payload: str, secret: str) -> str:
+def get_webhooks_details(webhook_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get several webhooks, reading cache misses from DynamoDB with BatchGetItem.
+    
+    Args:
+        webhook_ids: Webhook IDs (duplicates are fetched once)
+        
+    Returns:
+        Dictionary mapping webhook_id to webhook; missing webhooks are absent
+    """
+    webhooks_by_id = {}
+    unique_ids = []
+    for wid in dict.fromkeys(webhook_ids):
+        webhook = _webhook_cache.get(wid)
+        if webhook is None:
+            unique_ids.append(wid)
+        elif webhook:
+            webhooks_by_id[wid] = webhook
+    
+    for start in range(0, len(unique_ids), BATCH_GET_LIMIT):
+        chunk = unique_ids[start:start + BATCH_GET_LIMIT]
+        request_items = {
+            webhooks_table_name: {
+                'Keys': [{'webhook_id': wid} for wid in chunk]
+            }
+        }
+        attempt = 0
+        complete = False
+        while request_items:
+            try:
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+            except ClientError as e:
+                logger.error(f"Error batch getting webhooks: {e}")
+                break
+            for item in response.get('Responses', {}).get(webhooks_table_name, []):
+                webhooks_by_id[item['webhook_id']] = item
+                _webhook_cache.set(item['webhook_id'], item)
+            
+            # Retry throttled keys with exponential backoff
+            request_items = response.get('UnprocessedKeys') or {}
+            if not request_items:
+                complete = True
+            else:
+                attempt += 1
+                if attempt > MAX_BATCH_GET_RETRIES:
+                    logger.warning("Giving up on unprocessed webhook keys after retries")
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+        
+        # Every key was answered, so anything not returned has been deleted
+        if complete:
+            for wid in chunk:
+                if wid not in webhooks_by_id:
+                    _webhook_cache.set(wid, False)
+    
+    return webhooks_by_id
+
+
+def generate_webhook_signature(payload: bytes, secret: Union[str, bytes]) -> str:
     """
     Generate HMAC signature for webhook payload.
     
     Args:
-        payload: JSON string of event data
-        secret: Webhook secret
+        payload: Serialized JSON body of event data
+        secret: Webhook secret (str or pre-encoded bytes)
         
     Returns:
-        Hex-encoded HMAC-SHA256 signature
+        Hex-encoded signature (HMAC-SHA256 unless WEBHOOK_SIGNATURE_ALGORITHM
+        selects keyed BLAKE2b)
     """
-    return hmac.new(
-        secret.encode(),
-        payload.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    return sign_webhook_payload(payload, secret)
 
 
-def deliver_webhook_sync(webhook: Dict[str, Any], event_data: Dict[str, Any], retry_count: int = 0) -> bool:
+def deliver_webhook_sync(
+    webhook: Dict[str, Any],
+    event_data: Dict[str, Any],
+    retry_count: int = 0,
+    secret_key: Optional[bytes] = None
+) -> bool:
     """
     Deliver webhook via HTTP POST with retry logic.
     
@@ -67,34 +174,31 @@ def deliver_webhook_sync(webhook: Dict[str, Any], event_data: Dict[str, Any], re
         webhook: Webhook dictionary
         event_data: Event data to send
         retry_count: Current retry attempt (0-based)
+        secret_key: Pre-encoded webhook secret (default: encode webhook['secret'])
         
     Returns:
         True if delivery successful, False otherwise
     """
     webhook_id = webhook['webhook_id']
     url = webhook['url']
-    secret = webhook.get('secret', '')
+    if secret_key is None:
+        secret_key = webhook.get('secret', '').encode()
     
-    # Generate payload and signature
-    payload_json = json.dumps(event_data)
-    signature = generate_webhook_signature(payload_json, secret)
-    timestamp = time.strftime('%Y-%m-%dT%H:%M:%S.000000Z', time.gmtime())
+    # Serialize once; the same bytes are signed and sent
+    payload_bytes = orjson.dumps(event_data)
+    signature = generate_webhook_signature(payload_bytes, secret_key)
+    timestamp = _delivery_timestamp()
     
     headers = {
         'X-Webhook-Signature': signature,
+        'X-Webhook-Signature-Alg': WEBHOOK_SIGNATURE_ALGORITHM,
         'X-Webhook-Id': webhook_id,
         'X-Webhook-Timestamp': timestamp,
         'Content-Type': 'application/json'
     }
     
-    # Exponential backoff: 1s, 2s, 4s
-    if retry_count > 0:
-        delay = 2 ** (retry_count - 1)
-        logger.info(f"Retrying webhook {webhook_id}, attempt {retry_count + 1}, delay {delay}s")
-        time.sleep(delay)
-    
     try:
-        response = requests.post(url, json=event_data, headers=headers, timeout=10.0)
+        response = http_client.post(url, content=payload_bytes, headers=headers)
         
         if 200 <= response.status_code < 300:
             logger.info(
@@ -130,7 +234,7 @@ def deliver_webhook_sync(webhook: Dict[str, Any], event_data: Dict[str, Any], re
                 )
                 return False
                 
-    except requests.Timeout:
+    except httpx.TimeoutException:
         logger.warning(
             f"Webhook delivery timeout",
             extra={
@@ -151,10 +255,90 @@ def deliver_webhook_sync(webhook: Dict[str, Any], event_data: Dict[str, Any], re
         return False
 
 
+def _queue_url_from_arn(queue_arn: str) -> str:
+    """
+    Build an SQS queue URL from its ARN (arn:aws:sqs:region:account:name).
+    
+    Args:
+        queue_arn: SQS queue ARN from the event record
+        
+    Returns:
+        Queue URL
+    """
+    _, _, _, queue_region, account_id, queue_name = queue_arn.split(':', 5)
+    return f"https://sqs.{queue_region}.amazonaws.com/{account_id}/{queue_name}"
+
+
+def schedule_retry(record: Dict[str, Any], retry_count: int) -> None:
+    """
+    Delay redelivery of a failed message with exponential backoff (1s, 2s, 4s).
+    
+    Backoff is applied by shortening the message's visibility timeout instead
+    of sleeping inside the invocation, so the wait is not billed Lambda time.
+    If this fails the message is still retried after the queue's default
+    visibility timeout.
+    
+    Args:
+        record: SQS event record
+        retry_count: Current retry attempt (0-based)
+    """
+    try:
+        queue_url = os.getenv('WEBHOOK_DELIVERY_QUEUE_URL') or _queue_url_from_arn(record['eventSourceARN'])
+        sqs.change_message_visibility(
+            QueueUrl=queue_url,
+            ReceiptHandle=record['receiptHandle'],
+            VisibilityTimeout=2 ** retry_count
+        )
+    except (ClientError, KeyError, ValueError) as e:
+        logger.warning(f"Could not set retry backoff for message {record.get('messageId')}: {e}")
+
+
+def deliver_record(
+    record: Dict[str, Any],
+    webhook: Dict[str, Any],
+    event_data: Dict[str, Any],
+    secret_key: Optional[bytes] = None
+) -> bool:
+    """
+    Deliver one SQS record's webhook and schedule a backoff retry on failure.
+    
+    Args:
+        record: SQS event record
+        webhook: Webhook dictionary
+        event_data: Event data to send
+        secret_key: Pre-encoded webhook secret
+        
+    Returns:
+        True if delivery successful, False if the message should be retried or
+        routed to the DLQ
+    """
+    webhook_id = webhook['webhook_id']
+    
+    # Get retry count from message attributes
+    retry_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', 1)) - 1
+    
+    if deliver_webhook_sync(webhook, event_data, retry_count, secret_key):
+        return True
+    
+    # Max 3 retries (0, 1, 2)
+    if retry_count < 2:
+        # Will be retried by SQS - don't delete message
+        logger.info(f"Webhook delivery failed, will retry: {webhook_id}")
+        schedule_retry(record, retry_count)
+    else:
+        # Max retries reached, send to DLQ
+        logger.error(f"Webhook delivery failed after max retries: {webhook_id}")
+    return False
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler to process SQS messages for webhook delivery.
     
+    Records are validated serially and their webhooks fetched with a single
+    BatchGetItem, then the HTTP deliveries for the batch run concurrently so
+    a batch takes about as long as its slowest endpoint.
+    
     Args:
         event: SQS event with batch of messages
         context: Lambda context
@@ -163,24 +347,50 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Batch item failures for DLQ routing
     """
     batch_item_failures = []
+    deliveries = []
+    messages = []
     
     for record in event.get('Records', []):
         message_id = record.get('messageId')
-        receipt_handle = record.get('receiptHandle')
         
         try:
             # Parse message body
-            body = json.loads(record.get('body', '{}'))
+            body = orjson.loads(record.get('body') or '{}')
             webhook_id = body.get('webhook_id')
             event_data = body.get('event_data')
             
-            if not webhook_id or not event_data:
+            if not isinstance(webhook_id, str) or not webhook_id or not event_data:
                 logger.error(f"Invalid message format: {body}")
                 batch_item_failures.append({'itemIdentifier': message_id})
                 continue
             
-            # Get webhook details
-            webhook = get_webhook_details(webhook_id)
+            # Drop messages for webhooks already known to be inactive
+            # before they cost a DynamoDB read
+            cached = _webhook_cache.get(webhook_id)
+            if cached and not cached.get('is_active', 0):
+                logger.info(f"Webhook {webhook_id} is not active, skipping")
+                continue
+            
+            messages.append((record, webhook_id, event_data))
+            
+        except Exception as e:
+            logger.error(
+                f"Error processing webhook message: {e}",
+                extra={
+                    'message_id': message_id,
+                    'error': str(e)
+                }
+            )
+            batch_item_failures.append({'itemIdentifier': message_id})
+    
+    # One BatchGetItem for every webhook the batch references
+    webhooks_by_id = get_webhooks_details(webhook_id for _, webhook_id, _ in messages)
+    
+    for record, webhook_id, event_data in messages:
+        message_id = record.get('messageId')
+        
+        try:
+            webhook = webhooks_by_id.get(webhook_id)
             if not webhook:
                 logger.error(f"Webhook not found: {webhook_id}")
                 batch_item_failures.append({'itemIdentifier': message_id})
@@ -193,23 +403,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 # Don't add to failures - just skip (message will be deleted)
                 continue
             
-            # Get retry count from message attributes
-            retry_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', 1)) - 1
-            
-            # Deliver webhook (synchronous for Lambda)
-            success = deliver_webhook_sync(webhook, event_data, retry_count)
-            
-            if not success:
-                # Max 3 retries (0, 1, 2)
-                if retry_count < 2:
-                    # Will be retried by SQS - don't delete message
-                    logger.info(f"Webhook delivery failed, will retry: {webhook_id}")
-                    # Return failure to trigger SQS retry
-                    batch_item_failures.append({'itemIdentifier': message_id})
-                else:
-                    # Max retries reached, send to DLQ
-                    logger.error(f"Webhook delivery failed after max retries: {webhook_id}")
-                    batch_item_failures.append({'itemIdentifier': message_id})
+            deliveries.append((record, webhook, event_data))
             
         except Exception as e:
             logger.error(
@@ -219,9 +413,37 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'error': str(e)
                 }
             )
-            # If we've already added to failures, don't add again
-            if not any(f['itemIdentifier'] == message_id for f in batch_item_failures):
+            batch_item_failures.append({'itemIdentifier': message_id})
+    
+    if not deliveries:
+        return {'batchItemFailures': batch_item_failures}
+    
+    # Encode each webhook's secret once per batch, not once per message
+    secret_keys = {
+        webhook['webhook_id']: webhook.get('secret', '').encode()
+        for _, webhook, _ in deliveries
+    }
+    
+    with ThreadPoolExecutor(max_workers=min(len(deliveries), MAX_CONCURRENT_DELIVERIES)) as executor:
+        futures = {
+            executor.submit(
+                deliver_record, record, webhook, event_data, secret_keys[webhook['webhook_id']]
+            ): record.get('messageId')
+            for record, webhook, event_data in deliveries
+        }
+        for future, message_id in futures.items():
+            try:
+                success = future.result()
+            except Exception as e:
+                logger.error(
+                    f"Error processing webhook message: {e}",
+                    extra={
+                        'message_id': message_id,
+                        'error': str(e)
+                    }
+                )
+                success = False
+            if not success:
                 batch_item_failures.append({'itemIdentifier': message_id})
     
     return {'batchItemFailures': batch_item_failures}
-
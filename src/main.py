@@ -1,39 +1,55 @@
 """FastAPI application entry point"""
 
+import asyncio
 import logging
 import os
 import time
+import orjson
+from typing import Optional
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.utils import get_openapi
 from pydantic import ValidationError as PydanticValidationError
+from starlette.routing import Route
 from mangum import Mangum
 
 from src.database import create_tables
-from src.exceptions import APIException, ValidationError, InternalError
-from src.utils import generate_uuid
-from src.utils.logging import get_logger, set_request_context, clear_request_context
-from src.utils.metrics import flush_metrics, record_error, record_latency, record_request_count
-from src.models import ErrorResponse, ErrorDetail
+from src.exceptions import APIException
+from src.models import LEGACY_VALIDATION_MESSAGES
+from src.utils import generate_uuid, format_validation_error
+from src.utils.logging import get_logger, JSON_FORMATTER
+from src.utils.metrics import record_error, record_latency, record_request_count, flush_metrics
 from src.endpoints import health, events, inbox, webhooks, api_keys, analytics
 
 # Configure structured JSON logging
 log_level = os.getenv('LOG_LEVEL', 'INFO')
+# Root handler is built with the shared JSON formatter already attached
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(JSON_FORMATTER)
 logging.basicConfig(
     level=getattr(logging, log_level.upper()),
-    handlers=[logging.StreamHandler()],
+    handlers=[_log_handler],
     force=True  # Override any existing configuration
 )
-# Configure root logger with JSON formatter
-root_logger = logging.getLogger()
-for handler in root_logger.handlers:
-    from src.utils.logging import JSONFormatter
-    handler.setFormatter(JSONFormatter())
 
 logger = get_logger(__name__)
 
+# Pre-serialized static responses; only request_id varies per response
+_INTERNAL_ERROR_TEMPLATE = (
+    b'{"error":{"code":"INTERNAL_ERROR","message":"Internal server error",'
+    b'"details":{},"request_id":%s}}'
+)
+_CORS_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, DELETE, OPTIONS, PUT",
+    "Access-Control-Allow-Headers": "Content-Type, X-API-Key, X-Request-ID, X-Signature, X-Signature-Timestamp, X-Signature-Version",
+    "Access-Control-Expose-Headers": "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, Retry-After",
+    "Access-Control-Max-Age": "3600",
+}
+
 # OpenAPI tags metadata
 tags_metadata = [
     {
@@ -87,6 +103,7 @@ app = FastAPI(
     """,
     version="1.0.0",
     openapi_tags=tags_metadata,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -115,6 +132,20 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+_openapi_bytes: Optional[bytes] = None
+
+
+async def openapi_json(request: Request) -> Response:
+    """Serve the OpenAPI schema, serialized once on first request."""
+    global _openapi_bytes
+    if _openapi_bytes is None:
+        _openapi_bytes = orjson.dumps(app.openapi())
+    return Response(content=_openapi_bytes, media_type="application/json")
+
+# Shadow FastAPI's default /openapi.json route, which re-encodes the schema
+# with the stdlib json encoder on every request
+app.router.routes.insert(0, Route(app.openapi_url, openapi_json, include_in_schema=False))
+
 # Add CORS middleware
 # Note: allow_credentials=True cannot be used with allow_origins=["*"]
 # For MVP, we allow all origins without credentials
@@ -128,6 +159,9 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Compress larger responses (inbox pages, webhook lists); sets Vary: Accept-Encoding
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 # Add optional signature validation middleware
 # Only enabled if ENABLE_REQUEST_SIGNING=true
 enable_signing = os.getenv('ENABLE_REQUEST_SIGNING', 'false').lower() == 'true'
@@ -135,84 +169,19 @@ if enable_signing:
     from src.middleware.signature_validation import signature_validation_middleware
     app.middleware("http")(signature_validation_middleware)
 
+# Add optional chaos engineering middleware (failure injection for resilience tests)
+# Only registered if CHAOS_ENABLED=true, so it costs nothing otherwise
+if os.getenv('CHAOS_ENABLED', 'false').lower() == 'true':
+    from src.middleware.chaos import ChaosMiddleware
+    app.add_middleware(ChaosMiddleware)
+
 # Create v1 router
 v1_router = app.router  # We'll use the main router with prefix
 
-# Request ID and context middleware with timing
-@app.middleware("http")
-async def add_request_id_and_context(request: Request, call_next):
-    """Extract or generate request ID, set logging context, and measure request duration."""
-    # Generate or extract request ID
-    request_id = request.headers.get("X-Request-ID") or generate_uuid()
-    request.state.request_id = request_id
-    
-    # Extract request context for logging
-    api_key = request.headers.get("X-API-Key")
-    endpoint = request.url.path
-    method = request.method
-    
-    # Set logging context
-    set_request_context(
-        request_id=request_id,
-        api_key=api_key,
-        endpoint=endpoint,
-        method=method
-    )
-    
-    # Measure request duration
-    start_time = time.perf_counter()
-    
-    try:
-        response = await call_next(request)
-        
-        # Intercept 405 Method Not Allowed responses and format them
-        if response.status_code == 405:
-            allowed_methods = response.headers.get("Allow", "GET, POST, PUT, DELETE, OPTIONS")
-            return JSONResponse(
-                status_code=405,
-                content={
-                    "error": {
-                        "code": "METHOD_NOT_ALLOWED",
-                        "message": f"Method {request.method} is not allowed for this endpoint",
-                        "details": {
-                            "method": request.method,
-                            "path": request.url.path,
-                            "allowed_methods": allowed_methods.split(", ") if isinstance(allowed_methods, str) else allowed_methods
-                        },
-                        "request_id": request_id
-                    }
-                },
-                headers={"Allow": allowed_methods, "X-Request-ID": request_id}
-            )
-        
-        # Calculate duration
-        duration_ms = (time.perf_counter() - start_time) * 1000
-        request.state.duration_ms = duration_ms
-        
-        # Add duration to response headers for debugging
-        response.headers["X-Request-ID"] = request_id
-        
-        return response
-    finally:
-        # Flush metrics and clear logging context after request
-        try:
-            flush_metrics()
-        except Exception as e:
-            # Don't fail request if metrics flush fails
-            logger.warning(
-                "Failed to flush metrics",
-                extra={'error': str(e)}
-            )
-        clear_request_context()
-
-
-# IP validation middleware (after auth, before rate limit)
-from src.middleware.ip_validation import ip_validation_middleware
-app.middleware("http")(ip_validation_middleware)
-
-# Rate limiting middleware (after IP validation, before endpoints)
-from src.middleware.rate_limit import rate_limit_middleware
-app.middleware("http")(rate_limit_middleware)
+# Request ID/logging context, IP allowlist and rate limiting in one pure ASGI
+# middleware (outermost, so it wraps the optional signature check above)
+from src.middleware.combined import RequestPipelineMiddleware
+app.add_middleware(RequestPipelineMiddleware)
 
 
 # Exception handlers
@@ -223,13 +192,21 @@ async def request_validation_handler(request: Request, exc: RequestValidationErr
     
     errors = []
     for error in exc.errors():
+        message, error_type = error["msg"], error["type"]
+        loc = error["loc"]
+        if loc and loc[0] == "body":
+            # Body fields keep the messages of the validators their constraints replaced
+            field = next((part for part in reversed(loc) if isinstance(part, str)), None)
+            legacy = LEGACY_VALIDATION_MESSAGES.get((field, error_type))
+            if legacy is not None:
+                message, error_type = f"Value error, {legacy}", "value_error"
         errors.append({
-            "field": ".".join(str(loc) for loc in error["loc"]),
-            "message": error["msg"],
-            "type": error["type"]
+            "field": ".".join(str(part) for part in loc),
+            "message": message,
+            "type": error_type
         })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": {
@@ -247,8 +224,6 @@ async def pydantic_validation_handler(request: Request, exc: PydanticValidationE
     """Handle Pydantic validation errors."""
     request_id = getattr(request.state, 'request_id', generate_uuid())
     
-    from src.utils import format_validation_error
-    
     # Get first error for main message
     first_error = exc.errors()[0]
     field_path = ".".join(str(loc) for loc in first_error["loc"])
@@ -271,7 +246,7 @@ async def pydantic_validation_handler(request: Request, exc: PydanticValidationE
         })
     details["validation_errors"] = all_errors
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content={
             "error": {
@@ -309,7 +284,7 @@ async def api_exception_handler(request: Request, exc: APIException):
         }
     )
     
-    response = JSONResponse(
+    response = ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -323,7 +298,6 @@ async def api_exception_handler(request: Request, exc: APIException):
     
     # Add rate limit headers for rate limit errors
     if exc.error_code == "RATE_LIMIT_EXCEEDED":
-        import time
         reset_timestamp = exc.details.get("reset_at", int(time.time()) + 60)
         retry_after = exc.details.get("retry_after", reset_timestamp - int(time.time()))
         response.headers["Retry-After"] = str(retry_after)
@@ -343,7 +317,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     if exc.status_code == 405:
         # Get allowed methods from the exception if available
         allowed_methods = getattr(exc, 'headers', {}).get('Allow', 'GET, POST, PUT, DELETE, OPTIONS')
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=405,
             content={
                 "error": {
@@ -360,7 +334,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             headers={"Allow": allowed_methods}
         )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -399,16 +373,10 @@ async def generic_exception_handler(request: Request, exc: Exception):
             }
         )
     
-    return JSONResponse(
+    return Response(
+        content=_INTERNAL_ERROR_TEMPLATE % orjson.dumps(request_id),
         status_code=500,
-        content={
-            "error": {
-                "code": "INTERNAL_ERROR",
-                "message": "Internal server error",
-                "details": {},
-                "request_id": request_id
-            }
-        }
+        media_type="application/json"
     )
 
 
@@ -419,7 +387,7 @@ async def root(request: Request):
     request_id = getattr(request.state, 'request_id', generate_uuid())
     base_url = str(request.base_url).rstrip('/')
     
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "name": "Zapier Triggers API",
             "version": "1.0.0",
@@ -442,21 +410,29 @@ async def root(request: Request):
 
 # Explicit OPTIONS handler for CORS preflight (backup to CORS middleware)
 # Note: This should match the CORS middleware configuration
-# Placed before routers to ensure it doesn't interfere with route matching
-@app.options("/{full_path:path}")
-async def options_handler(request: Request):
-    """Handle OPTIONS requests for CORS preflight."""
-    return JSONResponse(
-        content={},
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, DELETE, OPTIONS, PUT",
-            "Access-Control-Allow-Headers": "Content-Type, X-API-Key, X-Request-ID, X-Signature, X-Signature-Timestamp, X-Signature-Version",
-            "Access-Control-Expose-Headers": "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, Retry-After",
-            "Access-Control-Max-Age": "3600",
-        }
-    )
+# Served as a raw ASGI app, so OPTIONS requests skip FastAPI's endpoint
+# machinery; headers are encoded once
+_CORS_PREFLIGHT_RAW_HEADERS = [
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in _CORS_PREFLIGHT_HEADERS.items()
+]
+
+
+class _CorsPreflightApp:
+    """Empty 204 with CORS headers for bare OPTIONS requests."""
+    
+    async def __call__(self, scope, receive, send):
+        # Send a fresh header list each time: middleware such as CORSMiddleware
+        # edits it in place, which must not carry over to later requests
+        await send({
+            "type": "http.response.start",
+            "status": 204,
+            "headers": list(_CORS_PREFLIGHT_RAW_HEADERS),
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+
+app.add_route("/{full_path:path}", _CorsPreflightApp(), methods=["OPTIONS"], include_in_schema=False)
 
 # Include routers with /v1 prefix
 app.include_router(health.router, prefix="/v1", tags=["health"])
@@ -468,9 +444,25 @@ app.include_router(analytics.router, prefix="/v1", tags=["analytics"])
 
 
 # Startup event
+def _should_create_tables() -> bool:
+    """
+    Whether to create tables at startup.
+    
+    Deployed stages provision tables with template.yaml/deploy_aws.sh, so the
+    control-plane calls only run for local development (DynamoDB Local) or
+    when CREATE_TABLES_ON_STARTUP=1.
+    """
+    if os.getenv('CREATE_TABLES_ON_STARTUP') is not None:
+        return os.getenv('CREATE_TABLES_ON_STARTUP') == '1'
+    stage = os.getenv('STAGE', os.getenv('DEPLOYMENT_STAGE', 'prod'))
+    return stage == 'local' or bool(os.getenv('DYNAMODB_ENDPOINT_URL'))
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Create DynamoDB tables on application startup."""
+    """Create DynamoDB tables on startup for local development."""
+    if not _should_create_tables():
+        return
     try:
         create_tables()
         logger.info("Application startup complete - tables created", extra={'event': 'startup'})
@@ -482,15 +474,18 @@ async def startup_event():
         # Don't crash - tables might already exist
 
 
-# Lambda handler for AWS deployment
-mangum_handler = Mangum(app, lifespan="off")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending metrics and release shared HTTP connections on application shutdown."""
+    await asyncio.to_thread(flush_metrics)
+    await webhooks.close_http_client()
+
 
-def handler(event, context):
-    """Lambda handler function wrapper for Mangum."""
-    return mangum_handler(event, context)
+# Lambda handler for AWS deployment (the Mangum adapter is itself the handler)
+handler = Mangum(app, lifespan="off")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080, reload=True)
+    uvicorn.run("src.main:app", host="0.0.0.0", port=8080, reload=True, loop="uvloop", http="httptools")
 
@@ -1,3 +1,5 @@
 """Middleware modules for API"""
 
+# Paths exempt from IP allowlisting and rate limiting
+UNCHECKED_PATHS = frozenset(("/v1/health", "/openapi.json", "/docs", "/redoc"))
 
@@ -1,18 +1,38 @@
 """Chaos engineering middleware for failure injection"""
 
+import asyncio
 import os
 import random
+import orjson
 import logging
-from fastapi import Request, Response
+from fastapi import HTTPException, Request, Response
 from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
 
+def _chaos_error_response(error_code: int) -> Response:
+    """Build the JSON error response for an injected failure."""
+    return Response(
+        content=orjson.dumps({
+            "error": {
+                "code": "CHAOS_ERROR",
+                "message": f"Chaos: Injected {error_code} error",
+                "details": {},
+                "request_id": None
+            }
+        }),
+        status_code=error_code,
+        media_type="application/json"
+    )
+
+
 class ChaosMiddleware:
     """
     Middleware for injecting controlled failures for resilience testing.
     
+    The app only registers it when CHAOS_ENABLED=true.
+    
     Features:
     - Random delays
     - Random errors
@@ -27,6 +47,9 @@ class ChaosMiddleware:
         self.delay_rate = float(os.getenv('CHAOS_DELAY_RATE', '0.0'))  # 0.0 to 1.0
         self.max_delay_ms = int(os.getenv('CHAOS_MAX_DELAY_MS', '1000'))
         self.error_codes = [500, 503, 504]  # Error codes to inject
+        self._random = random.random
+        # Pre-rendered error responses, one per injectable status code
+        self._error_responses = {code: _chaos_error_response(code) for code in self.error_codes}
         
         if self.enabled:
             logger.warning(
@@ -49,24 +72,21 @@ class ChaosMiddleware:
             return
         
         # Inject delay
-        if random.random() < self.delay_rate:
+        if self._random() < self.delay_rate:
             delay_ms = random.randint(1, self.max_delay_ms)
-            import asyncio
             await asyncio.sleep(delay_ms / 1000.0)
-            logger.info(f"Chaos: Injected {delay_ms}ms delay")
+            logger.info("Chaos: Injected %sms delay", delay_ms)
         
         # Inject error
-        if random.random() < self.error_rate:
+        if self._random() < self.error_rate:
             error_code = random.choice(self.error_codes)
-            error_message = f"Chaos: Injected {error_code} error"
-            logger.warning(error_message)
+            logger.warning("Chaos: Injected %s error", error_code)
             
             # Send error response
-            response = Response(
-                content=f'{{"error": {{"code": "CHAOS_ERROR", "message": "{error_message}", "details": {{}}, "request_id": null}}}}',
-                status_code=error_code,
-                media_type="application/json"
-            )
+            response = self._error_responses.get(error_code)
+            if response is None:
+                # error_codes was changed after init
+                response = _chaos_error_response(error_code)
             await response(scope, receive, send)
             return
         
@@ -81,10 +101,12 @@ def inject_chaos_delay(delay_ms: int):
     Args:
         delay_ms: Delay in milliseconds
     """
+    delay_seconds = delay_ms / 1000.0
+    sleep = asyncio.sleep
+    
     def decorator(func: Callable):
         async def wrapper(*args, **kwargs):
-            import asyncio
-            await asyncio.sleep(delay_ms / 1000.0)
+            await sleep(delay_seconds)
             return await func(*args, **kwargs)
         return wrapper
     return decorator
@@ -99,7 +121,6 @@ def inject_chaos_error(error_code: int = 500):
     """
     def decorator(func: Callable):
         async def wrapper(*args, **kwargs):
-            from fastapi import HTTPException
             raise HTTPException(
                 status_code=error_code,
                 detail={"code": "CHAOS_ERROR", "message": "Injected error for testing"}
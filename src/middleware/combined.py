@@ -0,0 +1,151 @@
+"""Request pipeline middleware (request ID, IP allowlist, rate limiting)"""
+
+import time
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from src.exceptions import APIException
+from src.middleware import UNCHECKED_PATHS
+from src.middleware.ip_validation import resolve_client_ip, enforce_ip_allowlist
+from src.middleware.rate_limit import enforce_rate_limit, apply_rate_limit_headers, append_raw_rate_limit_headers
+from src.utils import generate_uuid, get_iso_timestamp
+from src.utils.logging import get_logger, set_request_context, clear_request_context
+
+logger = get_logger(__name__)
+
+_DEFAULT_ALLOWED_METHODS = "GET, POST, PUT, DELETE, OPTIONS"
+
+
+def _run_request_checks(api_key: str, client_ip: str):
+    """Enforce IP allowlist then rate limit; returns the rate limit headers."""
+    enforce_ip_allowlist(api_key, client_ip)
+    return enforce_rate_limit(api_key)
+
+
+def _method_not_allowed_response(method: str, path: str, allowed_methods: str, request_id: str) -> ORJSONResponse:
+    """Build the standard error envelope for a 405 response."""
+    return ORJSONResponse(
+        status_code=405,
+        content={
+            "error": {
+                "code": "METHOD_NOT_ALLOWED",
+                "message": f"Method {method} is not allowed for this endpoint",
+                "details": {
+                    "method": method,
+                    "path": path,
+                    "allowed_methods": allowed_methods.split(", ")
+                },
+                "request_id": request_id
+            }
+        },
+        headers={"Allow": allowed_methods}
+    )
+
+
+class RequestPipelineMiddleware:
+    """
+    Per-request pipeline as a single pure ASGI middleware.
+    
+    In order: assigns the request ID and logging context, enforces the API
+    key's IP allowlist, then its rate limit. Response headers (X-Request-ID,
+    X-RateLimit-*) are added on http.response.start, so no response object is
+    rebuilt and no extra task group is spawned per request as with
+    BaseHTTPMiddleware. Errors raised by the checks are rendered by the app's
+    APIException handler, since middleware sits outside ExceptionMiddleware.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Read the raw ASGI headers once (names are already lower-case)
+        headers = {}
+        for name, value in scope["headers"]:
+            headers.setdefault(name, value)
+        
+        if b"x-request-id" in headers:
+            raw_request_id = headers[b"x-request-id"]
+            request_id = raw_request_id.decode("latin-1")
+        else:
+            request_id = generate_uuid()
+            raw_request_id = request_id.encode("latin-1")
+        api_key = headers[b"x-api-key"].decode("latin-1") if b"x-api-key" in headers else None
+        path = scope["path"]
+        method = scope["method"]
+        
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        # Stamp the request once so handlers don't re-read the clock per item
+        state["received_at"] = get_iso_timestamp()
+        
+        # Set logging context
+        set_request_context(
+            request_id=request_id,
+            api_key=api_key,
+            endpoint=path,
+            method=method
+        )
+        
+        # Measure request duration
+        start_time = time.perf_counter()
+        rate_limit_headers = None
+        replaced = False
+        
+        async def send_wrapper(message):
+            nonlocal replaced
+            if replaced:
+                # Drop the body of a response that was replaced below
+                return
+            if message["type"] == "http.response.start":
+                state["duration_ms"] = (time.perf_counter() - start_time) * 1000
+                
+                # Reformat 405 Method Not Allowed responses
+                if message["status"] == 405:
+                    replaced = True
+                    response = _method_not_allowed_response(
+                        method, path, MutableHeaders(scope=message).get("Allow", _DEFAULT_ALLOWED_METHODS), request_id
+                    )
+                    response.headers["X-Request-ID"] = request_id
+                    if rate_limit_headers:
+                        apply_rate_limit_headers(response.headers, rate_limit_headers)
+                    await response(scope, receive, send)
+                    return
+                
+                # Append to a copy of the raw header list (a Response may reuse
+                # its list across requests) instead of going through MutableHeaders
+                raw_headers = list(message.get("headers", ()))
+                raw_headers.append((b"x-request-id", raw_request_id))
+                if rate_limit_headers:
+                    append_raw_rate_limit_headers(raw_headers, rate_limit_headers)
+                message["headers"] = raw_headers
+            await send(message)
+        
+        try:
+            if api_key and path not in UNCHECKED_PATHS:
+                try:
+                    client = scope.get("client")
+                    client_ip = resolve_client_ip(
+                        headers[b"x-forwarded-for"].decode("latin-1") if b"x-forwarded-for" in headers else None,
+                        headers[b"x-real-ip"].decode("latin-1") if b"x-real-ip" in headers else None,
+                        client[0] if client else None
+                    )
+                    # Settings lookups and the rate limit counter hit DynamoDB;
+                    # keep them off the event loop
+                    rate_limit_headers = await run_in_threadpool(_run_request_checks, api_key, client_ip)
+                except APIException as exc:
+                    handler = scope["app"].exception_handlers.get(APIException)
+                    if handler is None:
+                        raise
+                    response = await handler(Request(scope, receive), exc)
+                    await response(scope, receive, send_wrapper)
+                    return
+            
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Metrics are sent by a background thread; just clear logging context
+            clear_request_context()
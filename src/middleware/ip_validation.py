@@ -2,12 +2,19 @@
 
 import ipaddress
 import logging
+import socket
+from typing import NamedTuple, Optional, Union
 from fastapi import Request
 from src.database import get_allowed_ips_for_api_key
 from src.exceptions import ForbiddenError
+from src.middleware import UNCHECKED_PATHS
+from src.utils.api_key_cache import get_cached_allowed_ips
 
 logger = logging.getLogger(__name__)
 
+# Longest X-Forwarded-For prefix scanned for the client IP (an IPv6 address is at most 45 chars)
+_MAX_FORWARDED_FOR_SCAN = 256
+
 
 def validate_ip_format(ip: str) -> bool:
     """
@@ -43,131 +50,227 @@ def validate_cidr_format(cidr: str) -> bool:
         return False
 
 
-def ip_matches_allowlist(client_ip: str, allowed_ips: list) -> bool:
+class CompiledAllowlist(NamedTuple):
+    """
+    API key allowlist parsed once into exact addresses and networks.
+    
+    Networks are stored as (network_int, netmask_int) pairs so a match is an
+    integer mask-and-compare instead of an ipaddress containment check.
+    """
+    entries: tuple
+    exact: frozenset
+    networks_v4: tuple
+    networks_v6: tuple
+
+
+def compile_allowlist(allowed_ips: list) -> CompiledAllowlist:
+    """
+    Parse an allowlist into exact-match addresses and network objects.
+    
+    Invalid CIDR entries are logged and skipped.
+    
+    Args:
+        allowed_ips: List of allowed IPs/CIDR ranges
+    
+    Returns:
+        Compiled allowlist for ip_matches_allowlist
+    """
+    exact = set()
+    networks_v4 = []
+    networks_v6 = []
+    for allowed in allowed_ips:
+        if '/' in allowed:
+            # CIDR notation
+            try:
+                network = ipaddress.ip_network(allowed, strict=False)
+            except ValueError:
+                # Invalid CIDR format, skip
+                logger.warning("Invalid CIDR format in allowlist: %s", allowed)
+                continue
+            prefix = (int(network.network_address), int(network.netmask))
+            if network.version == 6:
+                networks_v6.append(prefix)
+            else:
+                networks_v4.append(prefix)
+        else:
+            # Exact match
+            exact.add(allowed)
+    
+    return CompiledAllowlist(
+        entries=tuple(allowed_ips),
+        exact=frozenset(exact),
+        networks_v4=tuple(networks_v4),
+        networks_v6=tuple(networks_v6)
+    )
+
+
+def ip_matches_allowlist(client_ip: str, allowed_ips: Union[list, CompiledAllowlist]) -> bool:
     """
     Check if client IP matches any allowed IP or CIDR range.
     
     Args:
         client_ip: Client IP address to check
-        allowed_ips: List of allowed IPs/CIDR ranges (empty list = allow all)
+        allowed_ips: List of allowed IPs/CIDR ranges, or a CompiledAllowlist
+            (empty = allow all)
         
     Returns:
         True if IP is allowed, False otherwise
     """
+    if not isinstance(allowed_ips, CompiledAllowlist):
+        allowed_ips = compile_allowlist(allowed_ips or [])
+    
     # Empty list means allow all (backward compatible)
-    if not allowed_ips:
+    if not allowed_ips.entries:
         return True
     
-    try:
-        client_ip_obj = ipaddress.ip_address(client_ip)
-        
-        for allowed in allowed_ips:
-            if '/' in allowed:
-                # CIDR notation
-                try:
-                    network = ipaddress.ip_network(allowed, strict=False)
-                    if client_ip_obj in network:
-                        return True
-                except ValueError:
-                    # Invalid CIDR format, skip
-                    logger.warning(f"Invalid CIDR format in allowlist: {allowed}")
-                    continue
-            else:
-                # Exact match
-                if client_ip == allowed:
-                    return True
-        
+    if client_ip in allowed_ips.exact:
+        return True
+    
+    if ':' in client_ip:
+        family, networks = socket.AF_INET6, allowed_ips.networks_v6
+    else:
+        family, networks = socket.AF_INET, allowed_ips.networks_v4
+    if not networks:
         return False
-    except ValueError:
+    
+    # inet_pton parses in C and rejects malformed addresses
+    try:
+        client_ip_int = int.from_bytes(socket.inet_pton(family, client_ip), 'big')
+    except (OSError, ValueError):
         # Invalid IP format
-        logger.warning(f"Invalid IP format: {client_ip}")
+        logger.warning("Invalid IP format: %s", client_ip)
         return False
+    
+    for network, netmask in networks:
+        if client_ip_int & netmask == network:
+            return True
+    return False
 
 
-def extract_client_ip(request: Request) -> str:
+def _load_compiled_allowlist(api_key: str) -> Optional[CompiledAllowlist]:
+    """Load an API key's allowlist and compile it for caching."""
+    allowed_ips = get_allowed_ips_for_api_key(api_key)
+    if allowed_ips is None:
+        return None
+    return compile_allowlist(allowed_ips)
+
+
+def resolve_client_ip(
+    forwarded_for: Optional[str],
+    real_ip: Optional[str],
+    client_host: Optional[str]
+) -> str:
     """
-    Extract client IP address from request headers.
-    Handles proxy headers (X-Forwarded-For, X-Real-IP).
+    Pick the client IP from proxy headers, falling back to the peer address.
     
     Args:
-        request: FastAPI request object
-        
+        forwarded_for: X-Forwarded-For header value
+        real_ip: X-Real-IP header value
+        client_host: Peer address of the connection
+    
     Returns:
         Client IP address string
     """
     # Check X-Forwarded-For header (first IP in chain is client)
-    forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
-        # Take first IP (client IP)
-        ip = forwarded_for.split(",")[0].strip()
+        # Take first IP (client IP); the header is client-controlled, so only
+        # look at a bounded prefix and don't split the whole hop list
+        ip = forwarded_for[:_MAX_FORWARDED_FOR_SCAN].partition(",")[0].strip()
         if ip:
             return ip
     
     # Check X-Real-IP header
-    real_ip = request.headers.get("X-Real-IP")
     if real_ip:
         ip = real_ip.strip()
         if ip:
             return ip
     
-    # Fall back to request.client.host
-    if request.client:
-        return request.client.host
-    
-    return "unknown"
+    # Fall back to the connection's peer address
+    return client_host or "unknown"
 
 
-async def ip_validation_middleware(request: Request, call_next):
+def extract_client_ip(request: Request) -> str:
     """
-    IP validation middleware.
+    Extract client IP address from request headers.
+    Handles proxy headers (X-Forwarded-For, X-Real-IP).
     
-    Checks if client IP is allowed based on API key's allowed_ips configuration.
-    Skips IP validation for health check endpoint.
+    Args:
+        request: FastAPI request object
+        
+    Returns:
+        Client IP address string
     """
-    # Skip health check endpoint
-    if request.url.path == "/v1/health":
-        return await call_next(request)
+    return resolve_client_ip(
+        request.headers.get("X-Forwarded-For"),
+        request.headers.get("X-Real-IP"),
+        request.client.host if request.client else None
+    )
+
+
+def enforce_ip_allowlist(api_key: str, client_ip: str) -> None:
+    """
+    Check the client IP against the API key's allowed_ips configuration.
     
-    # Get API key from request (already validated by auth middleware)
-    api_key = request.headers.get("X-API-Key")
-    if not api_key:
-        # No API key - auth middleware will handle this
-        return await call_next(request)
+    Fails open when the allowlist cannot be loaded.
     
+    Args:
+        api_key: API key from the request
+        client_ip: Client IP address
+    
+    Raises:
+        ForbiddenError: If the IP is not in a configured allowlist
+    """
     # Get allowed IPs for API key
     try:
-        allowed_ips = get_allowed_ips_for_api_key(api_key)
-        # None means not configured = allow all (backward compatible)
-        if allowed_ips is None:
-            return await call_next(request)
+        allowed_ips = get_cached_allowed_ips(api_key, _load_compiled_allowlist)
     except Exception as e:
         # On error, log and allow request (fail open)
-        logger.warning(f"Error getting allowed IPs for API key: {e}, allowing request")
-        return await call_next(request)
+        logger.warning("Error getting allowed IPs for API key: %s, allowing request", e)
+        return
     
-    # Extract client IP
-    client_ip = extract_client_ip(request)
+    # None means not configured = allow all (backward compatible)
+    if allowed_ips is None:
+        return
     
     # Validate IP against allowlist
     if not ip_matches_allowlist(client_ip, allowed_ips):
         # IP not allowed
         logger.warning(
-            f"IP address not allowed",
+            "IP address not allowed",
             extra={
                 'client_ip': client_ip,
-                'api_key': api_key[:10] + '...' if api_key else None,
-                'allowed_ips': allowed_ips
+                'api_key_prefix': api_key[:10] if api_key else None,
+                'allowed_ips': list(allowed_ips.entries)
             }
         )
         raise ForbiddenError(
             message="IP address not allowed",
             details={
                 "client_ip": client_ip,
-                "allowed_ips": allowed_ips
+                "allowed_ips": list(allowed_ips.entries)
             }
         )
+
+
+async def ip_validation_middleware(request: Request, call_next):
+    """
+    IP validation middleware.
+    
+    Checks if client IP is allowed based on API key's allowed_ips configuration.
+    Skips IP validation for health check and docs endpoints. The app runs the same check
+    inside RequestPipelineMiddleware; this wrapper is for standalone use.
+    """
+    # Skip health check and docs endpoints
+    if request.scope["path"] in UNCHECKED_PATHS:
+        return await call_next(request)
+    
+    # Get API key from request (already validated by auth middleware)
+    api_key = request.headers.get("X-API-Key")
+    if not api_key:
+        # No API key - auth middleware will handle this
+        return await call_next(request)
+    
+    enforce_ip_allowlist(api_key, extract_client_ip(request))
     
     # IP is allowed, continue
     return await call_next(request)
-
-
@@ -1,104 +1,243 @@
 """Rate limiting middleware"""
 
+import threading
 import time
 import logging
+from typing import Optional
 from fastapi import Request
 from botocore.exceptions import ClientError
-from src.database import check_rate_limit, increment_rate_limit, get_rate_limit_for_api_key
+from src.database import consume_rate_limit, get_rate_limit_for_api_key
 from src.exceptions import RateLimitExceededError
+from src.middleware import UNCHECKED_PATHS
+from src.utils.api_key_cache import get_cached_rate_limit
+from src.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+RATE_LIMIT_EXPOSE_HEADERS = "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, Retry-After"
+_RAW_RATE_LIMIT_EXPOSE_HEADERS = RATE_LIMIT_EXPOSE_HEADERS.encode("latin-1")
 
-async def rate_limit_middleware(request: Request, call_next):
+RATE_LIMIT_WINDOW_SECONDS = 60
+
+# Most of the per-window limit a worker claims from DynamoDB in one write and
+# then hands out locally. Claimed tokens count against the shared limit right
+# away, so the limit is never exceeded; a worker that goes idle leaves its
+# last lease unused for the rest of the window.
+LOCAL_LEASE_FRACTION = 0.02
+
+# Keep leases small enough that idle workers can't strand much of the limit:
+# a worker's first claim in a window is a single token, each lease is at most
+# double the previous one, and never more than this share of what is left
+LEASE_REMAINING_DIVISOR = 10
+
+
+class _LocalLease:
+    """Tokens this worker has already counted in DynamoDB for one window."""
+    
+    __slots__ = ("window_start", "tokens", "remaining", "size")
+    
+    def __init__(self, window_start: int, tokens: int, remaining: int, size: int):
+        self.window_start = window_start
+        self.tokens = tokens
+        self.remaining = remaining
+        self.size = size
+
+
+_local_leases = TTLCache(maxsize=10000, ttl=RATE_LIMIT_WINDOW_SECONDS)
+_local_leases_lock = threading.Lock()
+
+
+def _take_leased_token(api_key: str, window_start: int) -> Optional[int]:
     """
-    Rate limiting middleware.
+    Take a token from this worker's lease without touching DynamoDB.
     
-    Checks rate limit before processing request and adds rate limit headers to response.
-    Skips rate limiting for health check endpoint.
+    Returns:
+        Remaining requests in the window, or None if no leased token is left
     """
-    # Skip health check endpoint
-    if request.url.path == "/v1/health":
-        return await call_next(request)
+    with _local_leases_lock:
+        lease = _local_leases.get(api_key)
+        if lease is None or lease.window_start != window_start or lease.tokens <= 0:
+            return None
+        lease.tokens -= 1
+        lease.remaining = max(0, lease.remaining - 1)
+        return lease.remaining
+
+
+def _next_lease_size(api_key: str, window_start: int, rate_limit: int) -> int:
+    """Size of the next claim, growing only while this worker keeps using its leases."""
+    with _local_leases_lock:
+        lease = _local_leases.get(api_key)
+    if lease is None or lease.window_start != window_start:
+        return 1
+    max_lease = int(rate_limit * LOCAL_LEASE_FRACTION)
+    return max(1, min(max_lease, lease.size * 2, lease.remaining // LEASE_REMAINING_DIVISOR))
+
+
+def clear_local_rate_limits() -> None:
+    """Drop all locally leased rate limit tokens."""
+    with _local_leases_lock:
+        _local_leases.clear()
+
+
+def _rate_limit_exceeded(rate_limit: int, reset_timestamp: int, current_time: int) -> RateLimitExceededError:
+    """Build the 429 error for an exhausted window."""
+    return RateLimitExceededError(
+        message="Rate limit exceeded",
+        details={
+            "limit": rate_limit,
+            "reset_at": reset_timestamp,
+            "retry_after": reset_timestamp - current_time
+        }
+    )
+
+
+def enforce_rate_limit(api_key: str) -> Optional[dict]:
+    """
+    Check and count a request against the API key's rate limit.
     
-    # Get API key from request (already validated by auth middleware)
-    api_key = request.headers.get("X-API-Key")
-    if not api_key:
-        # No API key - auth middleware will handle this
-        return await call_next(request)
+    Requests are served from a small local lease of already-counted tokens when
+    one is available; otherwise a new lease is claimed from DynamoDB with a
+    single conditional update.
+    Fails open (returns None) on unexpected errors.
+    
+    Args:
+        api_key: API key from the request
     
+    Returns:
+        Rate limit response headers, or None if the check failed open
+    
+    Raises:
+        RateLimitExceededError: If the rate limit is exceeded
+    """
     # Get rate limit config for API key (default: 1000/min)
     try:
-        rate_limit = get_rate_limit_for_api_key(api_key)
+        rate_limit = get_cached_rate_limit(api_key, get_rate_limit_for_api_key)
     except Exception as e:
-        logger.warning(f"Error getting rate limit for API key: {e}, using default")
+        logger.warning("Error getting rate limit for API key: %s, using default", e)
         rate_limit = 1000
     
     # Calculate window start
     current_time = int(time.time())
-    window_seconds = 60
+    window_seconds = RATE_LIMIT_WINDOW_SECONDS
     window_start = (current_time // window_seconds) * window_seconds
+    reset_timestamp = window_start + window_seconds
+    
+    # Fast path: token already counted in DynamoDB by an earlier lease
+    remaining = _take_leased_token(api_key, window_start)
+    if remaining is not None:
+        return {
+            "X-RateLimit-Limit": str(rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset_timestamp),
+        }
     
-    # Check rate limit
     try:
-        allowed, remaining, reset_timestamp = check_rate_limit(api_key, rate_limit, window_seconds)
+        # Claim this request plus a lease for the next few in one conditional update
+        lease_size = _next_lease_size(api_key, window_start, rate_limit)
+        allowed, remaining, reset_timestamp = consume_rate_limit(
+            api_key, window_start, rate_limit, count=lease_size, window_seconds=window_seconds
+        )
+        if not allowed and lease_size > 1:
+            # Not enough left for a full lease; count just this request
+            lease_size = 1
+            allowed, remaining, reset_timestamp = consume_rate_limit(
+                api_key, window_start, rate_limit, window_seconds=window_seconds
+            )
         
         if not allowed:
             # Rate limit exceeded
-            retry_after = reset_timestamp - current_time
-            raise RateLimitExceededError(
-                message="Rate limit exceeded",
-                details={
-                    "limit": rate_limit,
-                    "reset_at": reset_timestamp,
-                    "retry_after": retry_after
-                }
-            )
-        
-        # Increment rate limit counter
-        try:
-            increment_rate_limit(api_key, window_start, rate_limit)
-            # Update remaining count after increment
-            remaining = max(0, remaining - 1)
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                # Rate limit exceeded during increment (race condition)
-                retry_after = reset_timestamp - current_time
-                raise RateLimitExceededError(
-                    message="Rate limit exceeded",
-                    details={
-                        "limit": rate_limit,
-                        "reset_at": reset_timestamp,
-                        "retry_after": retry_after
-                    }
-                )
-            # Other errors - log but allow request (fail open)
-            logger.warning(f"Error incrementing rate limit: {e}")
+            raise _rate_limit_exceeded(rate_limit, reset_timestamp, current_time)
         
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(rate_limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_timestamp)
-        
-        # Ensure CORS exposes these headers (in case CORS middleware didn't set it)
-        if "Access-Control-Expose-Headers" not in response.headers:
-            response.headers["Access-Control-Expose-Headers"] = "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, Retry-After"
-        else:
-            # Append if already exists
-            existing = response.headers.get("Access-Control-Expose-Headers", "")
-            if "X-RateLimit-Limit" not in existing:
-                response.headers["Access-Control-Expose-Headers"] = f"{existing}, X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, Retry-After"
-        
-        return response
+        # The rest of the lease is still available to this client
+        remaining += lease_size - 1
+        with _local_leases_lock:
+            _local_leases.set(api_key, _LocalLease(window_start, lease_size - 1, remaining, lease_size))
         
+        return {
+            "X-RateLimit-Limit": str(rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset_timestamp),
+        }
+    
     except RateLimitExceededError:
         # Re-raise rate limit errors
         raise
+    except ClientError as e:
+        # DynamoDB errors - log but allow request (fail open)
+        logger.warning("Error updating rate limit: %s", e)
+        return None
     except Exception as e:
         # On unexpected error, log and allow request (fail open)
-        logger.error(f"Unexpected error in rate limit middleware: {e}", exc_info=True)
-        return await call_next(request)
+        logger.error("Unexpected error in rate limit middleware: %s", e, exc_info=True)
+        return None
+
+
+def apply_rate_limit_headers(headers, rate_limit_headers: dict) -> None:
+    """
+    Add rate limit headers to a response and make sure CORS exposes them.
+    
+    Args:
+        headers: Mutable response headers
+        rate_limit_headers: Headers returned by enforce_rate_limit
+    """
+    for name, value in rate_limit_headers.items():
+        headers[name] = value
+    
+    # Ensure CORS exposes these headers (in case CORS middleware didn't set it)
+    existing = headers.get("Access-Control-Expose-Headers")
+    if not existing:
+        headers["Access-Control-Expose-Headers"] = RATE_LIMIT_EXPOSE_HEADERS
+    elif "X-RateLimit-Limit" not in existing:
+        # Append if already exists
+        headers["Access-Control-Expose-Headers"] = f"{existing}, {RATE_LIMIT_EXPOSE_HEADERS}"
+
+
+def append_raw_rate_limit_headers(raw_headers: list, rate_limit_headers: dict) -> None:
+    """
+    Raw ASGI header version of apply_rate_limit_headers.
+    
+    Args:
+        raw_headers: Header list of an http.response.start message
+        rate_limit_headers: Headers returned by enforce_rate_limit
+    """
+    for name, value in rate_limit_headers.items():
+        raw_headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+    
+    # Ensure CORS exposes these headers (in case CORS middleware didn't set it)
+    for i, (name, value) in enumerate(raw_headers):
+        if name == b"access-control-expose-headers":
+            if b"x-ratelimit-limit" not in value.lower():
+                raw_headers[i] = (name, value + b", " + _RAW_RATE_LIMIT_EXPOSE_HEADERS)
+            break
+    else:
+        raw_headers.append((b"access-control-expose-headers", _RAW_RATE_LIMIT_EXPOSE_HEADERS))
+
 
+async def rate_limit_middleware(request: Request, call_next):
+    """
+    Rate limiting middleware.
+    
+    Checks rate limit before processing request and adds rate limit headers to response.
+    Skips rate limiting for health check and docs endpoints. The app runs the same check
+    inside RequestPipelineMiddleware; this wrapper is for standalone use.
+    """
+    # Skip health check and docs endpoints
+    if request.scope["path"] in UNCHECKED_PATHS:
+        return await call_next(request)
+    
+    # Get API key from request (already validated by auth middleware)
+    api_key = request.headers.get("X-API-Key")
+    if not api_key:
+        # No API key - auth middleware will handle this
+        return await call_next(request)
+    
+    rate_limit_headers = enforce_rate_limit(api_key)
+    
+    # Process request
+    response = await call_next(request)
+    
+    # Add rate limit headers to response
+    if rate_limit_headers:
+        apply_rate_limit_headers(response.headers, rate_limit_headers)
+    
+    return response
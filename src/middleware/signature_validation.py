@@ -118,7 +118,7 @@ async def validate_request_signature(request: Request) -> bool:
             # No signing secret configured, allow request (backward compatible)
             return True
     except Exception as e:
-        logger.warning(f"Error getting signing secret: {e}")
+        logger.warning("Error getting signing secret: %s", e)
         # On error, allow request (fail open for backward compatibility)
         return True
     
@@ -157,9 +157,9 @@ async def signature_validation_middleware(request: Request, call_next):
         await validate_request_signature(request)
     except UnauthorizedError as e:
         # Return 401 for invalid signatures
-        from fastapi.responses import JSONResponse
+        from fastapi.responses import ORJSONResponse
         request_id = getattr(request.state, 'request_id', None)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=401,
             content={
                 "error": {
@@ -1,7 +1,41 @@
 """Pydantic models for request/response validation"""
 
-from typing import Literal, Optional
-from pydantic import BaseModel, ConfigDict, field_validator, Field
+import re
+from typing import Annotated, Literal, Optional
+from typing_extensions import TypedDict
+from pydantic import BaseModel, ConfigDict, field_validator, Field, StringConstraints, with_config
+
+
+# Webhook event type names; blank names and the length bound are rejected in pydantic-core
+_EventTypeName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=100)]
+
+
+# Messages the former field validators gave for checks that now run as
+# pydantic-core constraints, keyed by (field, constraint error type), so
+# request bodies keep failing with the same 422 text
+LEGACY_VALIDATION_MESSAGES = {
+    ('source', 'string_too_short'): "source field is required and cannot be empty",
+    ('event_type', 'string_too_short'): "event_type field is required and cannot be empty",
+    ('payload', 'too_short'): "payload cannot be empty",
+    ('events', 'too_short'): "events must contain at least one event type or '*'",
+    ('events', 'string_too_short'): "event types cannot be empty",
+    ('events', 'string_too_long'): "event types must be 100 characters or less",
+}
+
+
+# Absolute URL: scheme, "://", then a non-empty host part
+_URL_RE = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*)://[^/?#]')
+
+
+def _validate_webhook_url(v: str) -> str:
+    """Check a webhook URL is an absolute http(s) URL."""
+    v = v.strip()
+    match = _URL_RE.match(v)
+    if not match:
+        raise ValueError("url must be a valid HTTP/HTTPS URL")
+    if match.group(1).lower() not in ('http', 'https'):
+        raise ValueError("url must use http or https protocol")
+    return v
 
 
 class EventMetadata(BaseModel):
@@ -11,60 +45,29 @@ class EventMetadata(BaseModel):
     idempotency_key: Optional[str] = None
 
 
+# Checked entirely in pydantic-core, so bulk items need no per-item Python validator
+@with_config(ConfigDict(extra='allow', title='EventMetadata'))
+class _EventMetadataDict(TypedDict, total=False):
+    """Free-form event metadata; priority, if given, must be low, normal or high."""
+    priority: Literal["low", "normal", "high"]
+
+
 class EventCreate(BaseModel):
     """Request model for creating an event."""
-    model_config = ConfigDict(extra='forbid')  # Reject unknown fields
+    # Reject unknown fields; source/event_type are stripped before their
+    # length bounds are checked, so blank values are rejected too
+    model_config = ConfigDict(extra='forbid', str_strip_whitespace=True)
     
     source: str = Field(..., min_length=1, max_length=100, description="Event source identifier")
     event_type: str = Field(..., min_length=1, max_length=100, description="Event type identifier")
-    payload: dict = Field(..., description="Event payload (JSON object)")
-    metadata: Optional[dict] = Field(None, description="Optional event metadata")
-    
-    @field_validator('source')
-    @classmethod
-    def validate_source(cls, v: str) -> str:
-        """Validate source field."""
-        if not v or not v.strip():
-            raise ValueError("source field is required and cannot be empty")
-        if len(v) > 100:
-            raise ValueError("source field must be 100 characters or less")
-        return v.strip()
-    
-    @field_validator('event_type')
-    @classmethod
-    def validate_event_type(cls, v: str) -> str:
-        """Validate event_type field."""
-        if not v or not v.strip():
-            raise ValueError("event_type field is required and cannot be empty")
-        if len(v) > 100:
-            raise ValueError("event_type field must be 100 characters or less")
-        return v.strip()
-    
-    @field_validator('payload')
-    @classmethod
-    def validate_payload(cls, v: dict) -> dict:
-        """Validate payload field."""
-        if not isinstance(v, dict):
-            raise ValueError("payload must be a valid JSON object")
-        if len(v) == 0:
-            raise ValueError("payload cannot be empty")
-        return v
-    
-    @field_validator('metadata')
-    @classmethod
-    def validate_metadata(cls, v: Optional[dict]) -> Optional[dict]:
-        """Validate metadata field."""
-        if v is not None:
-            if not isinstance(v, dict):
-                raise ValueError("metadata must be a valid JSON object")
-            # Validate priority if provided
-            if 'priority' in v and v['priority'] not in ['low', 'normal', 'high']:
-                raise ValueError("metadata.priority must be one of: low, normal, high")
-        return v
+    payload: dict = Field(..., min_length=1, description="Event payload (JSON object)")
+    metadata: Optional[_EventMetadataDict] = Field(None, description="Optional event metadata")
 
 
 class EventResponse(BaseModel):
     """Response model for event creation."""
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     created_at: str
     status: str
@@ -74,6 +77,8 @@ class EventResponse(BaseModel):
 
 class EventDetailResponse(BaseModel):
     """Response model for event details (GET /events/{event_id})."""
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     created_at: str
     source: str
@@ -87,6 +92,8 @@ class EventDetailResponse(BaseModel):
 
 class InboxResponse(BaseModel):
     """Response model for inbox query."""
+    model_config = ConfigDict(frozen=True)
+    
     events: list[dict]
     pagination: dict
     request_id: str
@@ -94,6 +101,8 @@ class InboxResponse(BaseModel):
 
 class AckResponse(BaseModel):
     """Response model for event acknowledgment."""
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     status: str
     acknowledged_at: str
@@ -103,6 +112,8 @@ class AckResponse(BaseModel):
 
 class DeleteResponse(BaseModel):
     """Response model for event deletion."""
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     message: str
     request_id: str
@@ -131,12 +142,16 @@ class BulkEventDelete(BaseModel):
 
 class BulkItemError(BaseModel):
     """Error details for a failed bulk operation item."""
+    model_config = ConfigDict(frozen=True)
+    
     index: int = Field(..., description="Index of the failed item in the request")
     error: dict = Field(..., description="Error details (code, message, details)")
 
 
 class BulkEventResponse(BaseModel):
     """Response model for bulk event operations."""
+    model_config = ConfigDict(frozen=True)
+    
     successful: list[dict] = Field(..., description="Successfully processed items")
     failed: list[BulkItemError] = Field(default_factory=list, description="Failed items with error details")
     request_id: str
@@ -144,6 +159,8 @@ class BulkEventResponse(BaseModel):
 
 class ErrorDetail(BaseModel):
     """Error detail in error response."""
+    model_config = ConfigDict(frozen=True)
+    
     code: str
     message: str
     details: dict
@@ -152,11 +169,15 @@ class ErrorDetail(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Standardized error response."""
+    model_config = ConfigDict(frozen=True)
+    
     error: ErrorDetail
 
 
 class HealthResponse(BaseModel):
     """Response model for health check."""
+    model_config = ConfigDict(frozen=True)
+    
     status: str
     timestamp: str
     version: str
@@ -167,41 +188,14 @@ class WebhookCreate(BaseModel):
     model_config = ConfigDict(extra='forbid')
     
     url: str = Field(..., description="Webhook URL to receive events")
-    events: list[str] = Field(..., description="List of event types to subscribe to (use ['*'] for all events)")
+    events: list[_EventTypeName] = Field(..., min_length=1, description="List of event types to subscribe to (use ['*'] for all events)")
     secret: str = Field(..., min_length=16, description="Secret for HMAC signature verification (minimum 16 characters)")
     
     @field_validator('url')
     @classmethod
     def validate_url(cls, v: str) -> str:
         """Validate URL format."""
-        from urllib.parse import urlparse
-        parsed = urlparse(v)
-        if not parsed.scheme or not parsed.netloc:
-            raise ValueError("url must be a valid HTTP/HTTPS URL")
-        if parsed.scheme not in ['http', 'https']:
-            raise ValueError("url must use http or https protocol")
-        return v.strip()
-    
-    @field_validator('events')
-    @classmethod
-    def validate_events(cls, v: list[str]) -> list[str]:
-        """Validate events list."""
-        if not v or len(v) == 0:
-            raise ValueError("events must contain at least one event type or '*'")
-        for event in v:
-            if not event or not event.strip():
-                raise ValueError("event types cannot be empty")
-            if len(event) > 100:
-                raise ValueError("event types must be 100 characters or less")
-        return [e.strip() for e in v]
-    
-    @field_validator('secret')
-    @classmethod
-    def validate_secret(cls, v: str) -> str:
-        """Validate secret field."""
-        if not v or len(v) < 16:
-            raise ValueError("secret must be at least 16 characters long")
-        return v
+        return _validate_webhook_url(v)
 
 
 class WebhookUpdate(BaseModel):
@@ -209,7 +203,7 @@ class WebhookUpdate(BaseModel):
     model_config = ConfigDict(extra='forbid')
     
     url: Optional[str] = Field(None, description="Webhook URL to receive events")
-    events: Optional[list[str]] = Field(None, description="List of event types to subscribe to")
+    events: Optional[list[_EventTypeName]] = Field(None, min_length=1, description="List of event types to subscribe to")
     secret: Optional[str] = Field(None, min_length=16, description="Secret for HMAC signature verification")
     is_active: Optional[bool] = Field(None, description="Whether the webhook is active")
     
@@ -219,42 +213,13 @@ class WebhookUpdate(BaseModel):
         """Validate URL format."""
         if v is None:
             return v
-        from urllib.parse import urlparse
-        parsed = urlparse(v)
-        if not parsed.scheme or not parsed.netloc:
-            raise ValueError("url must be a valid HTTP/HTTPS URL")
-        if parsed.scheme not in ['http', 'https']:
-            raise ValueError("url must use http or https protocol")
-        return v.strip()
-    
-    @field_validator('events')
-    @classmethod
-    def validate_events(cls, v: Optional[list[str]]) -> Optional[list[str]]:
-        """Validate events list."""
-        if v is None:
-            return v
-        if len(v) == 0:
-            raise ValueError("events must contain at least one event type or '*'")
-        for event in v:
-            if not event or not event.strip():
-                raise ValueError("event types cannot be empty")
-            if len(event) > 100:
-                raise ValueError("event types must be 100 characters or less")
-        return [e.strip() for e in v]
-    
-    @field_validator('secret')
-    @classmethod
-    def validate_secret(cls, v: Optional[str]) -> Optional[str]:
-        """Validate secret field."""
-        if v is None:
-            return v
-        if len(v) < 16:
-            raise ValueError("secret must be at least 16 characters long")
-        return v
+        return _validate_webhook_url(v)
 
 
 class WebhookResponse(BaseModel):
     """Response model for webhook operations."""
+    model_config = ConfigDict(frozen=True)
+    
     webhook_id: str
     url: str
     events: list[str]
@@ -265,6 +230,8 @@ class WebhookResponse(BaseModel):
 
 class WebhookListResponse(BaseModel):
     """Response model for listing webhooks."""
+    model_config = ConfigDict(frozen=True)
+    
     webhooks: list[dict]
     pagination: Optional[dict] = None
     request_id: str
@@ -272,6 +239,8 @@ class WebhookListResponse(BaseModel):
 
 class WebhookTestResponse(BaseModel):
     """Response model for webhook test."""
+    model_config = ConfigDict(frozen=True)
+    
     webhook_id: str
     status: str
     status_code: Optional[int] = None
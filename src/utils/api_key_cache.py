@@ -0,0 +1,63 @@
+"""Short-lived cache of per-API-key settings read on every request"""
+
+from typing import Optional
+from src.utils.cache import TTLCache
+
+# Allowlists and rate limits change rarely; a change can take up to the TTL
+# to reach warm containers
+API_KEY_SETTINGS_TTL = 30.0
+
+_MISSING = object()
+
+_allowed_ips_cache = TTLCache(maxsize=10000, ttl=API_KEY_SETTINGS_TTL)
+_rate_limit_cache = TTLCache(maxsize=10000, ttl=API_KEY_SETTINGS_TTL)
+
+
+def get_cached_allowed_ips(api_key: str, loader) -> Optional[list]:
+    """
+    Get an API key's allowed IPs, loading and caching them on a miss.
+    
+    None ("not configured, allow all") is cached like any other value.
+    
+    Args:
+        api_key: API key
+        loader: Function that reads the allowed IPs for the key
+    
+    Returns:
+        List of allowed IPs/CIDR ranges, or None if not configured
+    """
+    allowed_ips = _allowed_ips_cache.get(api_key, _MISSING)
+    if allowed_ips is _MISSING:
+        allowed_ips = loader(api_key)
+        _allowed_ips_cache.set(api_key, allowed_ips)
+    return allowed_ips
+
+
+def get_cached_rate_limit(api_key: str, loader) -> int:
+    """
+    Get an API key's rate limit, loading and caching it on a miss.
+    
+    Args:
+        api_key: API key
+        loader: Function that reads the rate limit for the key
+    
+    Returns:
+        Rate limit (requests per minute)
+    """
+    rate_limit = _rate_limit_cache.get(api_key, _MISSING)
+    if rate_limit is _MISSING:
+        rate_limit = loader(api_key)
+        _rate_limit_cache.set(api_key, rate_limit)
+    return rate_limit
+
+
+def invalidate_api_key(api_key: str) -> None:
+    """Drop cached settings for an API key (e.g. after rotation)."""
+    _allowed_ips_cache.pop(api_key)
+    _rate_limit_cache.pop(api_key)
+
+
+def clear_api_key_cache() -> None:
+    """Drop all cached API key settings."""
+    _allowed_ips_cache.clear()
+    _rate_limit_cache.clear()
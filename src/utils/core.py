@@ -0,0 +1,277 @@
+"""Utility functions for timestamps, UUIDs, cursors, and validation"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+
+
+# (second, "YYYY-MM-DDTHH:MM:SS") of the last timestamp; swapped as one tuple
+_timestamp_prefix = (None, '')
+
+
+def get_iso_timestamp() -> str:
+    """
+    Generate ISO 8601 UTC timestamp with Z suffix and microseconds.
+    
+    The date/time prefix is formatted once per second; only the
+    microseconds are formatted on every call.
+    
+    Returns:
+        ISO 8601 formatted timestamp (e.g., "2024-01-01T12:00:00.123456Z")
+    """
+    global _timestamp_prefix
+    seconds, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_second, prefix = _timestamp_prefix
+    if seconds != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        _timestamp_prefix = (seconds, prefix)
+    return f"{prefix}.{micros:06d}Z"
+
+
+def _format_uuid4(raw: bytes) -> str:
+    """Format 16 random bytes as a UUID v4 string without building a UUID object."""
+    raw = bytearray(raw)
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def generate_uuid() -> str:
+    """
+    Generate a lowercase UUID v4 string.
+    
+    Returns:
+        Lowercase UUID string (e.g., "550e8400-e29b-41d4-a716-446655440000")
+    """
+    return _format_uuid4(os.urandom(16))
+
+
+def generate_uuids(count: int) -> list[str]:
+    """
+    Generate several lowercase UUID v4 strings from a single random read.
+    
+    Args:
+        count: Number of UUIDs to generate
+        
+    Returns:
+        List of lowercase UUID strings
+    """
+    raw = os.urandom(16 * count)
+    return [_format_uuid4(raw[i:i + 16]) for i in range(0, 16 * count, 16)]
+
+
+def get_request_timestamp(request: Any) -> str:
+    """
+    Get the ISO 8601 timestamp stamped on the request by middleware.
+    
+    Falls back to the current time when the request wasn't stamped.
+    
+    Args:
+        request: Incoming request (or None)
+        
+    Returns:
+        ISO 8601 formatted timestamp
+    """
+    return getattr(getattr(request, 'state', None), 'received_at', None) or get_iso_timestamp()
+
+
+def json_default(value: Any) -> Any:
+    """
+    orjson default hook for DynamoDB items.
+    
+    Decimals serialize as strings, matching how the Pydantic response
+    models render them.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def compute_etag(data: Any) -> str:
+    """
+    Compute a strong ETag for a JSON-serializable response body.
+    
+    Keys are sorted so the tag only depends on content, and DynamoDB
+    Decimals are hashed by their string form.
+    
+    Args:
+        data: Response content, excluding per-request fields like request_id,
+            or already-serialized bytes of that content
+        
+    Returns:
+        Quoted ETag value (e.g., '"3f2a..."')
+    """
+    if not isinstance(data, bytes):
+        data = orjson.dumps(data, default=json_default, option=orjson.OPT_SORT_KEYS)
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header value against an ETag.
+    
+    Args:
+        if_none_match: Raw If-None-Match header value (may list several tags)
+        etag: Current ETag of the resource
+        
+    Returns:
+        True if the client's cached copy is current
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _decimal_to_number(value: Any) -> Any:
+    """orjson default hook: encode DynamoDB Decimals as JSON numbers."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode_cursor(key: dict[str, Any]) -> str:
+    """
+    Encode DynamoDB LastEvaluatedKey as URL-safe base64 JSON without padding.
+    
+    Never raises for DynamoDB key values: strings encode directly and
+    numeric keys (Decimal, e.g. is_active on the webhooks index) encode as
+    JSON numbers so decode_cursor restores them as numbers. The URL-safe
+    alphabet lets clients pass the cursor in a query string as-is.
+    
+    Args:
+        key: DynamoDB LastEvaluatedKey dictionary
+        
+    Returns:
+        URL-safe base64-encoded JSON string
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(key, default=_decimal_to_number)).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode base64-encoded cursor to DynamoDB LastEvaluatedKey.
+    
+    Accepts URL-safe cursors with or without padding as well as cursors
+    issued in the standard base64 alphabet.
+    
+    Args:
+        cursor: Base64-encoded JSON string
+        
+    Returns:
+        DynamoDB LastEvaluatedKey dictionary
+        
+    Raises:
+        ValueError: If cursor is invalid
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        return json.loads(decoded, parse_float=Decimal)
+    except (base64.binascii.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor format: {e}")
+
+
+def validate_payload_size(payload: dict, max_size: int = 400 * 1024) -> None:
+    """
+    Validate that JSON payload size doesn't exceed maximum.
+    
+    Args:
+        payload: Dictionary to validate
+        max_size: Maximum size in bytes (default: 400KB)
+        
+    Raises:
+        ValueError: If payload exceeds maximum size
+    """
+    # orjson encodes straight to UTF-8 bytes (no intermediate str)
+    try:
+        payload_size = len(orjson.dumps(payload))
+    except orjson.JSONEncodeError:
+        # e.g. integers wider than 64 bits, which orjson doesn't encode
+        payload_size = len(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    
+    if payload_size > max_size:
+        raise ValueError(
+            f"Payload size ({payload_size} bytes) exceeds maximum ({max_size} bytes)"
+        )
+
+
+def format_validation_error(field: str, issue: str, value: Any = None) -> dict:
+    """
+    Format validation error with context and suggestion.
+    
+    Args:
+        field: Field name that failed validation
+        issue: Description of the validation issue
+        value: Optional field value that failed
+        
+    Returns:
+        Details dictionary for error response
+    """
+    details = {
+        "field": field,
+        "issue": issue
+    }
+    
+    if value is not None:
+        details["value"] = value
+    
+    # Add suggestion based on issue type
+    if "required" in issue.lower():
+        details["suggestion"] = f"Include '{field}' in your request body"
+    elif "empty" in issue.lower():
+        details["suggestion"] = f"Provide a non-empty value for '{field}'"
+    elif "length" in issue.lower() or "size" in issue.lower():
+        details["suggestion"] = f"Ensure '{field}' meets the length/size requirements"
+    else:
+        details["suggestion"] = f"Check that '{field}' is valid"
+    
+    return details
+
+
+def format_not_found_error(resource_type: str, resource_id: str) -> dict:
+    """
+    Format not found error with context and suggestion.
+    
+    Args:
+        resource_type: Type of resource (e.g., "Event")
+        resource_id: ID of the resource that wasn't found
+        
+    Returns:
+        Details dictionary for error response
+    """
+    return {
+        "resource_type": resource_type,
+        resource_type.lower() + "_id": resource_id,
+        "suggestion": f"Verify the {resource_type.lower()} ID is correct and the {resource_type.lower()} exists"
+    }
+
+
+def format_conflict_error(resource_type: str, resource_id: str, context: dict) -> dict:
+    """
+    Format conflict error with context and suggestion.
+    
+    Args:
+        resource_type: Type of resource (e.g., "Event")
+        resource_id: ID of the resource in conflict
+        context: Additional context (e.g., current_status, acknowledged_at)
+        
+    Returns:
+        Details dictionary for error response
+    """
+    details = {
+        resource_type.lower() + "_id": resource_id,
+        **context,
+        "suggestion": f"This {resource_type.lower()} has already been processed"
+    }
+    return details
+
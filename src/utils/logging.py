@@ -6,6 +6,7 @@ import traceback
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 import contextvars
+import orjson
 
 # Context variable for request context (thread-safe for async)
 request_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar(
@@ -46,8 +47,16 @@ class JSONFormatter(logging.Formatter):
         if record.stack_info:
             log_data['stack_info'] = record.stack_info
         
-        # Ensure all values are JSON serializable
-        return json.dumps(log_data, default=str, ensure_ascii=False)
+        # Ensure all values are JSON serializable (orjson encodes straight to
+        # UTF-8; fall back for values it rejects, e.g. integers over 64 bits)
+        try:
+            return orjson.dumps(log_data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
+            return json.dumps(log_data, default=str, ensure_ascii=False)
+
+
+# Formatters are stateless, so every handler shares one instance
+JSON_FORMATTER = JSONFormatter()
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -65,13 +74,73 @@ def get_logger(name: str) -> logging.Logger:
     # Only add handler if it doesn't already have one
     if not logger.handlers:
         handler = logging.StreamHandler()
-        handler.setFormatter(JSONFormatter())
+        handler.setFormatter(JSON_FORMATTER)
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
     
     return logger
 
 
+class BoundLogger:
+    """
+    Logger wrapper carrying a bound set of structured fields.
+    
+    Bind the fields shared by every log line in a handler once, then pass
+    only the per-call fields as keyword arguments. Nothing is merged or
+    formatted when the level is disabled.
+    """
+    
+    __slots__ = ('_logger', '_context')
+    
+    def __init__(self, logger: logging.Logger, context: Dict[str, Any]):
+        self._logger = logger
+        self._context = context
+    
+    def bind(self, **fields: Any) -> 'BoundLogger':
+        """Return a new BoundLogger with additional bound fields."""
+        return BoundLogger(self._logger, {**self._context, **fields})
+    
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether the underlying logger emits at the given level."""
+        return self._logger.isEnabledFor(level)
+    
+    def debug(self, msg: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, msg, fields)
+    
+    def info(self, msg: str, **fields: Any) -> None:
+        self._log(logging.INFO, msg, fields)
+    
+    def warning(self, msg: str, **fields: Any) -> None:
+        self._log(logging.WARNING, msg, fields)
+    
+    def error(self, msg: str, **fields: Any) -> None:
+        self._log(logging.ERROR, msg, fields)
+    
+    def exception(self, msg: str, **fields: Any) -> None:
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+    
+    def _log(self, level: int, msg: str, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        extra = {**self._context, **fields} if fields else self._context
+        # JSONFormatter reads structured fields from record.extra
+        self._logger.log(level, msg, extra={'extra': extra}, exc_info=exc_info, stacklevel=3)
+
+
+def bind_logger(logger: logging.Logger, **fields: Any) -> BoundLogger:
+    """
+    Bind structured fields to a logger.
+    
+    Args:
+        logger: Logger from get_logger()
+        **fields: Fields included in every record logged through the result
+        
+    Returns:
+        BoundLogger instance
+    """
+    return BoundLogger(logger, fields)
+
+
 def set_request_context(
     request_id: Optional[str] = None,
     api_key: Optional[str] = None,
@@ -1,15 +1,24 @@
 """CloudWatch metrics helper for structured metric emission"""
 
+import itertools
 import os
+import queue
+import sys
+import threading
 import time
-from datetime import datetime, timezone
 import boto3
+import orjson
 from typing import Dict, List, Optional, Any
-from collections import defaultdict
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Longest a metric waits in the queue for its batch to fill up
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# Metrics queued beyond this are dropped rather than growing memory
+MAX_QUEUED_METRICS = 10_000
+
 # CloudWatch client (lazy initialization)
 _cloudwatch_client = None
 
@@ -26,18 +35,32 @@ def _get_cloudwatch_client():
 class CloudWatchMetrics:
     """Helper class for emitting CloudWatch metrics with batching."""
     
-    def __init__(self, namespace: str = 'TriggersAPI/Production'):
+    def __init__(self, namespace: str = 'TriggersAPI/Production', backend: str = 'api', sample_n: int = 1):
         """
         Initialize CloudWatch metrics helper.
         
         Args:
             namespace: CloudWatch metric namespace
+            backend: 'api' to send metrics with PutMetricData, 'emf' to
+                write Embedded Metric Format lines to stdout for CloudWatch
+                Logs to extract (no boto3 client or flusher thread), or
+                'none' to drop all metrics
+            sample_n: Record latency and total request count for one request
+                in every sample_n; the count is scaled back up by sample_n.
+                Success and error counts are never sampled.
         """
         self.namespace = namespace
-        self.client = _get_cloudwatch_client()
-        self._latency_values: Dict[str, List[float]] = defaultdict(list)
-        self._batch: List[Dict[str, Any]] = []
+        self.backend = backend
+        self.enabled = backend != 'none'
+        self.client = _get_cloudwatch_client() if backend == 'api' else None
+        self.sample_n = max(1, sample_n)
+        self._sample_counter = itertools.count()
+        # Metrics are queued here and sent by a background thread, so no
+        # request waits on PutMetricData
+        self._queue: queue.Queue = queue.Queue(maxsize=MAX_QUEUED_METRICS)
         self._batch_size_limit = 20  # CloudWatch limit
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_lock = threading.Lock()
     
     def record_latency(
         self,
@@ -55,16 +78,10 @@ class CloudWatchMetrics:
             duration_ms: Request duration in milliseconds
             percentiles: List of percentiles to calculate (default: [50, 95, 99])
         """
+        if not self.take_sample():
+            return
         try:
-            # Store latency value for percentile calculation
-            key = f"{method}:{endpoint}"
-            self._latency_values[key].append(duration_ms)
-            
-            # Calculate percentiles if we have enough data or at batch flush
-            # For now, we'll emit the raw value and calculate percentiles on CloudWatch side
-            # or flush when batch is full
-            
-            # Emit raw latency value
+            # Emit raw latency value; CloudWatch calculates the percentiles
             self._add_metric(
                 MetricName='ApiLatency',
                 Value=duration_ms,
@@ -161,10 +178,12 @@ class CloudWatchMetrics:
             endpoint: Endpoint path
             method: HTTP method
         """
+        if not self.take_sample():
+            return
         try:
             self._add_metric(
                 MetricName='ApiRequestCount',
-                Value=1,
+                Value=self.sample_n,
                 Unit='Count',
                 Dimensions=[
                     {'Name': 'Endpoint', 'Value': endpoint},
@@ -203,6 +222,12 @@ class CloudWatchMetrics:
                 }
             )
     
+    def take_sample(self) -> bool:
+        """Return True for one call in every sample_n (always True without sampling)."""
+        if not self.enabled:
+            return False
+        return self.sample_n == 1 or next(self._sample_counter) % self.sample_n == 0
+    
     def _add_metric(
         self,
         MetricName: str,
@@ -211,7 +236,7 @@ class CloudWatchMetrics:
         Dimensions: List[Dict[str, str]]
     ) -> None:
         """
-        Add metric to batch.
+        Queue metric for the background flusher.
         
         Args:
             MetricName: CloudWatch metric name
@@ -219,58 +244,229 @@ class CloudWatchMetrics:
             Unit: Metric unit (e.g., 'Count', 'Milliseconds')
             Dimensions: Metric dimensions
         """
+        if not self.enabled:
+            return
         metric_data = {
             'MetricName': MetricName,
             'Value': Value,
             'Unit': Unit,
             'Dimensions': Dimensions,
-            'Timestamp': datetime.now(timezone.utc),
+            'Timestamp': time.time(),  # epoch seconds; boto3 accepts numbers
         }
         
-        self._batch.append(metric_data)
+        self._enqueue(metric_data)
+    
+    def _add_metrics(self, metrics: List[tuple]) -> None:
+        """
+        Queue several metrics with one shared timestamp.
         
-        # Flush if batch is full
-        if len(self._batch) >= self._batch_size_limit:
-            self.flush()
+        Args:
+            metrics: List of (MetricName, Value, Unit, Dimensions) tuples
+        """
+        if not self.enabled:
+            return
+        timestamp = time.time()
+        for name, value, unit, dimensions in metrics:
+            self._enqueue({
+                'MetricName': name,
+                'Value': value,
+                'Unit': unit,
+                'Dimensions': dimensions,
+                'Timestamp': timestamp,
+            })
     
-    def flush(self) -> None:
-        """Flush batched metrics to CloudWatch."""
-        if not self._batch:
+    def _enqueue(self, metric_data: Dict[str, Any]) -> None:
+        """Queue a metric for the background flusher, starting it if needed."""
+        if self.backend == 'emf':
+            self._write_emf(metric_data)
             return
-        
+        if self._flusher is None:
+            self._start_flusher()
+        try:
+            self._queue.put_nowait(metric_data)
+        except queue.Full:
+            # CloudWatch is falling behind; drop rather than block the request
+            pass
+    
+    def _write_emf(self, metric_data: Dict[str, Any]) -> None:
+        """Write a metric to stdout as one CloudWatch Embedded Metric Format line."""
+        name = metric_data['MetricName']
+        dimensions = metric_data['Dimensions']
+        document = {
+            '_aws': {
+                'Timestamp': int(metric_data['Timestamp'] * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [[d['Name'] for d in dimensions]],
+                    'Metrics': [{'Name': name, 'Unit': metric_data['Unit']}],
+                }],
+            },
+            name: metric_data['Value'],
+        }
+        for d in dimensions:
+            document[d['Name']] = d['Value']
+        sys.stdout.write(orjson.dumps(document).decode() + '\n')
+    
+    def _start_flusher(self) -> None:
+        """Start the daemon thread that sends queued metrics."""
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name='cloudwatch-metrics', daemon=True
+                )
+                self._flusher.start()
+    
+    def _run_flusher(self) -> None:
+        """Send queued metrics in batches of up to 20, waiting at most FLUSH_INTERVAL_SECONDS to fill one."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+            while len(batch) < self._batch_size_limit:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._send(batch)
+    
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        """Send metrics to CloudWatch and mark them done in the queue."""
         try:
             # CloudWatch PutMetricData accepts up to 20 metrics per call
             # Split batch into chunks of 20
-            chunk_size = 20
-            for i in range(0, len(self._batch), chunk_size):
-                chunk = self._batch[i:i + chunk_size]
-                
-                # Convert timestamps to datetime objects
-                for metric in chunk:
-                    if 'Timestamp' in metric:
-                        metric['Timestamp'] = datetime.fromtimestamp(
-                            metric['Timestamp'], tz=timezone.utc
-                        )
-                
+            chunk_size = self._batch_size_limit
+            for i in range(0, len(batch), chunk_size):
                 self.client.put_metric_data(
                     Namespace=self.namespace,
-                    MetricData=chunk
+                    MetricData=batch[i:i + chunk_size]
                 )
             
-            self._batch.clear()
-            
         except Exception as e:
+            # A failed batch is dropped rather than retried to prevent memory buildup
             logger.error(
                 "Failed to flush metrics to CloudWatch",
                 extra={
                     'operation': 'flush_metrics',
                     'error': str(e),
                     'error_type': type(e).__name__,
-                    'batch_size': len(self._batch),
+                    'batch_size': len(batch),
                 }
             )
-            # Clear batch on error to prevent memory buildup
-            self._batch.clear()
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+    
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Send queued metrics now and wait for in-flight batches (e.g. at shutdown).
+        
+        Args:
+            timeout: Maximum seconds to wait for the background flusher
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._send(batch)
+        
+        # Wait for a batch the flusher thread already took off the queue
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._queue.all_tasks_done.wait(remaining):
+                    break
+
+
+class MetricHandle:
+    """
+    Metric recorder bound to a single endpoint/method pair.
+    
+    Dimension lists are built once when the handle is created so the
+    per-request cost is a single method call, mirroring the module-level
+    record_* helpers without rebuilding dimensions every time.
+    """
+    
+    def __init__(self, endpoint: str, method: str):
+        """
+        Initialize bound metric handle.
+        
+        Args:
+            endpoint: Endpoint path (e.g., '/v1/events')
+            method: HTTP method (e.g., 'POST')
+        """
+        self.endpoint = endpoint
+        self.method = method
+        self._dimensions = [
+            {'Name': 'Endpoint', 'Value': endpoint},
+            {'Name': 'Method', 'Value': method},
+        ]
+        self._success_dimensions = self._dimensions + [{'Name': 'Status', 'Value': 'success'}]
+        self._failure_dimensions = self._dimensions + [{'Name': 'Status', 'Value': 'error'}]
+        self._error_dimensions: Dict[str, List[Dict[str, str]]] = {}
+    
+    def request_success(self, duration_ms: Optional[float] = None) -> None:
+        """Record latency (if known), success and request count in one batch append."""
+        metrics = [('ApiRequestCount', 1, 'Count', self._success_dimensions)]
+        self._add_sampled(metrics, duration_ms)
+        self._emit_many(metrics, 'record_request')
+    
+    def request_error(self, error_type: str, duration_ms: Optional[float] = None) -> None:
+        """Record latency (if known), error and request count in one batch append."""
+        dimensions = self._error_dimensions.get(error_type)
+        if dimensions is None:
+            dimensions = self._dimensions + [{'Name': 'ErrorType', 'Value': error_type}]
+            self._error_dimensions[error_type] = dimensions
+        metrics = [
+            ('ApiErrorRate', 1, 'Count', dimensions),
+            ('ApiRequestCount', 1, 'Count', self._failure_dimensions),
+        ]
+        self._add_sampled(metrics, duration_ms)
+        self._emit_many(metrics, 'record_request')
+    
+    def _add_sampled(self, metrics: List[tuple], duration_ms: Optional[float]) -> None:
+        """Append latency (if known) and request count when this request is sampled."""
+        instance = get_metrics()
+        if not instance.take_sample():
+            return
+        metrics.append(('ApiRequestCount', instance.sample_n, 'Count', self._dimensions))
+        if duration_ms:
+            metrics.insert(0, ('ApiLatency', duration_ms, 'Milliseconds', self._dimensions))
+    
+    def _emit_many(self, metrics: List[tuple], operation: str) -> None:
+        """Add several metrics to the global batch, logging instead of raising on failure."""
+        try:
+            get_metrics()._add_metrics(metrics)
+        except Exception as e:
+            logger.warning(
+                "Failed to record metrics",
+                extra={
+                    'operation': operation,
+                    'error': str(e),
+                }
+            )
+
+
+def bind(endpoint: str, method: str) -> MetricHandle:
+    """
+    Create a metric handle bound to an endpoint and method.
+    
+    Intended to be called once at import time, e.g.
+    ``EVENTS_POST = bind('/v1/events', 'POST')``.
+    
+    Args:
+        endpoint: Endpoint path
+        method: HTTP method
+        
+    Returns:
+        MetricHandle instance
+    """
+    return MetricHandle(endpoint, method)
 
 
 # Global metrics instance
@@ -287,7 +483,11 @@ def get_metrics() -> CloudWatchMetrics:
     global _metrics_instance
     if _metrics_instance is None:
         namespace = os.getenv('CLOUDWATCH_NAMESPACE', 'TriggersAPI/Production')
-        _metrics_instance = CloudWatchMetrics(namespace=namespace)
+        # Lambda ships stdout to CloudWatch Logs, which extracts EMF metrics
+        # for free; elsewhere metrics are sent with PutMetricData
+        backend = os.getenv('METRICS_BACKEND') or ('emf' if os.getenv('AWS_LAMBDA_FUNCTION_NAME') else 'api')
+        sample_n = int(os.getenv('METRICS_SAMPLE_N', '1'))
+        _metrics_instance = CloudWatchMetrics(namespace=namespace, backend=backend, sample_n=sample_n)
     return _metrics_instance
 
 
@@ -3,8 +3,16 @@
 import hmac
 import hashlib
 import base64
+import functools
+import os
 import time
-from typing import Optional
+from typing import Optional, Union
+
+# Signature algorithm for outbound webhook payloads ('sha256' or 'blake2b')
+WEBHOOK_SIGNATURE_ALGORITHM = os.getenv('WEBHOOK_SIGNATURE_ALGORITHM', 'sha256').lower()
+
+# Body hash of every request without a body (e.g. GET, DELETE)
+_EMPTY_BODY_SHA256 = hashlib.sha256(b'').hexdigest()
 
 
 def hash_request_body(body: Optional[bytes]) -> str:
@@ -18,10 +26,16 @@ def hash_request_body(body: Optional[bytes]) -> str:
         Hex-encoded SHA256 hash
     """
     if not body:
-        body = b''
+        return _EMPTY_BODY_SHA256
     return hashlib.sha256(body).hexdigest()
 
 
+@functools.lru_cache(maxsize=256)
+def _hmac_template(secret_key: str):
+    """HMAC-SHA256 object keyed with secret_key; copy() it instead of re-keying."""
+    return hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+
+
 def generate_request_signature(
     method: str,
     path: str,
@@ -57,12 +71,10 @@ def generate_request_signature(
     # Build signature string
     signature_string = f"{method}\n{path}\n{query_string}\n{timestamp}\n{body_hash}"
     
-    # Calculate HMAC-SHA256
-    signature = hmac.new(
-        secret_key.encode(),
-        signature_string.encode(),
-        hashlib.sha256
-    ).digest()
+    # Calculate HMAC-SHA256 from the pre-keyed state for this secret
+    mac = _hmac_template(secret_key).copy()
+    mac.update(signature_string.encode())
+    signature = mac.digest()
     
     # Return base64-encoded signature
     return base64.b64encode(signature).decode()
@@ -108,3 +120,33 @@ def sign_request(
         'X-Signature-Version': 'v1'
     }
 
+
+def sign_webhook_payload(payload: bytes, secret: Union[str, bytes], algorithm: Optional[str] = None) -> str:
+    """
+    Sign an outbound webhook payload.
+    
+    'sha256' is HMAC-SHA256 (the default receivers verify). 'blake2b' uses
+    BLAKE2b's native keyed mode, which needs no HMAC construction and is
+    faster on large payloads; secrets longer than the 64-byte key limit are
+    hashed down first.
+    
+    Args:
+        payload: Exact payload bytes that are sent
+        secret: Webhook secret (pass bytes to skip re-encoding per call)
+        algorithm: 'sha256' or 'blake2b' (default: WEBHOOK_SIGNATURE_ALGORITHM)
+        
+    Returns:
+        Hex-encoded signature
+        
+    Raises:
+        ValueError: If the algorithm is not supported
+    """
+    algorithm = algorithm or WEBHOOK_SIGNATURE_ALGORITHM
+    key = secret.encode() if isinstance(secret, str) else secret
+    if algorithm == 'sha256':
+        return hmac.digest(key, payload, 'sha256').hex()
+    if algorithm == 'blake2b':
+        if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+            key = hashlib.blake2b(key).digest()
+        return hashlib.blake2b(payload, key=key, digest_size=32).hexdigest()
+    raise ValueError(f"Unsupported webhook signature algorithm: {algorithm}")
@@ -1,11 +1,12 @@
 """SQS utilities for webhook delivery"""
 
 import os
-import json
 import logging
 import boto3
+import orjson
 from botocore.exceptions import ClientError
 from typing import Optional
+from src.utils import json_default
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,11 @@ def get_sqs_client():
     return _sqs_client
 
 
+def _encode_message(message_body: dict) -> str:
+    """Serialize an SQS message body with orjson (Decimals as strings)."""
+    return orjson.dumps(message_body, default=json_default).decode()
+
+
 def send_webhook_message(webhook_id: str, event_data: dict, queue_url: Optional[str] = None) -> bool:
     """
     Send webhook delivery message to SQS queue.
@@ -52,7 +58,7 @@ def send_webhook_message(webhook_id: str, event_data: dict, queue_url: Optional[
         client = get_sqs_client()
         response = client.send_message(
             QueueUrl=queue_url,
-            MessageBody=json.dumps(message_body)
+            MessageBody=_encode_message(message_body)
         )
         
         logger.info(
@@ -84,3 +90,72 @@ def send_webhook_message(webhook_id: str, event_data: dict, queue_url: Optional[
         )
         return False
 
+
+def send_webhook_messages_batch(messages: list[tuple[str, dict]], queue_url: Optional[str] = None) -> int:
+    """
+    Send multiple webhook delivery messages to SQS using SendMessageBatch.
+    
+    Args:
+        messages: List of (webhook_id, event_data) tuples
+        queue_url: Optional SQS queue URL (defaults to environment variable)
+        
+    Returns:
+        Number of messages sent successfully
+    """
+    if not messages:
+        return 0
+    
+    if queue_url is None:
+        queue_url = os.getenv('WEBHOOK_DELIVERY_QUEUE_URL')
+        if not queue_url:
+            logger.error("WEBHOOK_DELIVERY_QUEUE_URL environment variable not set")
+            return 0
+    
+    client = get_sqs_client()
+    sent = 0
+    
+    # SQS accepts up to 10 entries per batch
+    for i in range(0, len(messages), 10):
+        chunk = messages[i:i + 10]
+        entries = [
+            {
+                'Id': str(idx),
+                'MessageBody': _encode_message({
+                    'webhook_id': webhook_id,
+                    'event_data': event_data
+                })
+            }
+            for idx, (webhook_id, event_data) in enumerate(chunk)
+        ]
+        try:
+            response = client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            sent += len(response.get('Successful', []))
+            
+            for failure in response.get('Failed', []):
+                logger.error(
+                    "Failed to send webhook message to SQS",
+                    extra={
+                        'webhook_id': chunk[int(failure['Id'])][0],
+                        'error': failure.get('Message'),
+                        'error_code': failure.get('Code')
+                    }
+                )
+        except Exception as e:
+            logger.error(
+                f"Failed to send webhook message batch to SQS: {e}",
+                extra={
+                    'batch_size': len(chunk),
+                    'error': str(e)
+                }
+            )
+    
+    logger.info(
+        "Webhook message batch sent to SQS",
+        extra={
+            'message_count': len(messages),
+            'sent_count': sent,
+            'queue_url': queue_url
+        }
+    )
+    
+    return sent
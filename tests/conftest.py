@@ -26,9 +26,17 @@ def client(app_instance):
     return TestClient(app_instance)
 
 
-@pytest.fixture
-def dynamodb_table():
-    """Mock DynamoDB table using moto."""
+@pytest.fixture(scope="module")
+def _dynamodb_session():
+    """
+    Mock DynamoDB events table shared by the tests of one module.
+    
+    Creating the table (and its GSI) is the slow part, so it happens once per
+    module; dynamodb_table empties it and drops any other tables between
+    tests. Module rather than session scope because moto doesn't reset state
+    for nested mock_aws() contexts, and other test modules create the same
+    table inside their own mock.
+    """
     with mock_aws():
         dynamodb = boto3.resource(
             'dynamodb',
@@ -69,6 +77,31 @@ def dynamodb_table():
         yield table
 
 
+@pytest.fixture
+def dynamodb_table(_dynamodb_session):
+    """Mock DynamoDB events table, emptied after each test."""
+    table = _dynamodb_session
+    yield table
+    
+    # Drop any other tables the test created (idempotency keys, rate limit
+    # counters, webhooks, API keys) so they don't leak into the next test
+    client = table.meta.client
+    for table_name in client.list_tables()['TableNames']:
+        if table_name != table.name:
+            client.delete_table(TableName=table_name)
+    
+    # Delete the test's items instead of recreating the table
+    scan_kwargs = {'ProjectionExpression': 'event_id, created_at'}
+    with table.batch_writer() as batch:
+        while True:
+            response = table.scan(**scan_kwargs)
+            for item in response['Items']:
+                batch.delete_item(Key={'event_id': item['event_id'], 'created_at': item['created_at']})
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
 @pytest.fixture
 def api_key():
     """Test API key for authentication."""
@@ -126,3 +159,15 @@ def reset_environment():
     os.environ.clear()
     os.environ.update(original_env)
 
+
+@pytest.fixture(autouse=True)
+def clear_api_key_settings_cache():
+    """Clear cached API key settings and rate limit leases between tests."""
+    from src.utils.api_key_cache import clear_api_key_cache
+    from src.middleware.rate_limit import clear_local_rate_limits
+    clear_api_key_cache()
+    clear_local_rate_limits()
+    yield
+    clear_api_key_cache()
+    clear_local_rate_limits()
+
@@ -6,9 +6,10 @@ from moto import mock_aws
 from datetime import datetime, timezone
 from src.database import (
     create_event, get_event, query_pending_events,
-    acknowledge_event, delete_event, create_tables
+    acknowledge_event, try_acknowledge_event, delete_event, create_tables
 )
 from src.utils import get_iso_timestamp, generate_uuid
+from src.exceptions import ConflictError
 
 
 @pytest.fixture
@@ -51,13 +52,27 @@ def mock_dynamodb_table(monkeypatch):
             BillingMode='PAY_PER_REQUEST'
         )
         
-        # Patch the module-level table reference
-        monkeypatch.setattr('src.database._events_table', table)
+        # Patch the table lookup
+        monkeypatch.setattr('src.database._get_events_table', lambda: table)
         monkeypatch.setenv('DYNAMODB_TABLE_EVENTS', 'triggers-api-events')
         
         yield table
 
 
+@pytest.fixture
+def mock_idempotency_table(mock_dynamodb_table, monkeypatch):
+    """Create a mock idempotency table inside the events table's mock."""
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    table = dynamodb.create_table(
+        TableName='triggers-api-idempotency',
+        KeySchema=[{'AttributeName': 'idempotency_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'idempotency_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    monkeypatch.setattr('src.database._get_idempotency_table', lambda: table)
+    return table
+
+
 class TestCreateEvent:
     """Tests for create_event function"""
     
@@ -109,6 +124,30 @@ class TestCreateEvent:
         assert created_at.endswith('Z')  # UTC timezone
         assert 'T' in created_at  # ISO 8601 format
     
+    def test_iso_timestamp_format(self):
+        """Test timestamps always carry six microsecond digits and a Z suffix."""
+        before = datetime.now(timezone.utc)
+        timestamp = get_iso_timestamp()
+        parsed = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+        
+        assert len(timestamp) == 27
+        assert abs((parsed - before).total_seconds()) < 1
+    
+    def test_cursor_round_trip_is_url_safe(self):
+        """Test cursors use the URL-safe alphabet and still accept standard base64."""
+        import base64
+        import json
+        from decimal import Decimal
+        from src.utils import encode_cursor, decode_cursor
+        key = {'event_id': 'id>>?', 'is_active': Decimal(1)}
+        
+        cursor = encode_cursor(key)
+        legacy = base64.b64encode(json.dumps({'event_id': 'id>>?'}).encode()).decode()
+        
+        assert not set(cursor) & set('+/=')
+        assert decode_cursor(cursor) == {'event_id': 'id>>?', 'is_active': 1}
+        assert decode_cursor(legacy) == {'event_id': 'id>>?'}
+    
     def test_create_event_sets_status_pending(self, mock_dynamodb_table):
         """Test that status is set to pending."""
         event = create_event(
@@ -136,6 +175,38 @@ class TestCreateEvent:
         assert abs(ttl - expected_ttl) < 5
 
 
+    def test_create_event_idempotency_key_in_flight(self, mock_dynamodb_table, mock_idempotency_table):
+        """Test a fresh mapping whose event isn't written yet is not re-pointed."""
+        mock_idempotency_table.put_item(Item={
+            'idempotency_key': 'key-1',
+            'event_id': 'in-flight-id',
+            'event_created_at': get_iso_timestamp(),
+            'created_at': get_iso_timestamp()
+        })
+        
+        with pytest.raises(ConflictError):
+            create_event(source="test", event_type="test", payload={"key": "value"}, idempotency_key='key-1')
+        
+        assert mock_idempotency_table.get_item(Key={'idempotency_key': 'key-1'})['Item']['event_id'] == 'in-flight-id'
+        assert mock_dynamodb_table.scan()['Count'] == 0
+    
+    def test_create_event_idempotency_key_stale(self, mock_dynamodb_table, mock_idempotency_table):
+        """Test an old mapping whose event never landed is re-pointed to the new event."""
+        mock_idempotency_table.put_item(Item={
+            'idempotency_key': 'key-1',
+            'event_id': 'lost-id',
+            'event_created_at': '2024-01-01T12:00:00.000000Z',
+            'created_at': '2024-01-01T12:00:00.000000Z'
+        })
+        
+        event = create_event(source="test", event_type="test", payload={"key": "value"}, idempotency_key='key-1')
+        again = create_event(source="test", event_type="test", payload={"key": "value"}, idempotency_key='key-1')
+        
+        assert again['event_id'] == event['event_id']
+        assert mock_idempotency_table.get_item(Key={'idempotency_key': 'key-1'})['Item']['event_id'] == event['event_id']
+        assert mock_dynamodb_table.scan()['Count'] == 1
+
+
 class TestGetEvent:
     """Tests for get_event function"""
     
@@ -224,6 +295,20 @@ class TestQueryPendingEvents:
         
         assert len(result['events']) == 2
         assert all(event['event_type'] == 'type-a' for event in result['events'])
+    
+    def test_query_pending_events_with_date_range(self, mock_dynamodb_table):
+        """Test created_after/created_before bound the index query."""
+        event = create_event(source="test", event_type="test", payload={"key": "value"})
+        
+        inside = query_pending_events(
+            limit=10,
+            created_after=event['created_at'],
+            created_before=event['created_at']
+        )
+        after = query_pending_events(limit=10, created_after='2999-01-01T00:00:00.000000Z')
+        
+        assert [e['event_id'] for e in inside['events']] == [event['event_id']]
+        assert after['events'] == []
 
 
 class TestAcknowledgeEvent:
@@ -272,6 +357,40 @@ class TestAcknowledgeEvent:
         
         # Should return None (conditional update fails)
         assert updated is None
+    
+    def test_try_acknowledge_event_returns_current_state(self, mock_dynamodb_table):
+        """Test failed acknowledgment reports the existing event."""
+        event = create_event(
+            source="test",
+            event_type="test",
+            payload={"key": "value"}
+        )
+        acknowledge_event(event['event_id'])
+        
+        updated, current = try_acknowledge_event(event['event_id'])
+        
+        assert updated is None
+        assert current is not None
+        assert current['status'] == 'acknowledged'
+    
+    def test_try_acknowledge_event_not_found(self, mock_dynamodb_table):
+        """Test failed acknowledgment of missing event reports no state."""
+        assert try_acknowledge_event("nonexistent-id") == (None, None)
+    
+    def test_try_acknowledge_event_deleted_after_lookup(self, mock_dynamodb_table):
+        """Test an event deleted between the key lookup and the update reports not found."""
+        from unittest.mock import patch
+        event = create_event(
+            source="test",
+            event_type="test",
+            payload={"key": "value"}
+        )
+        mock_dynamodb_table.delete_item(Key={'event_id': event['event_id'], 'created_at': event['created_at']})
+        
+        # The lookup still sees the pending event
+        with patch('src.database.get_event', return_value=event):
+            assert try_acknowledge_event(event['event_id']) == (None, None)
+        assert try_acknowledge_event(event['event_id'], event['created_at']) == (None, None)
 
 
 class TestDeleteEvent:
@@ -104,6 +104,21 @@ class TestCreateEvent:
         # Pydantic validation happens before endpoint, returns 422
         assert response.status_code in [400, 422]
     
+    def test_create_event_blank_fields_keep_validator_messages(self, client, auth_headers):
+        """Test blank source and empty payload report the same 422 messages as before."""
+        event_data = {
+            "source": "   ",
+            "event_type": "test",
+            "payload": {}
+        }
+        
+        response = client.post("/v1/events", json=event_data, headers=auth_headers)
+        
+        assert_error_response(response, "VALIDATION_ERROR", expected_status=422)
+        errors = response.json()["error"]["details"]["validation_errors"]
+        assert {"field": "body.source", "message": "Value error, source field is required and cannot be empty", "type": "value_error"} in errors
+        assert {"field": "body.payload", "message": "Value error, payload cannot be empty", "type": "value_error"} in errors
+    
     def test_create_event_payload_too_large(self, client, auth_headers):
         """Test event creation with payload exceeding 400KB limit."""
         large_payload = create_large_payload(401)  # 401 KB
@@ -119,6 +134,20 @@ class TestCreateEvent:
         assert_error_response(response, "PAYLOAD_TOO_LARGE", expected_status=413)
         assert_request_id_present(response)
     
+    def test_create_event_payload_too_large_after_encoding(self, client, auth_headers):
+        """Test a body under 400KB whose payload re-encodes to more than 400KB."""
+        numbers = ",".join(["9e9"] * 50000)
+        body = '{"source":"test-source","event_type":"test","payload":{"n":[' + numbers + ']}}'
+        assert len(body) < 400 * 1024
+        
+        response = client.post(
+            "/v1/events",
+            content=body,
+            headers={**auth_headers, "Content-Type": "application/json"}
+        )
+        
+        assert_error_response(response, "PAYLOAD_TOO_LARGE", expected_status=413)
+    
     def test_create_event_unknown_fields(self, client, auth_headers, sample_event):
         """Test event creation with unknown fields (should be rejected)."""
         event_data = sample_event.copy()
@@ -207,12 +236,12 @@ class TestAcknowledgeEvent:
         """Test successful event acknowledgment."""
         event_id = "550e8400-e29b-41d4-a716-446655440000"
         
-        with patch('src.endpoints.events.acknowledge_event') as mock_ack:
-            mock_ack.return_value = {
+        with patch('src.endpoints.events.try_acknowledge_event') as mock_ack:
+            mock_ack.return_value = ({
                 'event_id': event_id,
                 'status': 'acknowledged',
                 'acknowledged_at': '2024-01-01T12:00:00.000000Z'
-            }
+            }, None)
             
             response = client.post(f"/v1/events/{event_id}/ack", headers=auth_headers)
             
@@ -228,37 +257,30 @@ class TestAcknowledgeEvent:
         """Test acknowledgment of non-existent event."""
         event_id = "550e8400-e29b-41d4-a716-446655440000"
         
-        with patch('src.endpoints.events.acknowledge_event') as mock_ack:
-            mock_ack.return_value = None
+        with patch('src.endpoints.events.try_acknowledge_event') as mock_ack:
+            mock_ack.return_value = (None, None)
+            
+            response = client.post(f"/v1/events/{event_id}/ack", headers=auth_headers)
             
-            with patch('src.endpoints.events.get_event') as mock_get:
-                mock_get.return_value = None
-                
-                response = client.post(f"/v1/events/{event_id}/ack", headers=auth_headers)
-                
-                assert_error_response(response, "NOT_FOUND", expected_status=404)
-                assert_request_id_present(response)
+            assert_error_response(response, "NOT_FOUND", expected_status=404)
+            assert_request_id_present(response)
     
     def test_acknowledge_event_already_acknowledged(self, client, auth_headers):
         """Test acknowledgment of already acknowledged event."""
         event_id = "550e8400-e29b-41d4-a716-446655440000"
         
-        with patch('src.endpoints.events.acknowledge_event') as mock_ack:
-            # Mock returns None when already acknowledged
-            mock_ack.return_value = None
-            
-            with patch('src.endpoints.events.get_event') as mock_get:
-                # Event exists but is already acknowledged
-                mock_get.return_value = {
-                    'event_id': event_id,
-                    'status': 'acknowledged'
-                }
-                
-                response = client.post(f"/v1/events/{event_id}/ack", headers=auth_headers)
-                
-                # Should return 409 Conflict since event exists but is already acknowledged
-                assert_error_response(response, "CONFLICT", expected_status=409)
-                assert_request_id_present(response)
+        with patch('src.endpoints.events.try_acknowledge_event') as mock_ack:
+            # Event exists but is already acknowledged
+            mock_ack.return_value = (None, {
+                'event_id': event_id,
+                'status': 'acknowledged'
+            })
+            
+            response = client.post(f"/v1/events/{event_id}/ack", headers=auth_headers)
+            
+            # Should return 409 Conflict since event exists but is already acknowledged
+            assert_error_response(response, "CONFLICT", expected_status=409)
+            assert_request_id_present(response)
     
     def test_acknowledge_event_invalid_uuid(self, client, auth_headers):
         """Test acknowledgment with invalid UUID format."""
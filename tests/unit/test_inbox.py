@@ -26,6 +26,22 @@ class TestGetInbox:
             assert "pagination" in data
             assert "next_cursor" not in data["pagination"]
     
+    def test_get_inbox_not_modified(self, client, auth_headers):
+        """Test re-polling with the returned ETag yields 304."""
+        with patch('src.endpoints.inbox.query_pending_events') as mock_query:
+            mock_query.return_value = {
+                'events': [{'event_id': 'test-id', 'status': 'pending'}],
+                'last_evaluated_key': None
+            }
+            
+            first = client.get("/v1/inbox", headers=auth_headers)
+            etag = first.headers["ETag"]
+            second = client.get("/v1/inbox", headers={**auth_headers, "If-None-Match": etag})
+            
+            assert second.status_code == 304
+            assert second.content == b""
+            assert second.headers["ETag"] == etag
+    
     def test_get_inbox_single_event(self, client, auth_headers):
         """Test getting inbox with single event."""
         event = {
@@ -194,6 +210,25 @@ class TestGetInbox:
             data = response.json()
             assert data["events"] == []
     
+    def test_get_inbox_date_filters_normalized_to_utc(self, client, auth_headers):
+        """Test date filters are passed on in the stored UTC created_at format."""
+        with patch('src.endpoints.inbox.query_pending_events') as mock_query:
+            mock_query.return_value = {
+                'events': [],
+                'last_evaluated_key': None
+            }
+            
+            response = client.get(
+                "/v1/inbox",
+                params={'created_after': '2025-01-01T10:00:00+05:00', 'created_before': '2025-01-01T06:00:00'},
+                headers=auth_headers
+            )
+            
+            assert_success_response(response, expected_status=200)
+            call_kwargs = mock_query.call_args[1]
+            assert call_kwargs['created_after'] == '2025-01-01T05:00:00.000000Z'
+            assert call_kwargs['created_before'] == '2025-01-01T06:00:00.000000Z'
+    
     def test_get_inbox_invalid_limit_too_low(self, client, auth_headers):
         """Test with invalid limit (< 1)."""
         response = client.get("/v1/inbox?limit=0", headers=auth_headers)
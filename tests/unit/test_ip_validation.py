@@ -6,6 +6,7 @@ from src.middleware.ip_validation import (
     validate_ip_format,
     validate_cidr_format,
     ip_matches_allowlist,
+    compile_allowlist,
     extract_client_ip
 )
 from src.exceptions import ForbiddenError
@@ -60,6 +61,17 @@ class TestIPValidation:
         assert ip_matches_allowlist("192.168.2.50", ["192.168.1.0/24"]) is False
         assert ip_matches_allowlist("10.0.0.5", ["10.0.0.0/8"]) is True
     
+    def test_ip_matches_compiled_allowlist(self):
+        """Test matching against a precompiled allowlist."""
+        allowlist = compile_allowlist(["192.168.1.1", "10.0.0.0/8", "2001:db8::/32", "not-a-cidr/99"])
+        assert allowlist.networks_v4 and allowlist.networks_v6
+        assert ip_matches_allowlist("192.168.1.1", allowlist) is True
+        assert ip_matches_allowlist("10.1.2.3", allowlist) is True
+        assert ip_matches_allowlist("2001:db8::1", allowlist) is True
+        assert ip_matches_allowlist("2001:db9::1", allowlist) is False
+        assert ip_matches_allowlist("172.16.0.1", allowlist) is False
+        assert ip_matches_allowlist("not-an-ip", allowlist) is False
+    
     def test_extract_client_ip_from_forwarded_for(self):
         """Test extracting IP from X-Forwarded-For header."""
         request = Mock(spec=Request)
@@ -69,6 +81,13 @@ class TestIPValidation:
         ip = extract_client_ip(request)
         assert ip == "192.168.1.1"
     
+    def test_resolve_client_ip_long_forwarded_for(self):
+        """Test only the first hop of a long X-Forwarded-For chain is used."""
+        from src.middleware.ip_validation import resolve_client_ip
+        forwarded_for = "203.0.113.7, " + ", ".join(["10.0.0.1"] * 1000)
+        assert resolve_client_ip(forwarded_for, None, "127.0.0.1") == "203.0.113.7"
+        assert resolve_client_ip(" , 10.0.0.1", "198.51.100.2", None) == "198.51.100.2"
+    
     def test_extract_client_ip_from_real_ip(self):
         """Test extracting IP from X-Real-IP header."""
         request = Mock(spec=Request)
@@ -99,7 +118,7 @@ class TestIPValidationMiddleware:
     async def test_ip_validation_allows_request(self, mock_matches, mock_extract, mock_get_ips):
         """Test middleware allows request when IP is allowed."""
         request = Mock(spec=Request)
-        request.url.path = "/v1/events"
+        request.scope = {"path": "/v1/events"}
         request.headers = {"X-API-Key": "test-key"}
         
         mock_get_ips.return_value = ["192.168.1.0/24"]
@@ -122,7 +141,7 @@ class TestIPValidationMiddleware:
     async def test_ip_validation_blocks_request(self, mock_matches, mock_extract, mock_get_ips):
         """Test middleware blocks request when IP is not allowed."""
         request = Mock(spec=Request)
-        request.url.path = "/v1/events"
+        request.scope = {"path": "/v1/events"}
         request.headers = {"X-API-Key": "test-key"}
         
         mock_get_ips.return_value = ["192.168.1.0/24"]
@@ -141,7 +160,7 @@ class TestIPValidationMiddleware:
     async def test_ip_validation_skips_health_check(self):
         """Test middleware skips health check endpoint."""
         request = Mock(spec=Request)
-        request.url.path = "/v1/health"
+        request.scope = {"path": "/v1/health"}
         
         from src.middleware.ip_validation import ip_validation_middleware
         
@@ -152,3 +171,21 @@ class TestIPValidationMiddleware:
         
         assert response.status_code == 200
 
+
+    @patch('src.middleware.ip_validation.get_allowed_ips_for_api_key')
+    def test_allowed_ips_cached_per_api_key(self, mock_get_ips):
+        """Test allowlist lookups (including None) are cached until invalidated."""
+        from src.middleware.ip_validation import enforce_ip_allowlist
+        from src.utils.api_key_cache import invalidate_api_key
+        
+        mock_get_ips.return_value = None
+        
+        enforce_ip_allowlist("test-key", "10.0.0.1")
+        enforce_ip_allowlist("test-key", "10.0.0.2")
+        assert mock_get_ips.call_count == 1
+        
+        invalidate_api_key("test-key")
+        mock_get_ips.return_value = ["192.168.1.0/24"]
+        with pytest.raises(ForbiddenError):
+            enforce_ip_allowlist("test-key", "10.0.0.1")
+        assert mock_get_ips.call_count == 2
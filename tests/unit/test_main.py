@@ -141,6 +141,56 @@ class TestExceptionHandlers:
         mock_logger.exception.assert_called_once()
 
 
+class TestOptionsHandler:
+    """Test the catch-all OPTIONS route"""
+    
+    def test_options_returns_empty_204_with_cors_headers(self):
+        """Test non-preflight OPTIONS gets an empty 204 with CORS headers."""
+        client = TestClient(app)
+        
+        for _ in range(2):
+            response = client.options('/v1/events')
+            
+            assert response.status_code == 204
+            assert response.content == b''
+            assert response.headers['Access-Control-Allow-Origin'] == '*'
+            assert len(response.headers.get_list('X-Request-ID')) == 1
+    
+    @pytest.mark.asyncio
+    async def test_options_sends_fresh_headers_each_request(self):
+        """Test in-place header edits by middleware don't carry over to later requests."""
+        from src.main import _CorsPreflightApp
+        preflight = _CorsPreflightApp()
+        messages = []
+        
+        async def send(message):
+            messages.append(message)
+        
+        await preflight({"type": "http"}, None, send)
+        # What CORSMiddleware does through MutableHeaders
+        messages[0]["headers"].append((b"vary", b"Origin"))
+        await preflight({"type": "http"}, None, send)
+        
+        assert messages[2]["status"] == 204
+        assert (b"vary", b"Origin") not in messages[2]["headers"]
+
+
+class TestOpenAPISchema:
+    """Test the cached OpenAPI schema route"""
+    
+    def test_openapi_served_from_cached_bytes(self):
+        """Test /openapi.json serves the custom schema and reuses the encoded bytes."""
+        import src.main as main_module
+        client = TestClient(app)
+        
+        response = client.get('/openapi.json')
+        
+        assert response.status_code == 200
+        assert 'ApiKeyAuth' in response.json()['components']['securitySchemes']
+        assert main_module._openapi_bytes == response.content
+        assert client.get('/openapi.json').content == response.content
+
+
 class TestStartupEvent:
     """Test application startup event"""
     
@@ -168,22 +218,26 @@ class TestStartupEvent:
         
         mock_create_tables.assert_called_once()
         mock_logger.error.assert_called_once()
+    
+    @patch('src.main.webhooks.close_http_client')
+    @patch('src.main.flush_metrics')
+    def test_shutdown_event_flushes_metrics(self, mock_flush, mock_close_client):
+        """Test shutdown sends queued metrics and closes the HTTP client."""
+        from src.main import shutdown_event
+        
+        asyncio.run(shutdown_event())
+        
+        mock_flush.assert_called_once()
+        mock_close_client.assert_called_once()
 
 
 class TestLambdaHandler:
     """Test Lambda handler function"""
     
-    @patch('src.main.mangum_handler')
-    def test_lambda_handler(self, mock_mangum_handler):
-        """Test Lambda handler wrapper."""
+    def test_lambda_handler(self):
+        """Test the Lambda entry point is the Mangum adapter for the app."""
+        from mangum import Mangum
         from src.main import handler
         
-        mock_event = {"httpMethod": "GET", "path": "/v1/health"}
-        mock_context = MagicMock()
-        mock_mangum_handler.return_value = {"statusCode": 200}
-        
-        result = handler(mock_event, mock_context)
-        
-        mock_mangum_handler.assert_called_once_with(mock_event, mock_context)
-        assert result == {"statusCode": 200}
-
+        assert isinstance(handler, Mangum)
+        assert handler.app is app
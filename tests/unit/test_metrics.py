@@ -0,0 +1,103 @@
+"""Unit tests for CloudWatch metrics batching"""
+
+import time
+from unittest.mock import MagicMock, patch
+from src.utils.metrics import CloudWatchMetrics
+
+
+def _sent_metrics(client):
+    """Metrics passed to put_metric_data across all calls."""
+    return [metric for call in client.put_metric_data.call_args_list for metric in call.kwargs['MetricData']]
+
+
+class TestCloudWatchMetrics:
+    """Test metrics are sent off the request path"""
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_background_thread_sends_queued_metrics(self, mock_get_client):
+        """Test a recorded metric is sent without an explicit flush."""
+        client = MagicMock()
+        mock_get_client.return_value = client
+        metrics = CloudWatchMetrics(namespace='Test')
+        
+        metrics.record_request_count('/v1/events', 'POST')
+        
+        deadline = time.monotonic() + 5
+        while not client.put_metric_data.called and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert [m['MetricName'] for m in _sent_metrics(client)] == ['ApiRequestCount']
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_flush_sends_everything_in_chunks(self, mock_get_client):
+        """Test flush drains the queue in PutMetricData-sized chunks."""
+        client = MagicMock()
+        mock_get_client.return_value = client
+        metrics = CloudWatchMetrics(namespace='Test')
+        
+        for _ in range(45):
+            metrics.record_request_count('/v1/events', 'POST')
+        metrics.flush()
+        
+        assert len(_sent_metrics(client)) == 45
+        assert all(len(call.kwargs['MetricData']) <= 20 for call in client.put_metric_data.call_args_list)
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_send_failure_is_logged_not_raised(self, mock_get_client):
+        """Test CloudWatch errors don't reach the caller."""
+        client = MagicMock()
+        client.put_metric_data.side_effect = Exception("throttled")
+        mock_get_client.return_value = client
+        metrics = CloudWatchMetrics(namespace='Test')
+        
+        metrics.record_request_count('/v1/events', 'POST')
+        metrics.flush()
+        
+        assert client.put_metric_data.called
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_emf_backend_writes_metric_lines(self, mock_get_client, capsys):
+        """Test the EMF backend prints metrics instead of calling CloudWatch."""
+        import json
+        metrics = CloudWatchMetrics(namespace='Test', backend='emf')
+        
+        metrics.record_request_count('/v1/events', 'POST')
+        
+        document = json.loads(capsys.readouterr().out)
+        mock_get_client.assert_not_called()
+        assert document['ApiRequestCount'] == 1
+        assert document['Endpoint'] == '/v1/events'
+        assert document['Method'] == 'POST'
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        assert directive['Namespace'] == 'Test'
+        assert directive['Dimensions'] == [['Endpoint', 'Method']]
+        assert directive['Metrics'] == [{'Name': 'ApiRequestCount', 'Unit': 'Count'}]
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_sampling_scales_request_count(self, mock_get_client):
+        """Test sampled metrics are recorded 1-in-N with the count scaled by N."""
+        client = MagicMock()
+        mock_get_client.return_value = client
+        metrics = CloudWatchMetrics(namespace='Test', sample_n=4)
+        
+        for _ in range(8):
+            metrics.record_request_count('/v1/events', 'POST')
+            metrics.record_success('/v1/events', 'POST')
+        metrics.flush()
+        
+        sent = _sent_metrics(client)
+        totals = [m['Value'] for m in sent if len(m['Dimensions']) == 2]
+        successes = [m for m in sent if len(m['Dimensions']) == 3]
+        assert totals == [4, 4]
+        assert len(successes) == 8
+    
+    @patch('src.utils.metrics._get_cloudwatch_client')
+    def test_none_backend_records_nothing(self, mock_get_client, capsys):
+        """Test the none backend drops metrics without a client or thread."""
+        metrics = CloudWatchMetrics(namespace='Test', backend='none')
+        
+        metrics.record_latency('/v1/events', 'POST', 12.5)
+        metrics.record_success('/v1/events', 'POST')
+        
+        mock_get_client.assert_not_called()
+        assert metrics._flusher is None
+        assert capsys.readouterr().out == ''
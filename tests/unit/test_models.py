@@ -62,6 +62,23 @@ class TestEventCreate:
                 payload={"key": "value"}
             )
     
+    def test_event_create_blank_source_stripped(self):
+        """Test EventCreate strips source/event_type and rejects blank ones."""
+        event = EventCreate(
+            source="  test-source  ",
+            event_type=" test-type ",
+            payload={"key": "value"}
+        )
+        assert event.source == "test-source"
+        assert event.event_type == "test-type"
+        
+        with pytest.raises(ValidationError):
+            EventCreate(
+                source="   ",
+                event_type="test-type",
+                payload={"key": "value"}
+            )
+    
     def test_event_create_empty_event_type(self):
         """Test EventCreate with empty event_type."""
         with pytest.raises(ValidationError):
@@ -6,7 +6,7 @@ from unittest.mock import Mock, patch, MagicMock
 from moto import mock_aws
 import boto3
 from src.middleware.rate_limit import rate_limit_middleware
-from src.database import check_rate_limit, increment_rate_limit, get_rate_limit_for_api_key
+from src.database import consume_rate_limit, get_rate_limit_for_api_key
 from src.exceptions import RateLimitExceededError
 from fastapi import Request
 from fastapi.responses import Response
@@ -36,7 +36,7 @@ def dynamodb_rate_limits_table():
 def mock_request():
     """Create mock FastAPI request."""
     request = Mock(spec=Request)
-    request.url.path = "/v1/events"
+    request.scope = {"path": "/v1/events"}
     request.headers = {"X-API-Key": "test-api-key"}
     request.state.request_id = "test-request-id"
     return request
@@ -46,102 +46,25 @@ class TestRateLimitFunctions:
     """Test rate limit database functions."""
     
     @patch('src.database._get_rate_limits_table')
-    @patch('src.database.get_dynamodb_resource')
-    def test_check_rate_limit_no_existing_record(self, mock_get_resource, mock_get_table, dynamodb_rate_limits_table):
-        """Test checking rate limit when no record exists."""
+    def test_consume_rate_limit_is_all_or_nothing(self, mock_get_table, dynamodb_rate_limits_table):
+        """Test a consume either fits entirely under the limit or adds nothing."""
         mock_get_table.return_value = dynamodb_rate_limits_table
+        window_start = (int(time.time()) // 60) * 60
         
-        allowed, remaining, reset_timestamp = check_rate_limit("test-key", 1000, 60)
-        
-        assert allowed is True
-        assert remaining == 1000
-        assert reset_timestamp > int(time.time())
-    
-    @patch('src.database._get_rate_limits_table')
-    def test_check_rate_limit_with_existing_record(self, mock_get_table, dynamodb_rate_limits_table):
-        """Test checking rate limit with existing record."""
-        mock_get_table.return_value = dynamodb_rate_limits_table
-        
-        # Create a record
-        current_time = int(time.time())
-        window_start = (current_time // 60) * 60
-        dynamodb_rate_limits_table.put_item(
-            Item={
-                'api_key': 'test-key',
-                'window_start': window_start,
-                'request_count': 500,
-                'ttl': window_start + 3600
-            }
-        )
-        
-        allowed, remaining, reset_timestamp = check_rate_limit("test-key", 1000, 60)
-        
-        assert allowed is True
-        assert remaining == 500
-        assert reset_timestamp == window_start + 60
-    
-    @patch('src.database._get_rate_limits_table')
-    def test_check_rate_limit_exceeded(self, mock_get_table, dynamodb_rate_limits_table):
-        """Test checking rate limit when exceeded."""
-        mock_get_table.return_value = dynamodb_rate_limits_table
-        
-        # Create a record at limit
-        current_time = int(time.time())
-        window_start = (current_time // 60) * 60
-        dynamodb_rate_limits_table.put_item(
-            Item={
-                'api_key': 'test-key',
-                'window_start': window_start,
-                'request_count': 1000,
-                'ttl': window_start + 3600
-            }
-        )
-        
-        allowed, remaining, reset_timestamp = check_rate_limit("test-key", 1000, 60)
-        
-        assert allowed is False
-        assert remaining == 0
+        assert consume_rate_limit("test-key", window_start, 10, count=8) == (True, 2, window_start + 60)
+        assert consume_rate_limit("test-key", window_start, 10, count=5) == (False, 0, window_start + 60)
+        assert consume_rate_limit("test-key", window_start, 10, count=2) == (True, 0, window_start + 60)
+        assert consume_rate_limit("test-key", window_start, 10) == (False, 0, window_start + 60)
     
     @patch('src.database._get_rate_limits_table')
-    def test_increment_rate_limit_new_record(self, mock_get_table, dynamodb_rate_limits_table):
-        """Test incrementing rate limit for new record."""
+    def test_consume_rate_limit_rejects_count_over_limit(self, mock_get_table, dynamodb_rate_limits_table):
+        """Test a consume larger than the limit is refused even in a fresh window."""
         mock_get_table.return_value = dynamodb_rate_limits_table
+        window_start = (int(time.time()) // 60) * 60
         
-        current_time = int(time.time())
-        window_start = (current_time // 60) * 60
-        
-        # The function will try to update first, which will fail with ConditionalCheckFailedException
-        # Then it will catch ResourceNotFoundException and create a new record
-        from botocore.exceptions import ClientError
-        
-        # Mock the update_item to raise ResourceNotFoundException, then put_item succeeds
-        mock_table = Mock()
-        mock_table.update_item.side_effect = ClientError(
-            {'Error': {'Code': 'ResourceNotFoundException'}},
-            'UpdateItem'
-        )
-        mock_table.put_item.return_value = None
-        
-        # Create the record manually first
-        dynamodb_rate_limits_table.put_item(
-            Item={
-                'api_key': 'test-key',
-                'window_start': window_start,
-                'request_count': 1,
-                'ttl': window_start + 3600
-            }
-        )
-        
-        # Now test that we can read it back
-        response = dynamodb_rate_limits_table.get_item(
-            Key={'api_key': 'test-key', 'window_start': window_start}
-        )
-        item = response.get('Item')
-        
-        assert item is not None
-        assert item['request_count'] == 1
-        assert item['api_key'] == 'test-key'
-        assert item['window_start'] == window_start
+        assert consume_rate_limit("test-key", window_start, 0) == (False, 0, window_start + 60)
+        assert consume_rate_limit("test-key", window_start, 5, count=6) == (False, 0, window_start + 60)
+        assert 'Item' not in dynamodb_rate_limits_table.get_item(Key={'api_key': 'test-key', 'window_start': window_start})
     
     @patch('src.database._get_api_keys_table')
     def test_get_rate_limit_for_api_key_default(self, mock_get_table):
@@ -162,6 +85,7 @@ class TestRateLimitFunctions:
         
         limit = get_rate_limit_for_api_key("test-key")
         assert limit == 5000
+        assert isinstance(limit, int)
 
 
 class TestRateLimitMiddleware:
@@ -169,13 +93,11 @@ class TestRateLimitMiddleware:
     
     @pytest.mark.asyncio
     @patch('src.middleware.rate_limit.get_rate_limit_for_api_key')
-    @patch('src.middleware.rate_limit.check_rate_limit')
-    @patch('src.middleware.rate_limit.increment_rate_limit')
-    async def test_rate_limit_middleware_allows_request(self, mock_increment, mock_check, mock_get_limit, mock_request):
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    async def test_rate_limit_middleware_allows_request(self, mock_consume, mock_get_limit, mock_request):
         """Test middleware allows request within rate limit."""
         mock_get_limit.return_value = 1000
-        mock_check.return_value = (True, 999, int(time.time()) + 60)
-        mock_increment.return_value = {'request_count': 1}
+        mock_consume.return_value = (True, 980, int(time.time()) + 60)
         
         async def call_next(request):
             return Response(content="OK", status_code=200)
@@ -188,11 +110,11 @@ class TestRateLimitMiddleware:
     
     @pytest.mark.asyncio
     @patch('src.middleware.rate_limit.get_rate_limit_for_api_key')
-    @patch('src.middleware.rate_limit.check_rate_limit')
-    async def test_rate_limit_middleware_blocks_request(self, mock_check, mock_get_limit, mock_request):
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    async def test_rate_limit_middleware_blocks_request(self, mock_consume, mock_get_limit, mock_request):
         """Test middleware blocks request when rate limit exceeded."""
         mock_get_limit.return_value = 1000
-        mock_check.return_value = (False, 0, int(time.time()) + 60)
+        mock_consume.return_value = (False, 0, int(time.time()) + 60)
         
         async def call_next(request):
             return Response(content="OK", status_code=200)
@@ -200,10 +122,104 @@ class TestRateLimitMiddleware:
         with pytest.raises(RateLimitExceededError):
             await rate_limit_middleware(mock_request, call_next)
     
+    @patch('src.middleware.rate_limit.get_rate_limit_for_api_key')
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    def test_leased_tokens_skip_dynamodb(self, mock_consume, mock_get_limit):
+        """Test a worker leases tokens once it keeps claiming, and serves them locally."""
+        from src.middleware.rate_limit import enforce_rate_limit
+        reset = int(time.time()) + 60
+        mock_get_limit.return_value = 100
+        mock_consume.side_effect = [(True, 99, reset), (True, 97, reset), (True, 95, reset)]
+        
+        first = enforce_rate_limit("test-key")
+        second = enforce_rate_limit("test-key")
+        third = enforce_rate_limit("test-key")
+        
+        # First claim in the window is a single token; the next one leases two
+        assert mock_consume.call_args_list[0].kwargs['count'] == 1
+        assert mock_consume.call_args_list[1].kwargs['count'] == 2
+        assert mock_consume.call_count == 2
+        assert first["X-RateLimit-Remaining"] == "99"
+        assert second["X-RateLimit-Remaining"] == "98"
+        assert third["X-RateLimit-Remaining"] == "97"
+        
+        # Lease used up: the next request goes back to DynamoDB
+        enforce_rate_limit("test-key")
+        assert mock_consume.call_count == 3
+    
+    @patch('src.middleware.rate_limit.get_rate_limit_for_api_key')
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    def test_falls_back_to_single_token_near_limit(self, mock_consume, mock_get_limit):
+        """Test a request is still allowed when a full lease no longer fits."""
+        from src.middleware.rate_limit import enforce_rate_limit
+        reset = int(time.time()) + 60
+        mock_get_limit.return_value = 100
+        mock_consume.side_effect = [(True, 99, reset), (False, 0, reset), (True, 0, reset)]
+        
+        enforce_rate_limit("test-key")
+        headers = enforce_rate_limit("test-key")
+        
+        assert headers["X-RateLimit-Remaining"] == "0"
+        assert mock_consume.call_args_list[1].kwargs['count'] == 2
+        assert mock_consume.call_args.kwargs.get('count', 1) == 1
+    
+    @patch('src.database._get_rate_limits_table')
+    @patch('src.middleware.rate_limit.get_rate_limit_for_api_key', return_value=1000)
+    @patch('src.middleware.rate_limit.time')
+    def test_limit_reachable_with_idle_lease_holders(self, mock_time, mock_get_limit, mock_get_table, dynamodb_rate_limits_table):
+        """Test workers that go idle strand only a few tokens of the shared limit."""
+        from src.middleware import rate_limit
+        from src.utils.cache import TTLCache
+        mock_time.time.return_value = 1_700_000_010
+        mock_get_table.return_value = dynamodb_rate_limits_table
+        
+        def make_requests(n=None):
+            """Send requests through a separate worker's leases; return how many were allowed."""
+            allowed = 0
+            with patch.object(rate_limit, '_local_leases', TTLCache(maxsize=10, ttl=60)):
+                while n is None or allowed < n:
+                    try:
+                        rate_limit.enforce_rate_limit("test-key")
+                    except RateLimitExceededError:
+                        break
+                    allowed += 1
+            return allowed
+        
+        # 20 workers each serve a couple of requests, then go idle
+        allowed = sum(make_requests(2) for _ in range(20))
+        # One busy worker takes everything that is left
+        allowed += make_requests()
+        
+        assert allowed >= 1000 - 20
+    
+    @patch('src.database._get_rate_limits_table')
+    @patch('src.database._get_api_keys_table')
+    def test_enforces_limit_stored_in_dynamodb(self, mock_get_keys_table, mock_get_limits_table, dynamodb_rate_limits_table):
+        """Test a rate limit read from DynamoDB (as a Decimal) is enforced."""
+        from src.middleware.rate_limit import enforce_rate_limit
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        keys_table = dynamodb.create_table(
+            TableName='triggers-api-keys',
+            KeySchema=[{'AttributeName': 'api_key', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'api_key', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        keys_table.put_item(Item={'api_key': 'test-key', 'rate_limit': 2})
+        mock_get_keys_table.return_value = keys_table
+        mock_get_limits_table.return_value = dynamodb_rate_limits_table
+        
+        first = enforce_rate_limit("test-key")
+        second = enforce_rate_limit("test-key")
+        
+        assert first["X-RateLimit-Limit"] == "2"
+        assert second["X-RateLimit-Remaining"] == "0"
+        with pytest.raises(RateLimitExceededError):
+            enforce_rate_limit("test-key")
+    
     @pytest.mark.asyncio
     async def test_rate_limit_middleware_skips_health_check(self, mock_request):
         """Test middleware skips health check endpoint."""
-        mock_request.url.path = "/v1/health"
+        mock_request.scope = {"path": "/v1/health"}
         
         async def call_next(request):
             return Response(content="OK", status_code=200)
@@ -212,3 +228,47 @@ class TestRateLimitMiddleware:
         
         assert response.status_code == 200
 
+
+
+class TestRequestPipelineMiddleware:
+    """Test rate limiting through the app's request pipeline."""
+    
+    @patch('src.middleware.ip_validation.get_allowed_ips_for_api_key', return_value=None)
+    @patch('src.middleware.rate_limit.get_rate_limit_for_api_key', return_value=1000)
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    def test_pipeline_returns_429_when_exceeded(self, mock_consume, mock_get_limit, mock_get_ips):
+        """Test rate limit errors are rendered as 429 with retry headers."""
+        from fastapi.testclient import TestClient
+        from src.main import app
+        mock_consume.return_value = (False, 0, int(time.time()) + 60)
+        
+        response = TestClient(app).get(
+            '/v1/events/test-id',
+            headers={'X-API-Key': 'test-api-key', 'X-Request-ID': 'test-request-id'}
+        )
+        
+        assert response.status_code == 429
+        assert response.json()['error']['code'] == 'RATE_LIMIT_EXCEEDED'
+        assert 'Retry-After' in response.headers
+        assert response.headers['X-Request-ID'] == 'test-request-id'
+    
+    @patch('src.middleware.ip_validation.get_allowed_ips_for_api_key', return_value=None)
+    @patch('src.middleware.rate_limit.get_rate_limit_for_api_key', return_value=1)
+    @patch('src.middleware.rate_limit.consume_rate_limit')
+    def test_pipeline_adds_headers_without_mutating_shared_response(self, mock_consume, mock_get_limit, mock_get_ips):
+        """Test request ID and rate limit headers don't accumulate on a reused Response."""
+        from fastapi.testclient import TestClient
+        from src.main import app
+        mock_consume.return_value = (True, 0, int(time.time()) + 60)
+        client = TestClient(app)
+        
+        for request_id in ('first-request-id', 'second-request-id'):
+            response = client.options(
+                '/v1/events',
+                headers={'X-API-Key': 'test-api-key', 'X-Request-ID': request_id}
+            )
+            
+            assert response.status_code == 204
+            assert response.headers.get_list('X-Request-ID') == [request_id]
+            assert response.headers.get_list('X-RateLimit-Limit') == ['1']
+            assert 'X-RateLimit-Limit' in response.headers['Access-Control-Expose-Headers']
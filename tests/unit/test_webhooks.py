@@ -6,7 +6,7 @@ from fastapi.testclient import TestClient
 from src.main import app
 from src.database import (
     create_webhook, get_webhook, list_webhooks, update_webhook, delete_webhook,
-    get_active_webhooks_for_event
+    get_active_webhooks_for_event, get_active_webhooks_by_event_type
 )
 from src.models import WebhookCreate, WebhookUpdate
 
@@ -77,6 +77,19 @@ class TestWebhookDatabase:
         
         assert result is None
     
+    @patch('src.database._get_webhooks_table')
+    def test_get_webhook_other_owner(self, mock_table, sample_webhook):
+        """Test owner-scoped lookup hides other keys' webhooks and the secret."""
+        mock_table_instance = Mock()
+        mock_table.return_value = mock_table_instance
+        mock_table_instance.get_item.return_value = {'Item': sample_webhook}
+        
+        result = get_webhook(sample_webhook['webhook_id'], api_key='other-api-key')
+        
+        assert result is None
+        call_kwargs = mock_table_instance.get_item.call_args.kwargs
+        assert 'secret' not in call_kwargs['ProjectionExpression']
+    
     @patch('src.database._get_webhooks_table')
     def test_list_webhooks(self, mock_table, sample_webhook):
         """Test listing webhooks."""
@@ -126,6 +139,23 @@ class TestWebhookDatabase:
         assert result is True
         mock_table_instance.delete_item.assert_called_once()
     
+    @patch('src.database._get_webhooks_table')
+    def test_delete_webhook_wrong_owner(self, mock_table):
+        """Test conditional delete reports not found for another API key."""
+        from botocore.exceptions import ClientError
+        mock_table_instance = Mock()
+        mock_table.return_value = mock_table_instance
+        mock_table_instance.delete_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}},
+            'DeleteItem'
+        )
+        
+        result = delete_webhook('test-webhook-id', expected_api_key='other-api-key')
+        
+        assert result is False
+        call_kwargs = mock_table_instance.delete_item.call_args.kwargs
+        assert call_kwargs['ConditionExpression'] == 'api_key = :expected_api_key'
+    
     @patch('src.database.list_webhooks')
     def test_get_active_webhooks_for_event(self, mock_list_webhooks, sample_webhook):
         """Test getting active webhooks for event type."""
@@ -168,6 +198,24 @@ class TestWebhookDatabase:
         # Should not match
         result2 = get_active_webhooks_for_event('test-api-key', 'order.created')
         assert len(result2) == 0
+    
+    @patch('src.database.list_webhooks')
+    def test_get_active_webhooks_by_event_type(self, mock_list_webhooks, sample_webhook):
+        """Test grouping active webhooks by event type with one lookup."""
+        specific_webhook = {
+            'webhook_id': 'specific-webhook',
+            'events': ['user.created'],
+            'is_active': True
+        }
+        mock_list_webhooks.return_value = {
+            'webhooks': [sample_webhook, specific_webhook]
+        }
+        
+        result = get_active_webhooks_by_event_type('test-api-key', {'user.created', 'order.created'})
+        
+        mock_list_webhooks.assert_called_once()
+        assert [w['webhook_id'] for w in result['user.created']] == ['test-webhook-id', 'specific-webhook']
+        assert [w['webhook_id'] for w in result['order.created']] == ['test-webhook-id']
 
 
 class TestWebhookEndpoints:
@@ -198,6 +246,26 @@ class TestWebhookEndpoints:
             # Should fail without proper auth setup, but test structure
             assert response.status_code in [201, 401]
     
+    def test_create_webhook_invalid_events_messages(self, client):
+        """Test empty and blank event lists report the event list validation messages."""
+        for events, message in (
+            ([], "Value error, events must contain at least one event type or '*'"),
+            ([' '], "Value error, event types cannot be empty"),
+        ):
+            response = client.post(
+                '/v1/webhooks',
+                json={
+                    'url': 'https://example.com/webhook',
+                    'events': events,
+                    'secret': 'test-secret-key-1234567890'
+                },
+                headers={'X-API-Key': 'test-api-key-12345'}
+            )
+            
+            assert response.status_code == 422
+            errors = response.json()['error']['details']['validation_errors']
+            assert errors[0]['message'] == message
+    
     def test_list_webhooks_endpoint(self, client):
         """Test listing webhooks via API."""
         with patch('src.endpoints.webhooks.list_webhooks') as mock_list:
@@ -234,12 +302,7 @@ class TestWebhookEndpoints:
     
     def test_delete_webhook_endpoint(self, client):
         """Test deleting webhook via API."""
-        with patch('src.endpoints.webhooks.get_webhook') as mock_get, \
-             patch('src.endpoints.webhooks.delete_webhook') as mock_delete:
-            mock_get.return_value = {
-                'webhook_id': 'test-id',
-                'api_key': 'test-api-key'
-            }
+        with patch('src.endpoints.webhooks.delete_webhook') as mock_delete:
             mock_delete.return_value = True
             
             response = client.delete(
@@ -249,3 +312,32 @@ class TestWebhookEndpoints:
             
             assert response.status_code in [204, 401, 404]
 
+
+
+class TestWebhookHttpClient:
+    """Test the shared webhook HTTP client."""
+    
+    def test_client_replaced_on_new_loop_is_closed(self):
+        """Test switching event loops closes the previous client on its own loop."""
+        import asyncio
+        from src.endpoints import webhooks
+        
+        async def get_client():
+            return webhooks._get_http_client()
+        
+        old_loop = asyncio.new_event_loop()
+        new_loop = asyncio.new_event_loop()
+        try:
+            old_client = old_loop.run_until_complete(get_client())
+            new_client = new_loop.run_until_complete(get_client())
+            
+            # Let the old loop run the scheduled close
+            old_loop.run_until_complete(asyncio.sleep(0.01))
+            
+            assert new_client is not old_client
+            assert old_client.is_closed
+            assert not new_client.is_closed
+        finally:
+            new_loop.run_until_complete(webhooks.close_http_client())
+            old_loop.close()
+            new_loop.close()